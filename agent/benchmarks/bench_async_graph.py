@@ -0,0 +1,118 @@
+"""Throughput of the async graph path versus the thread-based path.
+
+External calls are replaced by sleeps of realistic duration so the numbers
+reflect how each execution model overlaps I/O, not network variance:
+
+    python -m benchmarks.bench_async_graph --requests 200 --threads 40
+
+The thread-based path mirrors the previous entrypoint, where AgentCore runs
+a sync handler in its worker thread pool and each request holds a thread
+for the full MiniMax call.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.agent import graph, planner
+from src.agent.graph import compiled_graph
+from src.models.input import ChildInput
+from tests.test_planner import MOCK_MINIMAX_RESPONSE
+
+S3_SECONDS = 0.05
+EXA_SECONDS = 0.15
+MINIMAX_SECONDS = 1.0
+
+
+def _patch_dependencies() -> None:
+    def get_progress_records(child_id):
+        time.sleep(S3_SECONDS)
+        return []
+
+    def get_pregenerated_lesson(child_id, key):
+        time.sleep(S3_SECONDS)
+        return None
+
+    def search_teaching_context(topic, age_group):
+        time.sleep(EXA_SECONDS)
+        return ""
+
+    # Same keyword arguments the planner passes to the real client.
+    def generate(system_prompt, user_prompt, request_type="default", timeout=None):
+        time.sleep(MINIMAX_SECONDS)
+        return MOCK_MINIMAX_RESPONSE
+
+    async def agenerate(system_prompt, user_prompt, request_type="default",
+                        timeout=None, on_section=None):
+        await asyncio.sleep(MINIMAX_SECONDS)
+        return MOCK_MINIMAX_RESPONSE
+
+    graph.get_progress_records = get_progress_records
+    graph.get_pregenerated_lesson = get_pregenerated_lesson
+    graph.search_teaching_context = search_teaching_context
+    planner.generate = generate
+    planner.agenerate = agenerate
+
+
+def _inputs(count: int) -> list[dict]:
+    return [
+        {
+            "input": ChildInput.model_validate({
+                "childId": f"child_{i}",
+                "ageGroup": "9-12",
+                "interests": "dinosaurs and pizza",
+                "learningObjectives": ["multiplication"],
+                "requestType": "lesson",
+            })
+        }
+        for i in range(count)
+    ]
+
+
+def fallbacks(results: list[dict]) -> int:
+    """Results that took the fallback path instead of generating."""
+    return sum(1 for r in results if r.get("error"))
+
+
+def run_threaded(count: int, threads: int) -> tuple[float, list[dict]]:
+    inputs = _inputs(count)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(compiled_graph.invoke, inputs))
+    return time.perf_counter() - start, results
+
+
+def run_async(count: int) -> tuple[float, list[dict]]:
+    inputs = _inputs(count)
+
+    async def main() -> list[dict]:
+        return await asyncio.gather(*(compiled_graph.ainvoke(i) for i in inputs))
+
+    start = time.perf_counter()
+    results = asyncio.run(main())
+    return time.perf_counter() - start, results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=40,
+                        help="worker threads for the sync path (AnyIO's default is 40)")
+    args = parser.parse_args()
+
+    _patch_dependencies()
+    threaded, threaded_results = run_threaded(args.requests, args.threads)
+    async_, async_results = run_async(args.requests)
+    failed = fallbacks(threaded_results) + fallbacks(async_results)
+    if failed:
+        print(f"warning: {failed} requests fell back; timings do not reflect generation")
+
+    print(f"{args.requests} concurrent lesson requests")
+    print(f"  threads ({args.threads}): {threaded:6.2f}s  {args.requests / threaded:7.1f} req/s")
+    print(f"  asyncio:       {async_:6.2f}s  {args.requests / async_:7.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
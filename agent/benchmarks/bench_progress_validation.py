@@ -0,0 +1,95 @@
+"""Parse time of ChildInput payloads carrying thousands of inline records.
+
+Compares the previous two-pass validation (records accepted as plain dicts,
+then validated one by one in ``load_history``) with validating them as
+``list[ProgressRecord]`` in one pass, from a dict and straight from the raw
+JSON bytes:
+
+    python -m benchmarks.bench_progress_validation --records 1000 5000 20000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Any, Callable, Optional
+
+from pydantic import BaseModel, Field
+
+from src.models.input import ChildInput
+from src.models.progress import ProgressRecord
+
+
+class TwoPassChildInput(BaseModel):
+    """``ChildInput`` as it was before records were typed."""
+
+    child_id: str = Field(..., alias="childId")
+    age_group: str = Field(..., alias="ageGroup")
+    request_type: str = Field(..., alias="requestType")
+    progress_records: Optional[list[dict[str, Any]]] = Field(
+        default=None, alias="progressRecords"
+    )
+
+
+def _payload(records: int) -> bytes:
+    return json.dumps({
+        "childId": "child_1",
+        "ageGroup": "9-12",
+        "requestType": "report",
+        "progressRecords": [
+            {
+                "recordId": f"rec_{i}",
+                "childId": "child_1",
+                "date": f"2026-{1 + i // 28 % 12:02d}-{1 + i % 28:02d}",
+                "totalQuestions": 10,
+                "correctAnswers": 7,
+                "incorrectAnswers": 3,
+                "sessionsCompleted": 1,
+                "topicBreakdown": {
+                    "addition": {"correct": 5, "incorrect": 1},
+                    "fractions": {"correct": 2, "incorrect": 2},
+                },
+                "timeSpentSeconds": 600,
+            }
+            for i in range(records)
+        ],
+    }).encode()
+
+
+def two_pass(raw: bytes) -> list[ProgressRecord]:
+    child_input = TwoPassChildInput.model_validate(json.loads(raw))
+    return [ProgressRecord.model_validate(r) for r in child_input.progress_records]
+
+
+def single_pass(raw: bytes) -> list[ProgressRecord]:
+    return ChildInput.model_validate(json.loads(raw)).progress_records
+
+
+def single_pass_json(raw: bytes) -> list[ProgressRecord]:
+    return ChildInput.model_validate_json(raw).progress_records
+
+
+def _best_of(func: Callable[[bytes], Any], raw: bytes, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(raw)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--records", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'records':>8} {'two-pass':>10} {'one-pass':>10} {'from-json':>10}")
+    for count in args.records:
+        raw = _payload(count)
+        row = [_best_of(f, raw, args.repeat) for f in (two_pass, single_pass, single_pass_json)]
+        print(f"{count:>8} " + " ".join(f"{t * 1000:>8.1f}ms" for t in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Import-time profile of the container entrypoint (cold-start budget).
+
+Runs ``python -X importtime`` in a fresh interpreter and reports the
+slowest modules by cumulative import time:
+
+    python -m benchmarks.profile_imports --top 20
+    python -m benchmarks.profile_imports --module src.agent.graph
+
+Heavy SDKs (LangGraph, anthropic, langchain_exa) are expected to be absent
+from ``src.entrypoint``'s profile; they load on first request. boto3 and
+botocore are not deferred: bedrock_agentcore imports them at startup.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+AGENT_ROOT = Path(__file__).resolve().parent.parent
+
+# Modules the entrypoint must not import at startup.
+HEAVY_MODULES = ("langgraph", "langchain_exa", "anthropic", "exa_py", "openai")
+
+
+@dataclass
+class ImportProfile:
+    module: str
+    total_seconds: float
+    # (module, cumulative seconds), slowest first
+    entries: list[tuple[str, float]]
+    loaded: set[str]
+
+
+def profile_imports(module: str = "src.entrypoint") -> ImportProfile:
+    """Import ``module`` in a fresh interpreter and parse its import timings."""
+    code = (
+        f"import sys; import {module}; "
+        "sys.stdout.write('\\n'.join(sorted(sys.modules)))"
+    )
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=AGENT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    entries: list[tuple[str, float]] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        entries.append((name.strip(), int(cumulative) / 1_000_000))
+
+    total = next((seconds for name, seconds in entries if name == module), 0.0)
+    entries.sort(key=lambda entry: entry[1], reverse=True)
+    return ImportProfile(module, total, entries, set(proc.stdout.split()))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="src.entrypoint")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    profile = profile_imports(args.module)
+    print(f"{args.module}: {profile.total_seconds * 1000:.0f} ms cumulative import time")
+    print(f"{'cumulative ms':>14}  module")
+    for name, seconds in profile.entries[: args.top]:
+        print(f"{seconds * 1000:14.1f}  {name}")
+
+    heavy = sorted({
+        name.split(".")[0] for name in profile.loaded
+        if name.split(".")[0] in HEAVY_MODULES
+    })
+    if heavy:
+        print(f"\nHeavy packages loaded at import: {', '.join(heavy)}")
+
+
+if __name__ == "__main__":
+    main()
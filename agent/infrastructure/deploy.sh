@@ -44,7 +44,7 @@ echo ""
 echo "Use the AWS Console or the AgentCore starter toolkit CLI to:"
 echo "  1. Create a new AgentCore Runtime pointing to: ${ECR_URI}:${IMAGE_TAG}"
 echo "  2. Attach an IAM role with the following permissions:"
-echo "     - s3:GetObject, s3:PutObject, s3:ListBucket on arn:aws:s3:::${S3_BUCKET_NAME}/*"
+echo "     - s3:GetObject, s3:PutObject, s3:DeleteObject, s3:ListBucket on arn:aws:s3:::${S3_BUCKET_NAME}/*"
 echo "     - secretsmanager:GetSecretValue"
 echo "     - bedrock:InvokeModel (if using Bedrock models in future)"
 echo "  3. Set environment variables:"
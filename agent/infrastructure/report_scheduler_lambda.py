@@ -3,14 +3,54 @@ Lambda function invoked by EventBridge Scheduler to generate weekly reports.
 
 Iterates over all child profiles in S3 and invokes the AgentCore Runtime
 for each child with requestType="report".
+
+The work is sharded so it scales past one invocation's time limit:
+
+1. The scheduled invocation ("plan") enumerates children, splits them into
+   shards of SHARD_SIZE, stores each shard's profile entries under
+   scheduler/runs/{runId}/shards/, and sends one work item per unfinished
+   shard to the SQS queue at SHARD_QUEUE_URL. Children are read from the
+   NDJSON profile index under index/profiles/ (maintained by
+   src/tools/profile_index.py), a few reads in total; without an index the
+   plan falls back to one GET per profiles/*.json object.
+2. Each work item ("shard") is processed by another invocation of this
+   function (SQS trigger), fanning out with bounded MAX_CONCURRENCY. Progress
+   is checkpointed to scheduler/runs/{runId}/checkpoints/ as children
+   finish. A shard that runs low on time re-queues itself and continues
+   where it stopped, including one that starts with too little time left
+   (a later record in an SQS batch).
+
+A queued shard holds a lease (``leaseUntil`` in its checkpoint) until its
+invocation finishes, so a duplicate or retried scheduled invocation during
+a run does not dispatch the same children twice.
+
+The run id defaults to the ISO week, so re-running a failed week resumes it:
+finished shards are skipped and only children without a successful report
+are dispatched again. Re-running a week that already finished therefore
+does nothing; invoke with ``{"force": true}`` to start a fresh run (new
+run id, new plan) instead, e.g. after adding profiles mid-week.
+
+Plans and checkpoints are written to S3, so the function's role needs
+s3:PutObject on scheduler/runs/* besides read access to profiles/,
+index/profiles/, progress/ and reports/ (see scheduler-lambda-policy.json).
+
+Children with no progress since their last report are skipped: when the
+newest object under progress/{childId}/ is no newer than the newest one under
+reports/{childId}/, the archived report still stands and no agent call (and
+so no LLM call) is made. Without SHARD_QUEUE_URL, shards are processed inline
+through a local queue (dev and tests).
 """
 from __future__ import annotations
 
 import json
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from threading import Lock
 
 import boto3
+from botocore.config import Config
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -18,54 +58,315 @@ logger.setLevel(logging.INFO)
 S3_BUCKET = os.environ["S3_BUCKET_NAME"]
 AGENT_RUNTIME_ARN = os.environ["AGENT_RUNTIME_ARN"]
 AWS_REGION = os.environ.get("AWS_REGION", "us-east-1")
+MAX_CONCURRENCY = int(os.environ.get("MAX_CONCURRENCY", "16"))
+SHARD_SIZE = int(os.environ.get("SHARD_SIZE", "500"))
+SHARD_QUEUE_URL = os.environ.get("SHARD_QUEUE_URL", "")
+CHECKPOINT_EVERY = 25
+# Stop dispatching and re-queue the shard when less time than this is left.
+TIME_MARGIN_MS = 60_000
+# How long a queued shard is considered in progress, so a duplicate or
+# retried scheduled invocation does not dispatch it again. Longer than the
+# Lambda timeout plus time spent waiting on the queue.
+SHARD_LEASE_SECONDS = int(os.environ.get("SHARD_LEASE_SECONDS", "1800"))
 
+RUNS_PREFIX = "scheduler/runs"
+PROFILE_INDEX_PREFIX = "index/profiles/"
 
-def handler(event, context):
-    s3 = boto3.client("s3", region_name=AWS_REGION)
-    agentcore = boto3.client("bedrock-agentcore", region_name=AWS_REGION)
 
-    response = s3.list_objects_v2(Bucket=S3_BUCKET, Prefix="profiles/")
-    if "Contents" not in response:
-        logger.info("No child profiles found")
-        return {"statusCode": 200, "body": "No profiles"}
+def _clients():
+    # One connection per worker thread; botocore defaults to a pool of 10.
+    config = Config(max_pool_connections=MAX_CONCURRENCY)
+    s3 = boto3.client("s3", region_name=AWS_REGION, config=config)
+    agentcore = boto3.client("bedrock-agentcore", region_name=AWS_REGION, config=config)
+    return s3, agentcore
 
-    results = []
 
-    for obj in response["Contents"]:
-        key = obj["Key"]
-        if not key.endswith(".json"):
-            continue
+class SqsShardQueue:
+    """Shard work items on SQS; each message triggers one Lambda invocation."""
 
-        try:
-            profile_data = s3.get_object(Bucket=S3_BUCKET, Key=key)
-            profile = json.loads(profile_data["Body"].read().decode("utf-8"))
-
-            payload = json.dumps({
-                "childId": profile["childId"],
-                "ageGroup": profile["ageGroup"],
-                "interests": profile.get("interests", ""),
-                "requestType": "report",
-            }).encode()
-
-            report_response = agentcore.invoke_agent_runtime(
-                agentRuntimeArn=AGENT_RUNTIME_ARN,
-                payload=payload,
-            )
-
-            results.append({
-                "childId": profile["childId"],
-                "status": "success",
-            })
-            logger.info("Report generated for child %s", profile["childId"])
+    def __init__(self, queue_url: str) -> None:
+        self.queue_url = queue_url
+        self._sqs = boto3.client("sqs", region_name=AWS_REGION)
+
+    def send(self, item: dict) -> None:
+        self._sqs.send_message(QueueUrl=self.queue_url, MessageBody=json.dumps(item))
+
+
+class LocalShardQueue:
+    """In-process stand-in for SQS: items are processed by ``drain``."""
+
+    def __init__(self) -> None:
+        self.items: list[dict] = []
+
+    def send(self, item: dict) -> None:
+        self.items.append(item)
+
+    def drain(self, process) -> list[dict]:
+        results = []
+        while self.items:
+            results.extend(process(self.items.pop(0)))
+        return results
+
+
+def _shard_queue():
+    return SqsShardQueue(SHARD_QUEUE_URL) if SHARD_QUEUE_URL else LocalShardQueue()
+
+
+def default_run_id(now: datetime | None = None) -> str:
+    year, week, _ = (now or datetime.now(timezone.utc)).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def forced_run_id(run_id: str, now: datetime | None = None) -> str:
+    """A fresh run id for a manual rerun of ``run_id``."""
+    stamp = (now or datetime.now(timezone.utc)).strftime("%Y%m%dT%H%M%SZ")
+    return f"{run_id}-force-{stamp}"
+
+
+def _read_json(s3, key: str):
+    try:
+        body = s3.get_object(Bucket=S3_BUCKET, Key=key)["Body"].read()
+    except s3.exceptions.NoSuchKey:
+        return None
+    return json.loads(body.decode("utf-8"))
+
+
+def _write_json(s3, key: str, data) -> None:
+    s3.put_object(
+        Bucket=S3_BUCKET, Key=key, Body=json.dumps(data), ContentType="application/json"
+    )
+
+
+def _shard_key(run_id: str, shard: int) -> str:
+    return f"{RUNS_PREFIX}/{run_id}/shards/{shard:05d}.json"
+
+
+def _checkpoint_key(run_id: str, shard: int) -> str:
+    return f"{RUNS_PREFIX}/{run_id}/checkpoints/{shard:05d}.json"
+
+
+def _lease_until() -> str:
+    return datetime.fromtimestamp(
+        datetime.now(timezone.utc).timestamp() + SHARD_LEASE_SECONDS, timezone.utc
+    ).isoformat()
+
+
+def _is_leased(checkpoint: dict) -> bool:
+    lease = checkpoint.get("leaseUntil")
+    return lease is not None and datetime.fromisoformat(lease) > datetime.now(timezone.utc)
+
+
+def _iter_keys(s3, prefix: str, suffix: str):
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=S3_BUCKET, Prefix=prefix):
+        for obj in page.get("Contents", []):
+            if obj["Key"].endswith(suffix):
+                yield obj["Key"]
+
+
+def iter_profile_keys(s3):
+    """Yield every profiles/*.json key, across all list pages."""
+    yield from _iter_keys(s3, "profiles/", ".json")
 
+
+def iter_profiles(s3):
+    """Yield each child's profile entry, from the index when one exists."""
+    index_keys = list(_iter_keys(s3, PROFILE_INDEX_PREFIX, ".ndjson"))
+    if index_keys:
+        for key in index_keys:
+            body = s3.get_object(Bucket=S3_BUCKET, Key=key)["Body"].read().decode("utf-8")
+            for line in body.splitlines():
+                if line.strip():
+                    yield json.loads(line)
+        return
+
+    logger.warning("No profile index; reading every profile object")
+    for key in iter_profile_keys(s3):
+        try:
+            yield _read_json(s3, key)
         except Exception:
-            logger.exception("Failed to generate report for %s", key)
-            results.append({
-                "childId": key,
-                "status": "error",
-            })
+            logger.exception("Skipping unreadable profile %s", key)
+
+
+def _newest_modified(s3, prefix: str) -> datetime | None:
+    """LastModified of the newest object under ``prefix``, if any."""
+    newest = None
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=S3_BUCKET, Prefix=prefix):
+        for obj in page.get("Contents", []):
+            if newest is None or obj["LastModified"] > newest:
+                newest = obj["LastModified"]
+    return newest
+
+
+def is_unchanged(s3, child_id: str) -> bool:
+    """True when the child's last report is at least as new as its progress."""
+    last_report = _newest_modified(s3, f"reports/{child_id}/")
+    if last_report is None:
+        return False
+    last_progress = _newest_modified(s3, f"progress/{child_id}/")
+    return last_progress is None or last_progress <= last_report
+
+
+def trigger_report(s3, agentcore, profile: dict) -> dict:
+    """Invoke the agent for one child's report.
+
+    Returns status "skipped" without invoking the agent when the child has
+    had no progress since their last report.
+    """
+    child_id = profile["childId"]
+    try:
+        if is_unchanged(s3, child_id):
+            logger.info("No new progress for child %s; report skipped", child_id)
+            return {"childId": child_id, "status": "skipped"}
+
+        payload = json.dumps({
+            "childId": child_id,
+            "ageGroup": profile["ageGroup"],
+            "interests": profile.get("interests", ""),
+            "requestType": "report",
+        }).encode()
+
+        agentcore.invoke_agent_runtime(
+            agentRuntimeArn=AGENT_RUNTIME_ARN,
+            payload=payload,
+        )
+        logger.info("Report generated for child %s", child_id)
+        return {"childId": child_id, "status": "success"}
+
+    except Exception:
+        logger.exception("Failed to generate report for %s", child_id)
+        return {"childId": child_id, "status": "error"}
+
+
+def plan_run(s3, queue, run_id: str) -> dict:
+    """Write shard manifests for ``run_id`` (once) and queue unfinished shards.
+
+    Shards whose lease has not expired are already queued or running and
+    are left alone. Returns the shard count, how many shards were queued and
+    how many were in progress.
+    """
+    shard_count = _read_json(s3, f"{RUNS_PREFIX}/{run_id}/plan.json")
+    if shard_count is None:
+        shard, batch = 0, []
+        for profile in iter_profiles(s3):
+            if not profile or "childId" not in profile:
+                continue
+            batch.append(profile)
+            if len(batch) == SHARD_SIZE:
+                _write_json(s3, _shard_key(run_id, shard), batch)
+                shard, batch = shard + 1, []
+        if batch:
+            _write_json(s3, _shard_key(run_id, shard), batch)
+            shard += 1
+        shard_count = {"shards": shard}
+        _write_json(s3, f"{RUNS_PREFIX}/{run_id}/plan.json", shard_count)
+
+    queued = in_progress = 0
+    for shard in range(shard_count["shards"]):
+        checkpoint = _read_json(s3, _checkpoint_key(run_id, shard)) or {"done": []}
+        if checkpoint.get("complete"):
+            continue
+        if _is_leased(checkpoint):
+            in_progress += 1
+            continue
+        _write_json(s3, _checkpoint_key(run_id, shard), {**checkpoint, "leaseUntil": _lease_until()})
+        queue.send({"runId": run_id, "shard": shard})
+        queued += 1
+    logger.info("Run %s: %d shards, %d queued, %d in progress",
+                run_id, shard_count["shards"], queued, in_progress)
+    if shard_count["shards"] and not queued and not in_progress:
+        logger.info("Run %s already finished; invoke with force to run it again", run_id)
+    return {
+        "shards": shard_count["shards"],
+        "shards_queued": queued,
+        "shards_in_progress": in_progress,
+    }
+
+
+def process_shard(s3, agentcore, queue, item: dict, context=None) -> list[dict]:
+    """Dispatch the shard's unfinished children, checkpointing as they finish."""
+    run_id, shard = item["runId"], item["shard"]
+    profiles = _read_json(s3, _shard_key(run_id, shard)) or []
+    checkpoint = _read_json(s3, _checkpoint_key(run_id, shard)) or {"done": []}
+    done = set(checkpoint["done"])
+    todo = [profile for profile in profiles if profile["childId"] not in done]
+
+    results: list[dict] = []
+    lock = Lock()
+
+    def save(complete: bool, lease: str | None) -> None:
+        _write_json(s3, _checkpoint_key(run_id, shard), {
+            "done": sorted(done),
+            "complete": complete,
+            "leaseUntil": lease,
+            "updatedAt": datetime.now(timezone.utc).isoformat(),
+        })
+
+    lease = _lease_until()
+
+    def run(profile: dict) -> None:
+        if context is not None and context.get_remaining_time_in_millis() < TIME_MARGIN_MS:
+            return
+        result = trigger_report(s3, agentcore, profile)
+        with lock:
+            results.append(result)
+            if result["status"] != "error":
+                done.add(profile["childId"])
+            if len(results) % CHECKPOINT_EVERY == 0:
+                save(complete=False, lease=lease)
+
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENCY) as pool:
+        list(pool.map(run, todo))
+
+    attempted = len(results)
+    # A shard out of time is handed to a fresh invocation, even one that
+    # started out of time and attempted nobody. Inline, that would only
+    # loop within this same invocation, so it is left for a rerun instead.
+    if attempted < len(todo) and (attempted or not isinstance(queue, LocalShardQueue)):
+        logger.info("Shard %s/%d paused after %d children; re-queued", run_id, shard, attempted)
+        save(complete=False, lease=_lease_until())
+        queue.send(item)
+    else:
+        # Failed (or never reached) children stay unfinished; re-running the
+        # week retries them.
+        save(complete=len(done) == len(profiles), lease=None)
+    return results
+
+
+def handler(event, context):
+    s3, agentcore = _clients()
+    queue = _shard_queue()
+
+    records = (event or {}).get("Records")
+    if records:
+        results = []
+        for record in records:
+            results.extend(process_shard(s3, agentcore, queue, json.loads(record["body"]), context))
+        return {"statusCode": 200, "body": json.dumps(_summary(results))}
+
+    run_id = (event or {}).get("runId") or default_run_id()
+    if (event or {}).get("force"):
+        run_id = forced_run_id(run_id)
+    plan = plan_run(s3, queue, run_id)
+    if not plan["shards"]:
+        logger.info("No child profiles found")
+        return {"statusCode": 200, "body": "No profiles"}
+    if isinstance(queue, SqsShardQueue):
+        return {"statusCode": 200, "body": json.dumps({"runId": run_id, **plan})}
+
+    results = queue.drain(lambda item: process_shard(s3, agentcore, queue, item, context))
+    return {"statusCode": 200, "body": json.dumps({"runId": run_id, **plan, **_summary(results)})}
+
 
+def _summary(results: list[dict]) -> dict:
+    generated = sum(1 for r in results if r["status"] == "success")
+    skipped = sum(1 for r in results if r["status"] == "skipped")
     return {
-        "statusCode": 200,
-        "body": json.dumps({"reports_triggered": len(results), "results": results}),
+        "reports_triggered": len(results),
+        "succeeded": generated + skipped,
+        "failed": len(results) - generated - skipped,
+        "generated": generated,
+        "skipped": skipped,
+        "results": results,
     }
@@ -0,0 +1,110 @@
+"""Admission control for the entrypoint.
+
+At most ``admission_max_concurrency`` requests run the graph at once. Up to
+``admission_max_queue`` more wait for a slot, each for a bounded time.
+Anything beyond that is shed immediately, so a burst degrades to quick
+cached or fallback answers instead of every request slowing down until
+timeouts cascade. Queue depth, in-flight count and sheds are exported as
+metrics.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections import deque
+from typing import Optional
+
+from src.config import get_settings
+from src.observability import increment_counter, set_gauge
+
+QUEUE_FULL = "queue_full"
+QUEUE_TIMEOUT = "queue_timeout"
+
+
+class AdmissionController:
+    """Concurrency limit with a bounded FIFO wait queue.
+
+    Waiters are futures on their own event loop and are woken thread-safely,
+    so one controller serves every loop in the process.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int) -> None:
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._active = 0
+        self._waiters: deque[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        self._lock = threading.Lock()
+
+    def _publish(self) -> None:
+        set_gauge("admission.in_flight", self._active)
+        set_gauge("admission.queue_depth", len(self._waiters))
+
+    async def acquire(self, timeout: Optional[float]) -> Optional[str]:
+        """Take a slot, waiting up to ``timeout`` seconds in the queue.
+
+        Returns None once admitted (the caller must ``release``), or the
+        reason the request was shed.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._active < self.max_concurrency and not self._waiters:
+                self._active += 1
+                self._publish()
+                return None
+            if len(self._waiters) >= self.max_queue:
+                return self._shed(QUEUE_FULL)
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+            self._publish()
+
+        try:
+            await asyncio.wait_for(waiter[1], timeout)
+            return None
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    self._publish()
+                    if isinstance(exc, asyncio.CancelledError):
+                        raise
+                    return self._shed(QUEUE_TIMEOUT)
+            # A slot was handed over as the wait ended; keep or return it.
+            if isinstance(exc, asyncio.CancelledError):
+                self.release()
+                raise
+            return None
+
+    def release(self) -> None:
+        """Free a slot, handing it straight to the longest waiter if any."""
+        with self._lock:
+            if self._waiters:
+                loop, future = self._waiters.popleft()
+                loop.call_soon_threadsafe(_grant, future)
+            else:
+                self._active -= 1
+            self._publish()
+
+    def _shed(self, reason: str) -> str:
+        increment_counter("admission.shed", 1, {"reason": reason})
+        return reason
+
+
+def _grant(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+_controller: Optional[AdmissionController] = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> AdmissionController:
+    global _controller
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                settings = get_settings()
+                _controller = AdmissionController(
+                    settings.admission_max_concurrency, settings.admission_max_queue
+                )
+    return _controller
@@ -0,0 +1,60 @@
+"""Per-request latency budget carried through the graph (PRD N3, N5).
+
+The entrypoint stores an absolute ``deadline`` (epoch seconds) in
+``AgentState``. Nodes ask how much time is left, skip optional enrichment
+when it would eat into the time generation needs, and give generation
+only what remains. Requests without a deadline (batch jobs) are unbounded.
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Optional
+
+from src.agent.state import AgentState
+from src.config import get_settings
+from src.observability import record_histogram
+
+MIN_OPTIONAL_STEP_SECONDS = 0.5
+
+
+def new_deadline(request_type: str) -> float:
+    """Absolute deadline for a request of this type, starting now."""
+    settings = get_settings()
+    if request_type == "lesson":
+        return time.time() + settings.lesson_deadline_seconds
+    return time.time() + settings.report_deadline_seconds
+
+
+def remaining(state: AgentState) -> Optional[float]:
+    """Seconds left before the deadline, or None when there is no deadline."""
+    deadline = state.get("deadline")
+    if deadline is None:
+        return None
+    return deadline - time.time()
+
+
+def optional_step_budget(state: AgentState) -> Optional[float]:
+    """Time an optional step may use while leaving room for generation.
+
+    Returns None without a deadline and 0 when the step should be skipped.
+    """
+    left = remaining(state)
+    if left is None:
+        return None
+    budget = left - get_settings().generation_reserve_seconds
+    return budget if budget >= MIN_OPTIONAL_STEP_SECONDS else 0.0
+
+
+def generation_budget(state: AgentState) -> Optional[float]:
+    """Time generation may use, or 0 when too little is left to try."""
+    left = remaining(state)
+    if left is None:
+        return None
+    return left if left >= get_settings().generation_min_budget_seconds else 0.0
+
+
+def spent(node: str, started: float) -> dict[str, Any]:
+    """State update recording how long ``node`` took since ``started``."""
+    elapsed = round(time.monotonic() - started, 3)
+    record_histogram("graph.node_seconds", elapsed, {"node": node})
+    return {"budget_spent": {node: elapsed}}
@@ -0,0 +1,161 @@
+"""Per-session graph checkpoints so a retry resumes after completed nodes.
+
+AgentCore routes every request of a ``runtimeSessionId`` to the same
+session microVM, so an in-memory LangGraph checkpointer is enough. Threads
+are keyed by session and request fingerprint. When a retried request finds
+a checkpoint in which history loading and Exa enrichment already finished,
+only the generation node runs again. Checkpoints expire after
+``checkpoint_ttl_seconds``.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Optional
+
+from src.agent.state import AgentState
+from src.aio import run_blocking
+from src.config import get_settings
+from src.observability import increment_counter
+
+logger = logging.getLogger(__name__)
+
+# State types stored in checkpoints; LangGraph only deserializes allowlisted types.
+CHECKPOINT_TYPES = [
+    ("src.models.input", "ChildInput"),
+    ("src.models.progress", "HistoricalSummary"),
+    ("src.models.progress", "DateRange"),
+    ("src.models.progress", "StruggleTopic"),
+    ("src.models.progress", "StrengthTopic"),
+    ("src.models.progress", "TopicScore"),
+]
+
+# Last node before generation in each branch; a retry resumes after it.
+RESUME_AFTER = {
+    "lesson": "exa_search_teaching",
+    "report": "exa_search_parenting",
+}
+# A lesson fallback queued async generation, whose result is stored as a
+# pre-generated lesson; its retry re-enters before the stored-lesson lookup.
+RESUME_AFTER_HANDOFF = "load_history"
+
+
+class SessionCheckpoints:
+    """In-memory checkpointer with a TTL per thread."""
+
+    def __init__(self, ttl_seconds: float) -> None:
+        # Imported here so the entrypoint does not load LangGraph at startup.
+        from langgraph.checkpoint.memory import InMemorySaver
+        from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+        self.ttl_seconds = ttl_seconds
+        self.saver = InMemorySaver(
+            serde=JsonPlusSerializer(allowed_msgpack_modules=CHECKPOINT_TYPES)
+        )
+        self._touched: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def touch(self, thread_id: str) -> None:
+        with self._lock:
+            self._touched[thread_id] = time.monotonic()
+
+    def expire(self) -> int:
+        """Delete threads idle for longer than the TTL; return how many."""
+        cutoff = time.monotonic() - self.ttl_seconds
+        with self._lock:
+            expired = [t for t, touched in self._touched.items() if touched < cutoff]
+            for thread_id in expired:
+                del self._touched[thread_id]
+        for thread_id in expired:
+            self.saver.delete_thread(thread_id)
+        return len(expired)
+
+    def forget(self, thread_id: str) -> None:
+        with self._lock:
+            self._touched.pop(thread_id, None)
+        self.saver.delete_thread(thread_id)
+
+
+@lru_cache(maxsize=1)
+def get_checkpoints() -> Optional[SessionCheckpoints]:
+    """The process-wide checkpoint store, or None when checkpointing is off."""
+    settings = get_settings()
+    if not settings.checkpoint_enabled:
+        return None
+    return SessionCheckpoints(settings.checkpoint_ttl_seconds)
+
+
+@lru_cache(maxsize=1)
+def get_checkpointed_graph():
+    """The graph compiled with the session checkpointer."""
+    from src.agent.graph import build_graph
+
+    return build_graph().compile(checkpointer=get_checkpoints().saver)
+
+
+def thread_id_for(session_id: str, fingerprint: str) -> str:
+    return f"{session_id}:{fingerprint}"
+
+
+async def _handoff_done(previous: Optional[dict[str, Any]]) -> bool:
+    """True when the checkpointed fallback's async generation job is done."""
+    job_id = ((previous or {}).get("output") or {}).get("jobId")
+    if not job_id:
+        return False
+    from src.jobs.generation_queue import DONE, get_job
+
+    job = await run_blocking(get_job, job_id)
+    return job is not None and job["status"] == DONE
+
+
+async def ainvoke_resumable(state: AgentState, thread_id: str) -> dict[str, Any]:
+    """Run the graph on ``thread_id``, resuming a previous attempt if possible.
+
+    - A previous run that reached generation (history and Exa context are
+      in the checkpoint) is resumed at the generation node with a fresh
+      deadline, whether it crashed or ended in a fallback.
+    - A previous run whose fallback queued an async generation job that has
+      since finished is resumed after history loading, so the lesson the
+      job stored is served instead of generating again.
+    - A previous run that completed without error is returned as is.
+    - Anything else starts over on a clean thread.
+    """
+    checkpoints = get_checkpoints()
+    graph = get_checkpointed_graph()
+    config = {"configurable": {"thread_id": thread_id}}
+    checkpoints.expire()
+    checkpoints.touch(thread_id)
+
+    snapshot = await graph.aget_state(config)
+    previous = snapshot.values
+    request_type = state["input"].request_type
+
+    if previous and not snapshot.next and previous.get("output") and not previous.get("error"):
+        return previous
+
+    handed_off = await _handoff_done(previous)
+    if previous and (handed_off or "exa_context" in previous):
+        resume_after = RESUME_AFTER_HANDOFF if handed_off else RESUME_AFTER[request_type]
+        logger.info("Resuming %s from checkpoint after %s", thread_id, resume_after)
+        increment_counter("graph.checkpoint_resumes", 1, {"request_type": request_type})
+        await graph.aupdate_state(
+            config,
+            {
+                "deadline": state.get("deadline"),
+                "stream": state.get("stream", False),
+                "output": None,
+                "error": None,
+            },
+            as_node=resume_after,
+        )
+        result = await graph.ainvoke(None, config)
+    else:
+        if previous:
+            checkpoints.forget(thread_id)
+            checkpoints.touch(thread_id)
+        result = await graph.ainvoke(state, config)
+
+    checkpoints.touch(thread_id)
+    return result
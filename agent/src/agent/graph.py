@@ -1,35 +1,80 @@
 from __future__ import annotations
 
 import logging
-from typing import Any
+import time
+from functools import lru_cache
+from typing import Any, Awaitable, Callable
 
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import END, StateGraph
 
+from src.agent import budget
 from src.agent.orchestrator import select_topic
-from src.agent.planner import planner_generate
-from src.agent.reporter import reporter_generate
+from src.agent.planner import aplanner_generate, planner_generate
+from src.agent.reporter import areporter_generate, delta_report, reporter_generate
 from src.agent.state import AgentState
+from src.aio import call_with_timeout, run_blocking
+from src.config import get_settings
 from src.observability import traced_operation
-from src.models.progress import ProgressRecord
 from src.tools.exa_search import search_parenting_context, search_teaching_context
-from src.tools.s3_data import build_historical_summary, get_progress_records
+from src.tools.lesson_store import get_pregenerated_lesson, lesson_key
+from src.tools.report_store import (
+    archive_report,
+    get_archived_report,
+    get_latest_archive,
+    report_key,
+)
+from src.tools.s3_data import (
+    build_historical_summary,
+    compute_history_version,
+    get_progress_records,
+    merge_progress_records,
+)
 
 logger = logging.getLogger(__name__)
 
 
 def load_history(state: AgentState) -> dict[str, Any]:
-    """Build historical summary from inline progress records or S3 fallback."""
+    """Build historical summary from inline progress records or S3 fallback.
+
+    With a ``progress_checkpoint`` the inline records are a delta and are
+    merged with the records stored in S3 (ProgressCheckpointError when those
+    do not reach the checkpoint). A no-op when the caller already
+    loaded the history (the entrypoint does, to key its result cache on the
+    history version).
+    """
+    if state.get("history_version"):
+        return {}
     child_input = state["input"]
     with traced_operation("load_history", {"child_id": child_input.child_id}):
-        if child_input.progress_records:
-            records = [
-                ProgressRecord.model_validate(r)
-                for r in child_input.progress_records
-            ]
+        inline = child_input.progress_records or []
+        if child_input.progress_checkpoint is not None:
+            records = merge_progress_records(
+                get_progress_records(child_input.child_id),
+                inline,
+                child_input.progress_checkpoint,
+            )
+        elif inline:
+            records = inline
         else:
             records = get_progress_records(child_input.child_id)
         history = build_historical_summary(child_input.child_id, records)
-    return {"history": history}
+    return {"history": history, "history_version": compute_history_version(records)}
+
+
+def load_pregenerated_lesson(state: AgentState) -> dict[str, Any]:
+    """Serve a lesson generated ahead of time for this exact history, if any."""
+    child_input = state["input"]
+    version = state.get("history_version")
+    if not version:
+        return {}
+    with traced_operation("load_pregenerated_lesson", {"child_id": child_input.child_id}):
+        lesson = get_pregenerated_lesson(
+            child_input.child_id, lesson_key(child_input, version)
+        )
+    if lesson is None:
+        return {}
+    return {"output": lesson}
 
 
 def select_topic_node(state: AgentState) -> dict[str, Any]:
@@ -40,46 +85,248 @@ def select_topic_node(state: AgentState) -> dict[str, Any]:
 
 
 def exa_search_teaching(state: AgentState) -> dict[str, Any]:
-    """Enrich with pedagogical best practices via Exa."""
+    """Enrich with pedagogical best practices via Exa.
+
+    Optional: skipped or cut short when the request's remaining budget is
+    needed for lesson generation.
+    """
     topic = state.get("selected_topic", "general")
     age_group = state["input"].age_group
+    timeout = budget.optional_step_budget(state)
+    if timeout == 0:
+        logger.info("Skipping Exa teaching search: latency budget exhausted")
+        return {"exa_context": ""}
     with traced_operation("exa_search_teaching", {"topic": topic, "age_group": age_group}):
-        context = search_teaching_context(topic, age_group)
+        try:
+            context = call_with_timeout(
+                search_teaching_context, topic, age_group, timeout=timeout
+            )
+        except TimeoutError:
+            logger.warning("Exa teaching search exceeded its %.1fs budget", timeout)
+            context = ""
     return {"exa_context": context}
 
 
+def load_archived_report(state: AgentState) -> dict[str, Any]:
+    """Serve the archived report built from this exact history, if any."""
+    child_input = state["input"]
+    version = state.get("history_version")
+    if not version:
+        return {}
+    with traced_operation("load_archived_report", {"child_id": child_input.child_id}):
+        report = get_archived_report(
+            child_input.child_id, report_key(child_input, version)
+        )
+    if report is None:
+        return {}
+    return {"output": report}
+
+
+def update_report(state: AgentState) -> dict[str, Any]:
+    """Update the child's latest report when only the numbers changed.
+
+    Skips the Exa search and LLM call when the history's strengths and
+    struggling topics match those of the latest archived report.
+    """
+    history = state.get("history")
+    if not history or not history.total_sessions or not get_settings().report_delta_enabled:
+        return {}
+    child_id = state["input"].child_id
+    with traced_operation("update_report", {"child_id": child_id}):
+        report = delta_report(get_latest_archive(child_id), history)
+    if report is None:
+        return {}
+    return {"output": report}
+
+
+def archive_generated_report(state: AgentState) -> dict[str, Any]:
+    """Archive a freshly generated report; fallbacks are not archived."""
+    child_input = state["input"]
+    version = state.get("history_version")
+    if state.get("error") or not version or not state.get("output"):
+        return {}
+    try:
+        archive_report(
+            child_input.child_id,
+            report_key(child_input, version),
+            version,
+            state["output"],
+            state.get("history"),
+        )
+    except Exception:
+        logger.warning("Could not archive report for child %s", child_input.child_id,
+                       exc_info=True)
+    return {}
+
+
 def aggregate_data(state: AgentState) -> dict[str, Any]:
     """Prepare aggregated data for the reporter (history is already loaded)."""
     return {}
 
 
-def exa_search_parenting(state: AgentState) -> dict[str, Any]:
-    """Enrich with parent guidance strategies via Exa."""
+def _parenting_topics(state: AgentState) -> list[str]:
     history = state.get("history")
-    topics = []
     if history and history.struggling_topics:
-        topics = [s.topic for s in history.struggling_topics[:3]]
+        return [s.topic for s in history.struggling_topics[:3]]
+    return []
+
+
+def exa_search_parenting(state: AgentState) -> dict[str, Any]:
+    """Enrich with parent guidance strategies via Exa (optional, budgeted)."""
+    topics = _parenting_topics(state)
+    timeout = budget.optional_step_budget(state)
+    if timeout == 0:
+        logger.info("Skipping Exa parenting search: latency budget exhausted")
+        return {"exa_context": ""}
     with traced_operation("exa_search_parenting", {"topics": topics}):
-        context = search_parenting_context(topics)
+        try:
+            context = call_with_timeout(search_parenting_context, topics, timeout=timeout)
+        except TimeoutError:
+            logger.warning("Exa parenting search exceeded its %.1fs budget", timeout)
+            context = ""
     return {"exa_context": context}
 
 
+async def aload_history(state: AgentState) -> dict[str, Any]:
+    return await run_blocking(load_history, state)
+
+
+async def aload_pregenerated_lesson(state: AgentState) -> dict[str, Any]:
+    return await run_blocking(load_pregenerated_lesson, state)
+
+
+async def aload_archived_report(state: AgentState) -> dict[str, Any]:
+    return await run_blocking(load_archived_report, state)
+
+
+async def aupdate_report(state: AgentState) -> dict[str, Any]:
+    return await run_blocking(update_report, state)
+
+
+async def aarchive_generated_report(state: AgentState) -> dict[str, Any]:
+    return await run_blocking(archive_generated_report, state)
+
+
+async def aselect_topic_node(state: AgentState) -> dict[str, Any]:
+    return select_topic_node(state)
+
+
+async def aexa_search_teaching(state: AgentState) -> dict[str, Any]:
+    topic = state.get("selected_topic", "general")
+    age_group = state["input"].age_group
+    timeout = budget.optional_step_budget(state)
+    if timeout == 0:
+        logger.info("Skipping Exa teaching search: latency budget exhausted")
+        return {"exa_context": ""}
+    with traced_operation("exa_search_teaching", {"topic": topic, "age_group": age_group}):
+        try:
+            context = await run_blocking(
+                search_teaching_context, topic, age_group, timeout=timeout
+            )
+        except TimeoutError:
+            logger.warning("Exa teaching search exceeded its %.1fs budget", timeout)
+            context = ""
+    return {"exa_context": context}
+
+
+async def aaggregate_data(state: AgentState) -> dict[str, Any]:
+    return aggregate_data(state)
+
+
+async def aexa_search_parenting(state: AgentState) -> dict[str, Any]:
+    topics = _parenting_topics(state)
+    timeout = budget.optional_step_budget(state)
+    if timeout == 0:
+        logger.info("Skipping Exa parenting search: latency budget exhausted")
+        return {"exa_context": ""}
+    with traced_operation("exa_search_parenting", {"topics": topics}):
+        try:
+            context = await run_blocking(search_parenting_context, topics, timeout=timeout)
+        except TimeoutError:
+            logger.warning("Exa parenting search exceeded its %.1fs budget", timeout)
+            context = ""
+    return {"exa_context": context}
+
+
+def _node(
+    name: str,
+    func: Callable[[AgentState], dict[str, Any]],
+    afunc: Callable[[AgentState], Awaitable[dict[str, Any]]],
+) -> RunnableLambda:
+    """Pair a node's sync and async implementations.
+
+    ``invoke`` runs ``func``; ``ainvoke`` awaits ``afunc``, where S3 and Exa
+    calls (boto3 and the Exa SDK are blocking) run in worker threads and
+    MiniMax calls use the async client, so one event loop can serve many
+    concurrent requests. Both record the node's time in ``budget_spent``.
+    """
+    def timed(state: AgentState) -> dict[str, Any]:
+        started = time.monotonic()
+        result = func(state)
+        return {**result, **budget.spent(name, started)}
+
+    async def atimed(state: AgentState) -> dict[str, Any]:
+        started = time.monotonic()
+        result = await afunc(state)
+        return {**result, **budget.spent(name, started)}
+
+    return RunnableLambda(timed, afunc=atimed, name=name)
+
+
 def route_request(state: AgentState) -> str:
     """Route to planner or reporter branch based on request type."""
     return state["input"].request_type
 
 
+def route_pregenerated(state: AgentState) -> str:
+    """Finish early on a pre-generated lesson hit, otherwise generate live."""
+    return "hit" if state.get("output") else "miss"
+
+
+def route_archived(state: AgentState) -> str:
+    """Finish early on an archived report hit, otherwise try an update."""
+    return "hit" if state.get("output") else "miss"
+
+
+def route_updated(state: AgentState) -> str:
+    """Archive an updated report, otherwise generate live."""
+    return "updated" if state.get("output") else "regenerate"
+
+
 def build_graph() -> StateGraph:
     """Construct the LangGraph StateGraph for the learning system."""
     graph = StateGraph(AgentState)
 
-    graph.add_node("load_history", load_history)
-    graph.add_node("select_topic", select_topic_node)
-    graph.add_node("exa_search_teaching", exa_search_teaching)
-    graph.add_node("planner_generate", planner_generate)
-    graph.add_node("aggregate_data", aggregate_data)
-    graph.add_node("exa_search_parenting", exa_search_parenting)
-    graph.add_node("reporter_generate", reporter_generate)
+    graph.add_node("load_history", _node("load_history", load_history, aload_history))
+    graph.add_node(
+        "load_pregenerated_lesson",
+        _node("load_pregenerated_lesson", load_pregenerated_lesson, aload_pregenerated_lesson),
+    )
+    graph.add_node("select_topic", _node("select_topic", select_topic_node, aselect_topic_node))
+    graph.add_node(
+        "exa_search_teaching",
+        _node("exa_search_teaching", exa_search_teaching, aexa_search_teaching),
+    )
+    graph.add_node(
+        "planner_generate", _node("planner_generate", planner_generate, aplanner_generate)
+    )
+    graph.add_node(
+        "load_archived_report",
+        _node("load_archived_report", load_archived_report, aload_archived_report),
+    )
+    graph.add_node("update_report", _node("update_report", update_report, aupdate_report))
+    graph.add_node("aggregate_data", _node("aggregate_data", aggregate_data, aaggregate_data))
+    graph.add_node(
+        "exa_search_parenting",
+        _node("exa_search_parenting", exa_search_parenting, aexa_search_parenting),
+    )
+    graph.add_node(
+        "reporter_generate", _node("reporter_generate", reporter_generate, areporter_generate)
+    )
+    graph.add_node(
+        "archive_report",
+        _node("archive_report", archive_generated_report, aarchive_generated_report),
+    )
 
     graph.set_entry_point("load_history")
 
@@ -87,8 +334,35 @@ def build_graph() -> StateGraph:
         "load_history",
         route_request,
         {
-            "lesson": "select_topic",
-            "report": "aggregate_data",
+            "lesson": "load_pregenerated_lesson",
+            "report": "load_archived_report",
+        },
+    )
+
+    graph.add_conditional_edges(
+        "load_pregenerated_lesson",
+        route_pregenerated,
+        {
+            "hit": END,
+            "miss": "select_topic",
+        },
+    )
+
+    graph.add_conditional_edges(
+        "load_archived_report",
+        route_archived,
+        {
+            "hit": END,
+            "miss": "update_report",
+        },
+    )
+
+    graph.add_conditional_edges(
+        "update_report",
+        route_updated,
+        {
+            "updated": "archive_report",
+            "regenerate": "aggregate_data",
         },
     )
 
@@ -98,9 +372,21 @@ def build_graph() -> StateGraph:
 
     graph.add_edge("aggregate_data", "exa_search_parenting")
     graph.add_edge("exa_search_parenting", "reporter_generate")
-    graph.add_edge("reporter_generate", END)
+    graph.add_edge("reporter_generate", "archive_report")
+    graph.add_edge("archive_report", END)
 
     return graph
 
 
-compiled_graph = build_graph().compile()
+@lru_cache(maxsize=1)
+def get_compiled_graph():
+    """Compile the graph on first use and reuse it afterwards."""
+    return build_graph().compile()
+
+
+def __getattr__(name: str) -> Any:
+    # ``compiled_graph`` is kept as a lazy module attribute for existing
+    # callers; compiling at import time added to every cold start.
+    if name == "compiled_graph":
+        return get_compiled_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import logging
+import re
 
 from src.models.input import ChildInput
 from src.models.progress import HistoricalSummary
@@ -20,6 +21,25 @@ def sanitize_interests(interests: str) -> str:
     return " ".join(filtered)
 
 
+_INTEREST_SEPARATORS = re.compile(r",|;|&|\band\b|\bor\b", re.IGNORECASE)
+_INTEREST_LEAD_INS = re.compile(
+    r"^(?:(?:i|he|she|they)\s+)?(?:loves?|likes?|enjoys?|into)\s+", re.IGNORECASE
+)
+
+
+def extract_interest_keywords(interests: str) -> list[str]:
+    """Split a sanitized interests string into analogy keywords (PRD S5).
+
+    "loves dinosaurs, space rockets, and pizza" -> ["dinosaurs", "space rockets", "pizza"]
+    """
+    keywords: list[str] = []
+    for part in _INTEREST_SEPARATORS.split(interests):
+        phrase = _INTEREST_LEAD_INS.sub("", part.strip(" .!?")).strip()
+        if phrase and phrase.lower() not in (k.lower() for k in keywords):
+            keywords.append(phrase)
+    return keywords
+
+
 def select_topic(history: HistoricalSummary | None, child_input: ChildInput) -> str:
     """Pick the topic the child should study next (PRD Section 5.2).
 
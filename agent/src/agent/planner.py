@@ -1,13 +1,25 @@
 from __future__ import annotations
 
-import json
 import logging
-from typing import Any
+from typing import Any, Callable, Optional
 
-from src.agent.orchestrator import sanitize_interests
+from langgraph.config import get_stream_writer
+
+from src.agent import budget
+from src.agent.orchestrator import extract_interest_keywords, sanitize_interests
 from src.agent.state import AgentState
-from src.llm.minimax import generate
-from src.models.output import PlannerOutput
+from src.agent.templates import (
+    aget_lesson_template,
+    get_lesson_template,
+    personalize_template,
+)
+from src.aio import run_blocking
+from src.config import get_settings
+from src.jobs.generation_queue import enqueue_lesson
+from src.llm.minimax import DeadlineExceededError, agenerate, generate
+from src.llm.resilience import MiniMaxUnavailableError
+from src.models.input import ChildInput
+from src.models.output import LessonPlan, PlannerOutput, VideoScript
 
 logger = logging.getLogger(__name__)
 
@@ -48,15 +60,48 @@ Respond ONLY with the JSON object.\
 """
 
 
-def planner_generate(state: AgentState) -> dict[str, Any]:
-    """Generate a lesson plan and video script (PRD Section 4.1)."""
+def fallback_output(error: str = "planner_generation_failed") -> dict[str, Any]:
+    """The ``partial_success`` lesson answer used when generation is not possible."""
+    return {
+        "output": {
+            "status": "partial_success",
+            "message": "We're preparing your lesson. It will be ready in a moment.",
+            "fallback": True,
+        },
+        "error": error,
+    }
+
+
+def _handoff(state: AgentState, error: str = "planner_generation_failed") -> dict[str, Any]:
+    """Fallback output; requests on a latency budget also queue async generation.
+
+    The queued job's id is returned as ``jobId`` so the client can poll it.
+    Its lesson is stored as pre-generated and served on the next request.
+    """
+    fallback = fallback_output(error)
+    if state.get("deadline") is not None:
+        job_id = enqueue_lesson(state)
+        if job_id is not None:
+            fallback["output"]["jobId"] = job_id
+    return fallback
+
+
+async def _ahandoff(
+    state: AgentState, error: str = "planner_generation_failed"
+) -> dict[str, Any]:
+    """``_handoff`` for async nodes; queueing a job may block on file I/O."""
+    return await run_blocking(_handoff, state, error)
+
+
+def _safe_interests(child_input: ChildInput) -> str:
+    return sanitize_interests(child_input.interests) or "learning and exploring"
+
+
+def _build_prompts(state: AgentState) -> tuple[str, str]:
     child_input = state["input"]
     topic = state.get("selected_topic", "general")
     exa_context = state.get("exa_context", "")
-
-    safe_interests = sanitize_interests(child_input.interests)
-    if not safe_interests:
-        safe_interests = "learning and exploring"
+    safe_interests = _safe_interests(child_input)
 
     system_prompt = PLANNER_SYSTEM_PROMPT.format(
         age_group=child_input.age_group,
@@ -69,18 +114,114 @@ def planner_generate(state: AgentState) -> dict[str, Any]:
         f"Create a {topic} lesson for a {child_input.age_group} year old "
         f"who loves {safe_interests}."
     )
+    return system_prompt, user_prompt
+
+
+def planner_generate(state: AgentState) -> dict[str, Any]:
+    """Generate a lesson plan and video script (PRD Section 4.1).
+
+    In "templated" planner mode the lesson is built from a cached
+    topic x age-group template personalized locally with the child's
+    interests instead of a full per-child generation.
+    """
+    child_input = state["input"]
+    timeout = budget.generation_budget(state)
+    if timeout == 0:
+        logger.warning("Planner skipped: not enough latency budget left")
+        return _handoff(state, "planner_deadline_exceeded")
+
+    try:
+        if get_settings().planner_mode == "templated":
+            template = get_lesson_template(
+                state.get("selected_topic", "general"),
+                child_input.age_group,
+                state.get("exa_context", ""),
+                timeout=timeout,
+            )
+            raw = personalize_template(
+                template, extract_interest_keywords(_safe_interests(child_input))
+            )
+        else:
+            system_prompt, user_prompt = _build_prompts(state)
+            raw = generate(
+                system_prompt, user_prompt, request_type="lesson", timeout=timeout
+            )
+        output = PlannerOutput.model_validate(raw)
+        return {"output": output.model_dump(by_alias=True)}
+    except DeadlineExceededError:
+        logger.warning("Planner ran out of latency budget")
+        return _handoff(state, "planner_deadline_exceeded")
+    except MiniMaxUnavailableError as exc:
+        logger.warning("Planner skipped MiniMax call: %s", exc)
+        return _handoff(state)
+    except Exception:
+        logger.exception("Planner generation failed")
+        return _handoff(state)
+
+
+# Streamed lesson sections and the event each is emitted as.
+STREAM_SECTIONS = {
+    "lessonPlan": ("lesson_plan", LessonPlan),
+    "videoScript": ("video_script", VideoScript),
+}
+
+
+def _section_events(state: AgentState) -> Optional[Callable[[str, Any], None]]:
+    """For streaming requests, emit each lesson section once MiniMax completes it."""
+    if not state.get("stream"):
+        return None
+    writer = get_stream_writer()
+
+    def emit(key: str, value: Any) -> None:
+        if key not in STREAM_SECTIONS:
+            return
+        event, model = STREAM_SECTIONS[key]
+        try:
+            data = model.model_validate(value).model_dump(by_alias=True)
+        except Exception:
+            logger.debug("Streamed %s did not validate; left for the final result", key)
+            return
+        writer({"event": event, "data": data})
+
+    return emit
+
+
+async def aplanner_generate(state: AgentState) -> dict[str, Any]:
+    """Async ``planner_generate`` for ``compiled_graph.ainvoke``."""
+    child_input = state["input"]
+    timeout = budget.generation_budget(state)
+    if timeout == 0:
+        logger.warning("Planner skipped: not enough latency budget left")
+        return await _ahandoff(state, "planner_deadline_exceeded")
 
     try:
-        raw = generate(system_prompt, user_prompt)
+        if get_settings().planner_mode == "templated":
+            template = await aget_lesson_template(
+                state.get("selected_topic", "general"),
+                child_input.age_group,
+                state.get("exa_context", ""),
+                timeout=timeout,
+            )
+            raw = personalize_template(
+                template, extract_interest_keywords(_safe_interests(child_input))
+            )
+        else:
+            system_prompt, user_prompt = _build_prompts(state)
+            raw = await agenerate(
+                system_prompt,
+                user_prompt,
+                request_type="lesson",
+                timeout=timeout,
+                on_section=_section_events(state),
+            )
         output = PlannerOutput.model_validate(raw)
         return {"output": output.model_dump(by_alias=True)}
+    except DeadlineExceededError:
+        logger.warning("Planner ran out of latency budget")
+        return await _ahandoff(state, "planner_deadline_exceeded")
+    except MiniMaxUnavailableError as exc:
+        logger.warning("Planner skipped MiniMax call: %s", exc)
+        return await _ahandoff(state)
     except Exception:
         logger.exception("Planner generation failed")
-        return {
-            "output": {
-                "status": "partial_success",
-                "message": "We're preparing your lesson. It will be ready in a moment.",
-                "fallback": True,
-            },
-            "error": "planner_generation_failed",
-        }
+        return await _ahandoff(state)
@@ -1,11 +1,18 @@
 from __future__ import annotations
 
 import logging
-from typing import Any
+import math
+from typing import Any, Optional
 
+from src.agent import budget
 from src.agent.state import AgentState
-from src.llm.minimax import generate
+from src.config import get_settings
+from src.llm.minimax import DeadlineExceededError, agenerate, generate
+from src.llm.resilience import MiniMaxUnavailableError
+from src.models.input import ChildInput
 from src.models.output import ParentReport
+from src.models.progress import HistoricalSummary
+from src.tools.report_store import topic_signature
 
 logger = logging.getLogger(__name__)
 
@@ -58,56 +65,108 @@ Do NOT fabricate or estimate any statistics. Respond ONLY with the JSON object.\
 """
 
 
-def reporter_generate(state: AgentState) -> dict[str, Any]:
-    """Generate a parent progress report (PRD Section 4.2)."""
-    child_input = state["input"]
-    history = state.get("history")
-    exa_context = state.get("exa_context", "")
+def fallback_output(error: str = "reporter_generation_failed") -> dict[str, Any]:
+    """The ``partial_success`` report answer used when generation is not possible."""
+    return {
+        "output": {
+            "status": "partial_success",
+            "message": "Report generation encountered an issue. Please try again shortly.",
+            "fallback": True,
+        },
+        "error": error,
+    }
 
-    if not history:
-        return {
-            "output": {
-                "summary": {
-                    "period": "N/A",
-                    "overallAccuracy": 0,
-                    "sessionsCompleted": 0,
-                    "timeInvestedMinutes": 0,
-                },
-                "patterns": {
-                    "strengths": [],
-                    "challenges": [],
-                    "engagementIndicators": "No data available yet.",
-                },
-                "recommendations": [
-                    {
-                        "area": "Getting Started",
-                        "suggestion": "Complete a few learning sessions to begin tracking progress.",
-                        "rationale": "Insufficient data to generate a meaningful report.",
-                    }
-                ],
+
+def _insufficient_data_output() -> dict[str, Any]:
+    return {
+        "output": {
+            "summary": {
+                "period": "N/A",
+                "overallAccuracy": 0,
+                "sessionsCompleted": 0,
+                "timeInvestedMinutes": 0,
+            },
+            "patterns": {
+                "strengths": [],
+                "challenges": [],
+                "engagementIndicators": "No data available yet.",
             },
-            "error": "insufficient_data",
-        }
+            "recommendations": [
+                {
+                    "area": "Getting Started",
+                    "suggestion": "Complete a few learning sessions to begin tracking progress.",
+                    "rationale": "Insufficient data to generate a meaningful report.",
+                }
+            ],
+        },
+        "error": "insufficient_data",
+    }
+
 
-    struggling_str = "\n".join(
-        f"- {s.topic}: {s.incorrect_rate:.0%} incorrect"
-        for s in history.struggling_topics
-    ) or "None identified"
+# Records are stored one per day, so these many consecutive trend values
+# approximate a week and a month.
+WEEK = 7
+MONTH = 30
+# Same estimate the MiniMax rate limiter uses.
+CHARS_PER_TOKEN = 4
 
-    strength_str = "\n".join(
-        f"- {s.topic}: {s.correct_rate:.0%} correct"
-        for s in history.strengths_topics
-    ) or "None identified"
 
-    total_time = sum(
-        a * history.average_time_per_session for a in [1]
-    ) * history.total_sessions if history.total_sessions else 0
+def compact_trend(trend: list[float], recent: int, max_buckets: int) -> str:
+    """Accuracy trend with older sessions averaged into weekly/monthly buckets.
+
+    The last ``recent`` values are kept as-is; the rest become at most
+    ``max_buckets`` averages, so the text stays bounded however long the
+    history is.
+    """
+    values = [round(a, 2) for a in trend]
+    if len(values) <= recent:
+        return str(values)
+    older, latest = trend[:len(trend) - recent], values[len(values) - recent:]
+    max_buckets = max(max_buckets, 1)
+    size, label = WEEK, "weekly"
+    if math.ceil(len(older) / size) > max_buckets:
+        size, label = MONTH, "monthly"
+    if math.ceil(len(older) / size) > max_buckets:
+        size = math.ceil(len(older) / max_buckets)
+        label = f"{size}-session"
+    buckets = [
+        round(sum(older[i:i + size]) / len(older[i:i + size]), 2)
+        for i in range(0, len(older), size)
+    ]
+    return f"earlier ({label} averages): {buckets}; last {recent} sessions: {latest}"
+
+
+def _topic_lines(lines: list[str], limit: int) -> str:
+    if not lines:
+        return "None identified"
+    shown = lines[:limit]
+    if len(lines) > limit:
+        shown.append(f"- (+{len(lines) - limit} more)")
+    return "\n".join(shown)
+
+
+def _render_prompts(
+    child_input: ChildInput,
+    history: HistoricalSummary,
+    exa_context: str,
+    recent: int,
+    max_buckets: int,
+    max_topics: int,
+) -> tuple[str, str]:
+    struggling_str = _topic_lines(
+        [f"- {s.topic}: {s.incorrect_rate:.0%} incorrect" for s in history.struggling_topics],
+        max_topics,
+    )
+    strength_str = _topic_lines(
+        [f"- {s.topic}: {s.correct_rate:.0%} correct" for s in history.strengths_topics],
+        max_topics,
+    )
 
     system_prompt = REPORTER_SYSTEM_PROMPT.format(
         age_group=child_input.age_group,
         date_range=f"{history.date_range.start} to {history.date_range.end}",
         total_sessions=history.total_sessions,
-        accuracy_trend=[round(a, 2) for a in history.accuracy_trend],
+        accuracy_trend=compact_trend(history.accuracy_trend, recent, max_buckets),
         avg_time=history.average_time_per_session,
         struggling_topics=struggling_str,
         strength_topics=strength_str,
@@ -120,18 +179,143 @@ def reporter_generate(state: AgentState) -> dict[str, Any]:
         f"Generate a progress report for a child aged {child_input.age_group} "
         f"covering {history.date_range.start} to {history.date_range.end}."
     )
+    return system_prompt, user_prompt
+
+
+def _estimated_tokens(prompts: tuple[str, str]) -> int:
+    return sum(len(p) for p in prompts) // CHARS_PER_TOKEN
+
+
+def _build_prompts(
+    child_input: ChildInput, history: HistoricalSummary, exa_context: str
+) -> tuple[str, str]:
+    """Reporter prompts kept under ``reporter_max_input_tokens``.
+
+    Over budget, the trend and topic lists are compacted further and the Exa
+    context is cut last, since it is the only unbounded free text.
+    """
+    settings = get_settings()
+    budget_tokens = settings.reporter_max_input_tokens
+    recent = settings.reporter_trend_recent_sessions
+    max_buckets = settings.reporter_trend_max_buckets
+    max_topics = settings.reporter_max_topics
+
+    levels = [
+        (recent, max_buckets, max_topics),
+        (recent // 2, max_buckets // 2, max(max_topics // 2, 1)),
+        (0, 1, 1),
+    ]
+    for level in levels:
+        prompts = _render_prompts(child_input, history, exa_context, *level)
+        if _estimated_tokens(prompts) <= budget_tokens:
+            return prompts
+
+    overflow = (_estimated_tokens(prompts) - budget_tokens) * CHARS_PER_TOKEN
+    keep = max(len(exa_context) - overflow, 0)
+    logger.info("Reporter prompt over %d tokens; Exa context cut to %d chars",
+                budget_tokens, keep)
+    return _render_prompts(child_input, history, exa_context[:keep], *levels[-1])
+
+
+def local_summary(history: HistoricalSummary) -> dict[str, Any]:
+    """The report's numeric ``summary`` section, computed from the history."""
+    scores = (history.topic_breakdown or {}).values()
+    answered = sum(s.correct + s.incorrect for s in scores)
+    if answered:
+        accuracy = sum(s.correct for s in scores) / answered
+    elif history.accuracy_trend:
+        accuracy = sum(history.accuracy_trend) / len(history.accuracy_trend)
+    else:
+        accuracy = 0.0
+    return {
+        "period": f"{history.date_range.start} to {history.date_range.end}",
+        "overallAccuracy": round(accuracy, 2),
+        "sessionsCompleted": history.total_sessions,
+        "timeInvestedMinutes": round(
+            history.average_time_per_session * history.total_sessions, 1
+        ),
+    }
+
+
+def delta_report(
+    previous: Optional[dict[str, Any]], history: HistoricalSummary
+) -> Optional[dict[str, Any]]:
+    """Update the previous report for a changed history without the LLM.
 
+    ``previous`` is the child's latest archive. When its strengths and
+    struggling topics match the new history, patterns and recommendations
+    still apply and only the numbers are recomputed. Returns None when the
+    topics changed (or there is nothing to update), so the report is
+    regenerated.
+    """
+    if not previous or previous.get("topics") != topic_signature(history):
+        return None
     try:
-        raw = generate(system_prompt, user_prompt)
+        report = ParentReport.model_validate(
+            {**previous["report"], "summary": local_summary(history)}
+        )
+    except Exception:
+        return None
+    return report.model_dump(by_alias=True)
+
+
+def reporter_generate(state: AgentState) -> dict[str, Any]:
+    """Generate a parent progress report (PRD Section 4.2)."""
+    history = state.get("history")
+    if not history:
+        return _insufficient_data_output()
+
+    system_prompt, user_prompt = _build_prompts(
+        state["input"], history, state.get("exa_context", "")
+    )
+    timeout = budget.generation_budget(state)
+    if timeout == 0:
+        logger.warning("Reporter skipped: not enough latency budget left")
+        return fallback_output("reporter_deadline_exceeded")
+
+    try:
+        raw = generate(
+            system_prompt, user_prompt, request_type="report", timeout=timeout
+        )
         output = ParentReport.model_validate(raw)
         return {"output": output.model_dump(by_alias=True)}
+    except DeadlineExceededError:
+        logger.warning("Reporter ran out of latency budget")
+        return fallback_output("reporter_deadline_exceeded")
+    except MiniMaxUnavailableError as exc:
+        logger.warning("Reporter skipped MiniMax call: %s", exc)
+        return fallback_output()
     except Exception:
         logger.exception("Reporter generation failed")
-        return {
-            "output": {
-                "status": "partial_success",
-                "message": "Report generation encountered an issue. Please try again shortly.",
-                "fallback": True,
-            },
-            "error": "reporter_generation_failed",
-        }
+        return fallback_output()
+
+
+async def areporter_generate(state: AgentState) -> dict[str, Any]:
+    """Async ``reporter_generate`` for ``compiled_graph.ainvoke``."""
+    history = state.get("history")
+    if not history:
+        return _insufficient_data_output()
+
+    system_prompt, user_prompt = _build_prompts(
+        state["input"], history, state.get("exa_context", "")
+    )
+    timeout = budget.generation_budget(state)
+    if timeout == 0:
+        logger.warning("Reporter skipped: not enough latency budget left")
+        return fallback_output("reporter_deadline_exceeded")
+
+    try:
+        raw = await agenerate(
+            system_prompt, user_prompt, request_type="report", timeout=timeout
+        )
+        output = ParentReport.model_validate(raw)
+        return {"output": output.model_dump(by_alias=True)}
+    except DeadlineExceededError:
+        logger.warning("Reporter ran out of latency budget")
+        return fallback_output("reporter_deadline_exceeded")
+    except MiniMaxUnavailableError as exc:
+        logger.warning("Reporter skipped MiniMax call: %s", exc)
+        return fallback_output()
+    except Exception:
+        logger.exception("Reporter generation failed")
+        return fallback_output()
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import Any, Optional, TypedDict
+import operator
+from typing import Annotated, Any, Optional, TypedDict
 
 from src.models.input import ChildInput
 from src.models.progress import HistoricalSummary
@@ -8,8 +9,12 @@ from src.models.progress import HistoricalSummary
 
 class AgentState(TypedDict, total=False):
     input: ChildInput
+    deadline: Optional[float]
+    stream: bool
     history: Optional[HistoricalSummary]
+    history_version: Optional[str]
     selected_topic: Optional[str]
     exa_context: Optional[str]
     output: Optional[dict[str, Any]]
     error: Optional[str]
+    budget_spent: Annotated[dict[str, float], operator.or_]
@@ -0,0 +1,305 @@
+"""Two-stage lesson generation: shared templates plus local personalization.
+
+Objectives, activity structure and scene pacing depend only on topic and
+age group, so stage one asks MiniMax for a topic x age-group template whose
+analogies are left as ``{interest}`` slots, and caches it in memory and S3.
+Stage two fills the slots with the child's sanitized interest keywords
+locally, so a cache hit costs no LLM call at all. A template without
+enough slots would give every child the same analogies, so it is rejected
+rather than cached. Concurrent misses for one template share a single
+lookup and generation.
+"""
+from __future__ import annotations
+
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import threading
+from concurrent.futures import CancelledError, Future
+from typing import Any, Optional
+
+from src.aio import run_blocking
+from src.config import get_settings
+from src.llm.minimax import agenerate, generate
+from src.models.output import PlannerOutput
+from src.tools.s3_data import _get_s3
+
+logger = logging.getLogger(__name__)
+
+INTEREST_SLOT = "{interest}"
+TEMPLATE_VERSION = "v1"
+DEFAULT_INTEREST = "things you love"
+# Slotted activities a template needs; the prompt asks for at least this many.
+MIN_SLOTTED_ACTIVITIES = 2
+
+TEMPLATE_SYSTEM_PROMPT = """\
+You are a friendly tutor designing a reusable lesson for children aged {age_group}.
+Create a lesson on {topic}.
+Teaching context for this age group:
+{exa_context}
+
+The lesson will be personalized later. Wherever an activity or scene uses an
+analogy, write the literal placeholder {slot} in place of the child's
+interest (e.g. "Imagine 3 groups of {slot}..."), and set "analogyUsed" to
+"{slot}" for those activities.
+
+Generate a JSON object with this exact structure:
+{{
+  "lessonPlan": {{
+    "title": "string",
+    "learningObjectives": ["string"],
+    "durationMinutes": number (5-10),
+    "activities": [
+      {{
+        "type": "explanation" | "practice" | "review",
+        "content": "string",
+        "analogyUsed": "{slot}" or ""
+      }}
+    ]
+  }},
+  "videoScript": {{
+    "scenes": [
+      {{
+        "visualCue": "string",
+        "dialogue": "string",
+        "durationSeconds": number
+      }}
+    ]
+  }}
+}}
+
+Use the {slot} placeholder in at least {min_slots} activities.
+Respond ONLY with the JSON object.\
+"""
+
+
+class TemplateSlotError(ValueError):
+    """A generated template has too few ``{interest}`` slots to personalize."""
+
+
+_memory_cache: dict[str, dict[str, Any]] = {}
+_memory_lock = threading.Lock()
+# Template lookups in progress, shared by the sync and async paths.
+_in_flight: dict[str, Future] = {}
+_in_flight_lock = threading.Lock()
+
+
+def _template_key(topic: str, age_group: str) -> str:
+    raw = f"{TEMPLATE_VERSION}\n{topic.strip().lower()}\n{age_group}"
+    digest = hashlib.sha256(raw.encode()).hexdigest()[:16]
+    return f"cache/lesson-templates/{digest}.json"
+
+
+def _load_stored(key: str) -> Optional[dict[str, Any]]:
+    settings = get_settings()
+    try:
+        obj = _get_s3().get_object(Bucket=settings.s3_bucket_name, Key=key)
+        return json.loads(obj["Body"].read().decode("utf-8"))
+    except Exception:
+        return None
+
+
+def _store(key: str, template: dict[str, Any]) -> None:
+    settings = get_settings()
+    try:
+        _get_s3().put_object(
+            Bucket=settings.s3_bucket_name,
+            Key=key,
+            Body=json.dumps(template),
+            ContentType="application/json",
+        )
+    except Exception:
+        logger.warning("Failed to store lesson template %s", key, exc_info=True)
+
+
+def _has_interest_slots(template: dict[str, Any]) -> bool:
+    slotted = sum(
+        1 for activity in template["lessonPlan"]["activities"]
+        if INTEREST_SLOT in activity["content"] + activity.get("analogyUsed", "")
+    )
+    return slotted >= MIN_SLOTTED_ACTIVITIES
+
+
+def _validated(raw: Any, topic: str, age_group: str) -> dict[str, Any]:
+    template = PlannerOutput.model_validate(raw).model_dump(by_alias=True)
+    if not _has_interest_slots(template):
+        raise TemplateSlotError(
+            f"Lesson template for {topic!r} ({age_group}) has fewer than "
+            f"{MIN_SLOTTED_ACTIVITIES} {INTEREST_SLOT} slots"
+        )
+    return template
+
+
+def _cached_template(key: str) -> Optional[dict[str, Any]]:
+    with _memory_lock:
+        cached = _memory_cache.get(key)
+    if cached is not None:
+        return cached
+    stored = _load_stored(key)
+    if stored is None:
+        return None
+    try:
+        if _has_interest_slots(stored):
+            return stored
+    except (KeyError, TypeError):
+        pass
+    logger.warning("Ignoring stored lesson template %s without interest slots", key)
+    return None
+
+
+def _remember(key: str, template: dict[str, Any]) -> None:
+    with _memory_lock:
+        _memory_cache[key] = template
+
+
+def _template_prompts(topic: str, age_group: str, exa_context: str) -> tuple[str, str]:
+    system_prompt = TEMPLATE_SYSTEM_PROMPT.format(
+        age_group=age_group,
+        topic=topic,
+        exa_context=exa_context or "Use age-appropriate teaching methods.",
+        slot=INTEREST_SLOT,
+        min_slots=MIN_SLOTTED_ACTIVITIES,
+    )
+    user_prompt = f"Create a reusable {topic} lesson for {age_group} year olds."
+    return system_prompt, user_prompt
+
+
+def _remembered(key: str) -> Optional[dict[str, Any]]:
+    with _memory_lock:
+        return _memory_cache.get(key)
+
+
+def _claim(key: str) -> tuple[Future, bool]:
+    """The in-flight lookup for ``key``, and whether the caller must run it."""
+    with _in_flight_lock:
+        pending = _in_flight.get(key)
+        if pending is not None:
+            return pending, False
+        pending = _in_flight[key] = Future()
+        return pending, True
+
+
+def _release(key: str) -> None:
+    with _in_flight_lock:
+        _in_flight.pop(key, None)
+
+
+def get_lesson_template(
+    topic: str, age_group: str, exa_context: str, timeout: Optional[float] = None
+) -> dict[str, Any]:
+    """Return the cached template for topic x age group, generating it on a miss.
+
+    Concurrent callers missing the same template wait for the first one's
+    result (or error). Raises TemplateSlotError when the generated template
+    cannot be personalized; it is neither cached nor stored.
+    """
+    key = _template_key(topic, age_group)
+    while True:
+        template = _remembered(key)
+        if template is not None:
+            return template
+        pending, leader = _claim(key)
+        if leader:
+            break
+        try:
+            return pending.result()
+        except CancelledError:
+            continue  # the leader was cancelled; take over
+
+    try:
+        template = _cached_template(key)
+        if template is None:
+            raw = generate(
+                *_template_prompts(topic, age_group, exa_context),
+                request_type="lesson_template",
+                timeout=timeout,
+            )
+            template = _validated(raw, topic, age_group)
+            _store(key, template)
+        _remember(key, template)
+    except BaseException as exc:
+        pending.set_exception(exc)
+        raise
+    else:
+        pending.set_result(template)
+        return template
+    finally:
+        _release(key)
+
+
+async def aget_lesson_template(
+    topic: str, age_group: str, exa_context: str, timeout: Optional[float] = None
+) -> dict[str, Any]:
+    """Async ``get_lesson_template``; S3 access runs in a worker thread."""
+    key = _template_key(topic, age_group)
+    while True:
+        template = _remembered(key)
+        if template is not None:
+            return template
+        pending, leader = _claim(key)
+        if leader:
+            break
+        try:
+            return await asyncio.shield(asyncio.wrap_future(pending))
+        except asyncio.CancelledError:
+            if not pending.cancelled():
+                raise  # this caller itself was cancelled
+
+    try:
+        template = await run_blocking(_cached_template, key)
+        if template is None:
+            raw = await agenerate(
+                *_template_prompts(topic, age_group, exa_context),
+                request_type="lesson_template",
+                timeout=timeout,
+            )
+            template = _validated(raw, topic, age_group)
+            await run_blocking(_store, key, template)
+        _remember(key, template)
+    except asyncio.CancelledError:
+        # Waiting callers wake up and one of them runs the lookup itself.
+        pending.cancel()
+        raise
+    except BaseException as exc:
+        pending.set_exception(exc)
+        raise
+    else:
+        pending.set_result(template)
+        return template
+    finally:
+        _release(key)
+
+
+def personalize_template(template: dict[str, Any], keywords: list[str]) -> dict[str, Any]:
+    """Fill ``{interest}`` slots, rotating through the child's interest keywords.
+
+    Each slotted activity and scene takes the next keyword so a child with
+    two or more interests gets at least two different analogies.
+    """
+    keywords = keywords or [DEFAULT_INTEREST]
+    lesson = copy.deepcopy(template)
+    turn = 0
+
+    for activity in lesson["lessonPlan"]["activities"]:
+        if INTEREST_SLOT not in activity["content"] + activity.get("analogyUsed", ""):
+            continue
+        keyword = keywords[turn % len(keywords)]
+        turn += 1
+        activity["content"] = activity["content"].replace(INTEREST_SLOT, keyword)
+        activity["analogyUsed"] = activity.get("analogyUsed", "").replace(
+            INTEREST_SLOT, keyword
+        )
+
+    for scene in lesson["videoScript"]["scenes"]:
+        if INTEREST_SLOT not in scene["dialogue"] + scene["visualCue"]:
+            continue
+        keyword = keywords[turn % len(keywords)]
+        turn += 1
+        scene["dialogue"] = scene["dialogue"].replace(INTEREST_SLOT, keyword)
+        scene["visualCue"] = scene["visualCue"].replace(INTEREST_SLOT, keyword)
+
+    title = lesson["lessonPlan"]["title"]
+    lesson["lessonPlan"]["title"] = title.replace(INTEREST_SLOT, keywords[0])
+    return lesson
@@ -0,0 +1,50 @@
+"""Helpers for running blocking SDK calls from async code.
+
+boto3 and the Exa SDK are synchronous. Async graph nodes hand those calls
+to a dedicated thread pool sized for short I/O waits, rather than asyncio's
+default executor (``min(32, cpu + 4)`` threads), which would become the
+bottleneck long before the event loop does.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from src.config import get_settings
+
+T = TypeVar("T")
+
+_io_executor: ThreadPoolExecutor | None = None
+
+
+def _get_io_executor() -> ThreadPoolExecutor:
+    global _io_executor
+    if _io_executor is None:
+        _io_executor = ThreadPoolExecutor(
+            max_workers=get_settings().io_max_workers, thread_name_prefix="blocking-io"
+        )
+    return _io_executor
+
+
+async def run_blocking(
+    func: Callable[..., T], *args: Any, timeout: float | None = None
+) -> T:
+    """Run ``func(*args)`` on the blocking-I/O pool and await the result.
+
+    With ``timeout``, raises TimeoutError once it elapses; the call itself
+    cannot be interrupted and finishes in the background.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(_get_io_executor(), functools.partial(func, *args))
+    if timeout is None:
+        return await future
+    return await asyncio.wait_for(future, timeout)
+
+
+def call_with_timeout(func: Callable[..., T], *args: Any, timeout: float | None) -> T:
+    """Sync counterpart of ``run_blocking(..., timeout=...)``."""
+    if timeout is None:
+        return func(*args)
+    return _get_io_executor().submit(func, *args).result(timeout=timeout)
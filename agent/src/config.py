@@ -4,8 +4,8 @@ import os
 import json
 import logging
 from functools import lru_cache
+from typing import Literal
 
-import boto3
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
@@ -17,6 +17,8 @@ logger = logging.getLogger(__name__)
 def _fetch_secret(secret_name: str, region: str) -> dict:
     """Fetch a secret from AWS Secrets Manager. Returns empty dict on failure."""
     try:
+        import boto3
+
         client = boto3.client("secretsmanager", region_name=region)
         response = client.get_secret_value(SecretId=secret_name)
         return json.loads(response["SecretString"])
@@ -33,7 +35,55 @@ class Settings(BaseSettings):
     anthropic_base_url: str = "https://api.minimax.io/anthropic"
     minimax_model: str = "MiniMax-M2.5-highspeed"
     minimax_max_tokens: int = 4096
+    minimax_adaptive_max_tokens: bool = True
+    minimax_max_tokens_min_samples: int = 50
+    minimax_max_tokens_margin: float = 1.25
+    minimax_max_tokens_floor: int = 512
     minimax_timeout_seconds: float = 60.0
+    minimax_hedge_enabled: bool = False
+    minimax_hedge_percentile: float = 0.9
+    minimax_hedge_min_samples: int = 20
+    minimax_hedge_max_rate: float = 0.1
+    # Concurrent sync MiniMax calls when hedging (primaries and hedges).
+    minimax_max_concurrency: int = 64
+    minimax_requests_per_minute: int = 120
+    minimax_tokens_per_minute: int = 400_000
+    minimax_rate_limit_max_wait_seconds: float = 5.0
+    minimax_breaker_failure_threshold: int = 5
+    minimax_breaker_reset_seconds: float = 30.0
+    planner_mode: Literal["single", "templated"] = "single"
+    lesson_deadline_seconds: float = 10.0
+    report_deadline_seconds: float = 60.0
+    generation_min_budget_seconds: float = 2.0
+    generation_reserve_seconds: float = 6.0
+    io_max_workers: int = 64
+    batch_max_items: int = 500
+    batch_max_concurrency: int = 8
+    result_cache_ttl_seconds: float = 600.0
+    result_cache_max_entries: int = 1024
+    warmup_enabled: bool = True
+    warmup_timeout_seconds: float = 10.0
+    checkpoint_enabled: bool = True
+    checkpoint_ttl_seconds: float = 900.0
+    admission_max_concurrency: int = 32
+    admission_max_queue: int = 64
+    admission_queue_timeout_seconds: float = 1.0
+    generation_queue_backend: Literal["none", "memory", "file", "s3"] = "s3"
+    generation_queue_dir: str = "/tmp/generation-jobs"
+    generation_workers: int = 2
+    # How long the memory backend keeps finished jobs for polling.
+    generation_job_ttl_seconds: float = 3600.0
+    # How long an s3-backend worker holds a job before another may take it.
+    generation_job_lease_seconds: float = 900.0
+    payload_max_decompressed_bytes: int = 8_000_000
+    report_archive_cache_ttl_seconds: float = 3600.0
+    report_archive_cache_max_entries: int = 256
+    exa_memory_cache_max_entries: int = 512
+    report_delta_enabled: bool = True
+    reporter_max_input_tokens: int = 3000
+    reporter_trend_recent_sessions: int = 8
+    reporter_trend_max_buckets: int = 12
+    reporter_max_topics: int = 5
     secrets_manager_name: str = ""
 
     model_config = {"env_file": ".env", "extra": "ignore"}
@@ -1,13 +1,29 @@
 from __future__ import annotations
 
+import asyncio
+import base64
+import binascii
+import json
 import logging
 import os
 import sys
+import time
+import zlib
+from collections import Counter
+from typing import AsyncIterator
 
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
 
-from src.agent.graph import compiled_graph
+from src.admission import get_admission_controller
+from src.agent import budget
+from src.agent.checkpoints import ainvoke_resumable, get_checkpoints, thread_id_for
+from src.agent.state import AgentState
+from src.aio import run_blocking
+from src.config import get_settings
 from src.models.input import ChildInput
+from src.result_cache import get_result_cache, request_fingerprint
+from src.tools.s3_data import ProgressCheckpointError
+from src.warmup import start_warmup, warmup_lifespan
 
 logging.basicConfig(
     level=os.getenv("LOG_LEVEL", "INFO"),
@@ -16,48 +32,361 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-app = BedrockAgentCoreApp()
+app = BedrockAgentCoreApp(lifespan=warmup_lifespan)
+
+
+SHED_LOOKUP_TIMEOUT_SECONDS = 0.5
+
+INTERNAL_ERROR = {
+    "status": "error",
+    "message": "An unexpected error occurred. Please try again.",
+}
+
+
+def _graph():
+    """The compiled graph, imported and compiled on first request.
+
+    Keeping LangGraph, the LLM and Exa SDKs out of module import lets the
+    runtime answer health checks sooner after a cold start.
+    """
+    from src.agent.graph import get_compiled_graph
+
+    return get_compiled_graph()
+
+
+def _invalid_payload(exc: Exception) -> dict:
+    return {
+        "status": "error",
+        "message": f"Invalid request payload: {exc}",
+    }
+
+
+def _decode_payload(payload: dict) -> dict:
+    """Unwrap a compressed payload ``{"contentEncoding": "gzip", "body": ...}``.
+
+    ``body`` is the base64 of the gzipped JSON payload. Anything else is
+    returned unchanged. Raises ValueError for a malformed body or one that
+    decompresses past ``payload_max_decompressed_bytes``.
+    """
+    encoding = payload.get("contentEncoding")
+    if encoding is None:
+        return payload
+    if encoding != "gzip":
+        raise ValueError(f"unsupported contentEncoding {encoding!r}")
+    limit = get_settings().payload_max_decompressed_bytes
+    try:
+        compressed = base64.b64decode(payload.get("body") or "", validate=True)
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        raw = decompressor.decompress(compressed, limit)
+        if decompressor.unconsumed_tail:
+            raise ValueError(f"payload exceeds {limit} bytes when decompressed")
+        decoded = json.loads(raw)
+    except (binascii.Error, zlib.error, UnicodeDecodeError, json.JSONDecodeError) as exc:
+        raise ValueError(f"could not decode gzip body: {exc}") from exc
+    if not isinstance(decoded, dict):
+        raise ValueError("decoded payload must be a JSON object")
+    return decoded
+
+
+def _format_result(result: dict) -> dict:
+    """Map final graph state to the response contract."""
+    logger.info("Latency budget spent per node: %s", result.get("budget_spent", {}))
+
+    if result.get("error"):
+        return {
+            "status": "partial_success",
+            "data": result.get("output", {}),
+            "warning": result["error"],
+        }
+
+    return {
+        "status": "success",
+        "data": result.get("output", {}),
+    }
+
+
+async def _invoke_batch(payload: dict) -> dict:
+    """Run many ChildInput payloads through the graph with bounded concurrency.
+
+    Items share the process-wide Exa and template caches. Batch items are
+    offline work (e.g. the weekly report run), so they carry no latency
+    deadline. Each item takes its own admission slot, like a single request,
+    and an item shed under load gets the same fallback answer. Each item
+    gets its own status; one failure never fails the batch.
+    """
+    settings = get_settings()
+    items = payload.get("batch")
+    if not isinstance(items, list) or not items:
+        return _invalid_payload(ValueError("'batch' must be a non-empty list"))
+    if len(items) > settings.batch_max_items:
+        return _invalid_payload(
+            ValueError(f"'batch' accepts at most {settings.batch_max_items} items")
+        )
+
+    requested = payload.get("maxConcurrency", settings.batch_max_concurrency)
+    try:
+        concurrency = max(1, min(int(requested), settings.batch_max_concurrency))
+    except (TypeError, ValueError):
+        return _invalid_payload(ValueError("'maxConcurrency' must be an integer"))
+
+    results: list[dict | None] = [None] * len(items)
+    runnable: list[tuple[int, ChildInput]] = []
+    for index, item in enumerate(items):
+        try:
+            runnable.append((index, ChildInput.model_validate(item)))
+        except Exception as exc:
+            results[index] = _invalid_payload(exc)
+
+    slots = asyncio.Semaphore(concurrency)
+
+    async def run_item(index: int, child_input: ChildInput) -> None:
+        async with slots:
+            results[index] = await _run_admitted({"input": child_input}, None, "")
+
+    await asyncio.gather(*(run_item(index, child_input) for index, child_input in runnable))
+
+    for index, item in enumerate(items):
+        child_id = item.get("childId") if isinstance(item, dict) else None
+        results[index] = {"childId": child_id, **results[index]}
+
+    counts = Counter(r["status"] for r in results)
+    return {
+        "status": "success" if counts["success"] == len(results) else "partial_success",
+        "results": results,
+        "summary": dict(counts),
+    }
 
 
 @app.entrypoint
-def invoke(payload: dict, context=None) -> dict:
+async def invoke(payload: dict, context=None) -> dict:
     """Main entrypoint invoked by AgentCore Runtime.
 
-    Payload must conform to ChildInput schema.
-    Returns the agent output or a structured error.
+    Payload must conform to ChildInput schema, be ``{"batch": [...]}``
+    with a list of ChildInput payloads (see ``_invoke_batch``), or be
+    ``{"jobId": ...}`` to poll an async generation job (see ``_poll_job``).
+    Returns the agent output or a structured error. The graph runs with
+    ``ainvoke`` so concurrent requests share one event loop. Successful
+    responses are cached by request fingerprint and history version, so
+    client retries are answered without rerunning the graph. With
+    ``"stream": true`` the response is a stream of events instead (see
+    ``_stream``). Any of these may arrive gzip-compressed (see
+    ``_decode_payload``).
     """
+    try:
+        payload = _decode_payload(payload)
+    except ValueError as exc:
+        logger.error("Invalid payload: %s", exc)
+        return _invalid_payload(exc)
+
+    if "batch" in payload:
+        logger.info("Received batch request: %d items", len(payload.get("batch") or []))
+        return await _invoke_batch(payload)
+    if "jobId" in payload:
+        return await _poll_job(payload["jobId"])
+
     logger.info("Received request: requestType=%s", payload.get("requestType"))
 
     try:
         child_input = ChildInput.model_validate(payload)
     except Exception as exc:
         logger.error("Invalid payload: %s", exc)
+        return _invalid_payload(exc)
+
+    stream = payload.get("stream") is True
+    state: AgentState = {
+        "input": child_input,
+        "deadline": budget.new_deadline(child_input.request_type),
+        "stream": stream,
+    }
+    try:
+        shed = await _load_history_admitted(state)
+    except ProgressCheckpointError as exc:
+        logger.warning("Rejected delta upload: %s", exc)
+        return _invalid_payload(exc)
+    except Exception:
+        logger.exception("Loading progress history failed")
+        return dict(INTERNAL_ERROR)
+    if shed is not None:
+        return await _shed_response(state, shed)
+
+    key = request_fingerprint(child_input, state["history_version"])
+    if stream:
+        return _stream(state, key)
+    session_id = getattr(context, "session_id", None)
+    return await get_result_cache().get_or_run(
+        key, lambda: _run_admitted(state, session_id, key), _is_cacheable
+    )
+
+
+async def _poll_job(job_id: object) -> dict:
+    """Report an async generation job queued by a planner fallback."""
+    from src.jobs.generation_queue import DONE, FAILED, get_job
+
+    job = await run_blocking(get_job, str(job_id)) if isinstance(job_id, str) else None
+    if job is None:
+        return {"status": "error", "message": f"Unknown jobId: {job_id}"}
+    if job["status"] == DONE:
+        return {"status": "success", "data": job["result"]}
+    if job["status"] == FAILED:
         return {
             "status": "error",
-            "message": f"Invalid request payload: {exc}",
+            "message": "Lesson generation failed. Please request a new lesson.",
         }
+    return {"status": "pending", "jobId": job["jobId"]}
+
+
+def _queue_timeout(state: AgentState) -> float:
+    timeout = get_settings().admission_queue_timeout_seconds
+    left = budget.remaining(state)
+    return timeout if left is None else max(0.0, min(timeout, left))
+
+
+async def _load_history_admitted(state: AgentState) -> str | None:
+    """Load history into ``state`` within the admission limit.
 
+    History is loaded up front: its version is part of the cache key, and
+    the graph's load_history node reuses it instead of reloading. The load
+    takes an admission slot of its own, released before the cache lookup,
+    so a burst cannot pile up S3 reads ahead of admission. Returns the
+    reason the request was shed, or None once history is loaded.
+    """
+    from src.agent.graph import aload_history
+
+    controller = get_admission_controller()
+    shed = await controller.acquire(_queue_timeout(state))
+    if shed is not None:
+        return shed
     try:
-        result = compiled_graph.invoke({"input": child_input})
-    except Exception as exc:
+        started = time.monotonic()
+        state.update(await aload_history(state))
+        state.update(budget.spent("load_history", started))
+    finally:
+        controller.release()
+    return None
+
+
+async def _run_admitted(state: AgentState, session_id: str | None, key: str) -> dict:
+    """Run the graph within the admission limit, or answer cheaply if shed."""
+    controller = get_admission_controller()
+    shed = await controller.acquire(_queue_timeout(state))
+    if shed is not None:
+        return await _shed_response(state, shed)
+    try:
+        return await _run_graph(state, session_id, key)
+    finally:
+        controller.release()
+
+
+async def _shed_response(state: AgentState, reason: str) -> dict:
+    """Answer a shed request without the graph.
+
+    Identical requests were already answered from the result cache before
+    admission. Lessons fall back to a pre-generated lesson for this history,
+    then to the usual ``partial_success`` fallback with warning
+    ``overloaded``. Requests shed before their history loaded go straight to
+    that fallback.
+    """
+    child_input = state["input"]
+    logger.warning(
+        "Shedding %s request for child %s: %s",
+        child_input.request_type, child_input.child_id, reason,
+    )
+    if child_input.request_type == "lesson":
+        from src.agent.planner import fallback_output
+        from src.tools.lesson_store import get_pregenerated_lesson, lesson_key
+
+        lesson = None
+        if "history_version" in state:
+            key = lesson_key(child_input, state["history_version"])
+            try:
+                lesson = await run_blocking(
+                    get_pregenerated_lesson, child_input.child_id, key,
+                    timeout=SHED_LOOKUP_TIMEOUT_SECONDS,
+                )
+            except TimeoutError:
+                pass
+        if lesson is not None:
+            return {"status": "success", "data": lesson}
+    else:
+        from src.agent.reporter import fallback_output
+
+    return _format_result(fallback_output("overloaded"))
+
+
+async def _run_graph(state: AgentState, session_id: str | None, key: str) -> dict:
+    """Run the graph, checkpointed per session so a retry can resume."""
+    try:
+        if session_id and get_checkpoints() is not None:
+            result = await ainvoke_resumable(state, thread_id_for(session_id, key))
+        else:
+            result = await _graph().ainvoke(state)
+    except ProgressCheckpointError as exc:
+        # Only batch items load their history inside the graph.
+        logger.warning("Rejected delta upload: %s", exc)
+        return _invalid_payload(exc)
+    except Exception:
         logger.exception("Graph execution failed")
-        return {
-            "status": "error",
-            "message": "An unexpected error occurred. Please try again.",
-        }
+        return dict(INTERNAL_ERROR)
+    return _format_result(result)
 
-    if result.get("error"):
-        return {
-            "status": "partial_success",
-            "data": result.get("output", {}),
-            "warning": result["error"],
-        }
 
-    return {
-        "status": "success",
-        "data": result.get("output", {}),
-    }
+def _is_cacheable(response: dict) -> bool:
+    """Only complete answers are reused; fallbacks get a fresh attempt on retry."""
+    return response["status"] == "success"
+
+
+def _event(name: str, data: dict) -> dict:
+    return {"event": name, "data": data}
+
+
+async def _stream(state: AgentState, key: str) -> AsyncIterator[dict]:
+    """Emit progress events while the graph runs, then the usual response.
+
+    Events, in order: ``history_ready``, ``topic_selected`` (lessons),
+    ``lesson_plan`` and ``video_script`` (lessons, as soon as each section
+    of the MiniMax response is complete), and finally ``result`` carrying
+    exactly the single-response envelope. Sections not streamed live
+    (pre-generated, templated or cached lessons) are emitted from the
+    final output just before ``result``.
+    """
+    yield _event("history_ready", state["history"].model_dump(by_alias=True))
+
+    sent: set[str] = set()
+    response = get_result_cache().get(key)
+    controller = get_admission_controller()
+    shed = None if response is not None else await controller.acquire(_queue_timeout(state))
+    if shed is not None:
+        response = await _shed_response(state, shed)
+    elif response is None:
+        final: dict = {}
+        try:
+            async for mode, chunk in _graph().astream(
+                state, stream_mode=["updates", "custom", "values"]
+            ):
+                if mode == "custom":
+                    sent.add(chunk["event"])
+                    yield chunk
+                elif mode == "updates" and "select_topic" in chunk:
+                    topic = chunk["select_topic"]["selected_topic"]
+                    yield _event("topic_selected", {"topic": topic})
+                elif mode == "values":
+                    final = chunk
+            response = _format_result(final)
+        except Exception:
+            logger.exception("Graph execution failed")
+            response = dict(INTERNAL_ERROR)
+        finally:
+            controller.release()
+        if _is_cacheable(response):
+            get_result_cache().put(key, response)
+
+    data = response.get("data") or {}
+    for section, event in (("lessonPlan", "lesson_plan"), ("videoScript", "video_script")):
+        if event not in sent and section in data:
+            yield _event(event, data[section])
+    yield _event("result", response)
 
 
 if __name__ == "__main__":
+    start_warmup()
     app.run()
@@ -0,0 +1,173 @@
+"""Batch job that generates parent reports for many children in one process.
+
+The scheduler's per-child ``invoke_agent_runtime`` calls each start from
+cold clients and caches. This job runs the report branch of the graph
+(history, Exa parenting search, reporter) in-process instead, so the S3 and
+Exa clients and the Exa caches are shared by every child. The Exa parenting
+search depends only on a child's top struggling topics, so it is run once
+per distinct topic set and the context is reused by every child who shares
+it. Reports are archived with their history version (``report_store``);
+children whose archived report still matches their history are skipped,
+those whose topics are unchanged get a numbers-only update, and on-demand
+report requests are served from the archive.
+
+Run with ``python -m src.jobs.bulk_reports``.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import sys
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+from src.agent.graph import _parenting_topics, load_history, update_report
+from src.agent.reporter import reporter_generate
+from src.agent.state import AgentState
+from src.models.input import ChildInput
+from src.tools.exa_search import search_parenting_context
+from src.tools.profile_index import list_indexed_profiles
+from src.tools.report_store import archive_report, get_archived_report, report_key
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 8
+
+
+def _load_state(profile: dict[str, Any]) -> Optional[AgentState]:
+    """The child's report state with history loaded, or None to skip them."""
+    if profile.get("active") is False:
+        return None
+    try:
+        child_input = ChildInput.model_validate({
+            "childId": profile["childId"],
+            "ageGroup": profile["ageGroup"],
+            "interests": profile.get("interests", ""),
+            "requestType": "report",
+        })
+    except Exception:
+        logger.warning("Skipping invalid profile %s", profile.get("childId"))
+        return None
+    state: AgentState = {"input": child_input}
+    state.update(load_history(state))
+    return state
+
+
+def _safe_load_state(profile: dict[str, Any]) -> tuple[str, Optional[AgentState]]:
+    """``("ready", state)``, ``("skipped", None)`` or ``("failed", None)``."""
+    try:
+        state = _load_state(profile)
+    except Exception:
+        logger.exception("Loading history failed for child %s", profile.get("childId"))
+        return "failed", None
+    return ("ready", state) if state is not None else ("skipped", None)
+
+
+def _parenting_context(topics: tuple[str, ...]) -> str:
+    try:
+        return search_parenting_context(list(topics))
+    except Exception:
+        logger.warning("Exa parenting search failed for %s", topics, exc_info=True)
+        return ""
+
+
+def _is_fresh(state: AgentState) -> bool:
+    key = report_key(state["input"], state["history_version"])
+    return get_archived_report(state["input"].child_id, key) is not None
+
+
+def _try_update(state: AgentState) -> bool:
+    """Archive a numbers-only update of the latest report when topics are unchanged."""
+    try:
+        updated = update_report(state)
+        if not updated:
+            return False
+        _archive(state, updated["output"])
+        return True
+    except Exception:
+        logger.warning("Report update failed for child %s", state["input"].child_id,
+                       exc_info=True)
+        return False
+
+
+def _archive(state: AgentState, report: dict[str, Any]) -> None:
+    child_input = state["input"]
+    archive_report(
+        child_input.child_id,
+        report_key(child_input, state["history_version"]),
+        state["history_version"],
+        report,
+        state["history"],
+    )
+
+
+def _generate(state: AgentState) -> str:
+    child_input = state["input"]
+    result = reporter_generate(state)
+    if result.get("error") == "insufficient_data":
+        return "insufficient_data"
+    if result.get("error"):
+        logger.warning("Report generation failed for child %s", child_input.child_id)
+        return "failed"
+    _archive(state, result["output"])
+    return "generated"
+
+
+def _safe_generate(state: AgentState) -> str:
+    try:
+        return _generate(state)
+    except Exception:
+        logger.exception("Report generation crashed for child %s", state["input"].child_id)
+        return "failed"
+
+
+def run(
+    profiles: Optional[list[dict[str, Any]]] = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> dict[str, int]:
+    """Generate and archive a report for every child; return status counts.
+
+    Counts "generated", "fresh" (archived report still current), "updated"
+    (numbers refreshed on the latest report, no LLM call),
+    "insufficient_data", "failed" and "skipped" (inactive or invalid profile).
+    """
+    profiles = list_indexed_profiles() if profiles is None else profiles
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        loaded = list(pool.map(_safe_load_state, profiles))
+        states = [state for status, state in loaded if status == "ready"]
+        fresh = list(pool.map(_is_fresh, states))
+        stale = [state for state, is_fresh in zip(states, fresh) if not is_fresh]
+        updated = list(pool.map(_try_update, stale))
+        ready = [state for state, is_updated in zip(stale, updated) if not is_updated]
+
+        by_topics: dict[tuple[str, ...], list[AgentState]] = defaultdict(list)
+        for state in ready:
+            by_topics[tuple(_parenting_topics(state))].append(state)
+        contexts = dict(zip(by_topics, pool.map(_parenting_context, by_topics)))
+        for topics, group in by_topics.items():
+            for state in group:
+                state["exa_context"] = contexts[topics]
+
+        statuses = list(pool.map(_safe_generate, ready))
+
+    counts = Counter(statuses)
+    counts.update(status for status, _ in loaded if status == "failed")
+    logger.info(
+        "Bulk reports finished: %s (%d Exa searches for %d children)",
+        dict(counts), len(by_topics), len(ready),
+    )
+    return {
+        "total": len(profiles),
+        "skipped": sum(1 for status, _ in loaded if status == "skipped"),
+        "fresh": len(states) - len(stale),
+        "updated": len(stale) - len(ready),
+        "exaSearches": len(by_topics),
+        **counts,
+    }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, stream=sys.stdout)
+    print(json.dumps(run()))
@@ -0,0 +1,444 @@
+"""Asynchronous lesson generation off the request path (PRD Section 9.3).
+
+The PRD's secondary fallback for a MiniMax timeout is "queue for async
+generation + notify user". When the planner falls back on a request with a
+latency budget, it hands the already-enriched state (topic, Exa context,
+history version) to this queue and returns the job id with its fallback.
+A worker pool generates the lesson without a deadline and stores it as a
+pre-generated lesson, so the child's next request is served directly;
+clients may also poll ``{"jobId": ...}``.
+
+Backends: ``s3`` (the default: jobs live in the data bucket, so a queued or
+failed generation survives the container being recycled), ``memory``
+(in-process, for tests) and ``file`` (a shared directory; jobs move between
+``pending/``, ``running/`` and ``done/`` by atomic rename, so separate
+worker processes on one host can share it). Run standalone workers with
+``python -m src.jobs.generation_queue``.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Optional
+
+from src.agent.state import AgentState
+from src.config import get_settings
+from src.observability import increment_counter, set_gauge
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF_SECONDS = 5.0
+IDLE_POLL_SECONDS = 0.2
+DEFAULT_JOB_TTL_SECONDS = 3600.0
+DEFAULT_LEASE_SECONDS = 900.0
+
+
+def job_id_for(child_id: str, lesson_key: str) -> str:
+    """Deterministic id, so a retried request reuses the job already queued."""
+    return hashlib.sha256(f"{child_id}\n{lesson_key}".encode()).hexdigest()[:24]
+
+
+class MemoryJobQueue:
+    """In-process job queue.
+
+    Finished (done or failed) jobs stay available to ``get`` for
+    ``ttl_seconds`` and are then dropped.
+    """
+
+    def __init__(self, ttl_seconds: float = DEFAULT_JOB_TTL_SECONDS) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._jobs: dict[str, dict[str, Any]] = {}
+        self._pending: deque[str] = deque()
+        # (expiry, job id) in finishing order; a job finished again later has
+        # a newer expiry in ``_expires`` and its older entry is ignored.
+        self._finished: deque[tuple[float, str]] = deque()
+        self._expires: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _evict_expired(self) -> None:
+        now = time.monotonic()
+        while self._finished and self._finished[0][0] <= now:
+            expires_at, job_id = self._finished.popleft()
+            if self._expires.get(job_id) == expires_at:
+                del self._expires[job_id]
+                del self._jobs[job_id]
+
+    def submit(self, job: dict[str, Any]) -> bool:
+        """Queue ``job`` unless a job with its id is already queued or done."""
+        with self._lock:
+            self._evict_expired()
+            existing = self._jobs.get(job["jobId"])
+            if existing is not None and existing["status"] != FAILED:
+                return False
+            self._expires.pop(job["jobId"], None)
+            self._jobs[job["jobId"]] = job
+            self._pending.append(job["jobId"])
+            set_gauge("generation_queue.depth", len(self._pending))
+            return True
+
+    def claim(self) -> Optional[dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            for _ in range(len(self._pending)):
+                job_id = self._pending.popleft()
+                job = self._jobs[job_id]
+                if job.get("notBefore", 0) > now:
+                    self._pending.append(job_id)
+                    continue
+                job["status"] = RUNNING
+                set_gauge("generation_queue.depth", len(self._pending))
+                return dict(job)
+        return None
+
+    def save(self, job: dict[str, Any]) -> None:
+        """Record a job's new state; pending jobs go back on the queue."""
+        with self._lock:
+            self._evict_expired()
+            self._jobs[job["jobId"]] = job
+            if job["status"] == PENDING:
+                self._pending.append(job["jobId"])
+            elif job["status"] in (DONE, FAILED):
+                expires_at = time.monotonic() + self.ttl_seconds
+                self._expires[job["jobId"]] = expires_at
+                self._finished.append((expires_at, job["jobId"]))
+            set_gauge("generation_queue.depth", len(self._pending))
+
+    def get(self, job_id: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            self._evict_expired()
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+
+class FileJobQueue:
+    """Directory-backed queue shared by processes on one host (dev)."""
+
+    def __init__(self, root: str) -> None:
+        self.root = Path(root)
+        for status in (PENDING, RUNNING, DONE):
+            (self.root / status).mkdir(parents=True, exist_ok=True)
+
+    def _path(self, status: str, job_id: str) -> Path:
+        return self.root / status / f"{job_id}.json"
+
+    def _write(self, path: Path, job: dict[str, Any]) -> None:
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(job))
+        os.replace(tmp, path)
+
+    def submit(self, job: dict[str, Any]) -> bool:
+        existing = self.get(job["jobId"])
+        if existing is not None and existing["status"] != FAILED:
+            return False
+        self._path(DONE, job["jobId"]).unlink(missing_ok=True)
+        self._write(self._path(PENDING, job["jobId"]), job)
+        return True
+
+    def claim(self) -> Optional[dict[str, Any]]:
+        now = time.time()
+        for path in sorted(
+            (self.root / PENDING).glob("*.json"), key=lambda p: p.stat().st_mtime
+        ):
+            try:
+                job = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            if job.get("notBefore", 0) > now:
+                continue
+            running = self._path(RUNNING, job["jobId"])
+            try:
+                os.rename(path, running)  # atomic: only one worker wins
+            except OSError:
+                continue
+            job["status"] = RUNNING
+            self._write(running, job)
+            return job
+        return None
+
+    def save(self, job: dict[str, Any]) -> None:
+        target = PENDING if job["status"] == PENDING else DONE
+        self._write(self._path(target, job["jobId"]), job)
+        self._path(RUNNING, job["jobId"]).unlink(missing_ok=True)
+
+    def get(self, job_id: str) -> Optional[dict[str, Any]]:
+        for status in (DONE, RUNNING, PENDING):
+            try:
+                return json.loads(self._path(status, job_id).read_text())
+            except (OSError, ValueError):
+                continue
+        return None
+
+
+class S3JobQueue:
+    """Queue in the data bucket, shared by every container.
+
+    Jobs live under ``jobs/pending/``, ``jobs/running/`` and ``jobs/done/``.
+    A worker claims a pending job by creating its running object with
+    ``If-None-Match``, so only one worker wins, and holds it for
+    ``lease_seconds``. A job whose worker died is claimed again once the
+    lease runs out, by an ``If-Match`` overwrite that again lets only one
+    worker win.
+    """
+
+    def __init__(self, bucket: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> None:
+        from src.tools.s3_data import _get_s3
+
+        self.bucket = bucket
+        self.lease_seconds = lease_seconds
+        self._s3 = _get_s3()
+
+    def _key(self, status: str, job_id: str) -> str:
+        return f"jobs/{status}/{job_id}.json"
+
+    def _keys(self, status: str) -> list[str]:
+        paginator = self._s3.get_paginator("list_objects_v2")
+        return [
+            obj["Key"]
+            for page in paginator.paginate(Bucket=self.bucket, Prefix=f"jobs/{status}/")
+            for obj in page.get("Contents", [])
+        ]
+
+    def _read(self, key: str) -> Optional[tuple[dict[str, Any], str]]:
+        try:
+            obj = self._s3.get_object(Bucket=self.bucket, Key=key)
+        except self._s3.exceptions.NoSuchKey:
+            return None
+        return json.loads(obj["Body"].read()), obj["ETag"]
+
+    def _write(self, key: str, job: dict[str, Any], **conditions: str) -> bool:
+        """Put ``job``; False when a conditional write lost to another worker."""
+        try:
+            self._s3.put_object(
+                Bucket=self.bucket,
+                Key=key,
+                Body=json.dumps(job),
+                ContentType="application/json",
+                **conditions,
+            )
+        except self._s3.exceptions.ClientError as exc:
+            if exc.response["Error"]["Code"] == "PreconditionFailed":
+                return False
+            raise
+        return True
+
+    def _delete(self, status: str, job_id: str) -> None:
+        self._s3.delete_object(Bucket=self.bucket, Key=self._key(status, job_id))
+
+    def submit(self, job: dict[str, Any]) -> bool:
+        existing = self.get(job["jobId"])
+        if existing is not None and existing["status"] != FAILED:
+            return False
+        self._delete(DONE, job["jobId"])
+        self._write(self._key(PENDING, job["jobId"]), job)
+        return True
+
+    def claim(self) -> Optional[dict[str, Any]]:
+        now = time.time()
+        for key in self._keys(PENDING):
+            found = self._read(key)
+            if found is None or found[0].get("notBefore", 0) > now:
+                continue
+            job = {**found[0], "status": RUNNING, "leaseUntil": now + self.lease_seconds}
+            if self._write(self._key(RUNNING, job["jobId"]), job, IfNoneMatch="*"):
+                self._s3.delete_object(Bucket=self.bucket, Key=key)
+                return job
+        for key in self._keys(RUNNING):
+            found = self._read(key)
+            if found is None or found[0].get("leaseUntil", 0) > now:
+                continue
+            job = {**found[0], "leaseUntil": now + self.lease_seconds}
+            if self._write(key, job, IfMatch=found[1]):
+                logger.warning("Reclaiming generation job %s after its lease expired",
+                               job["jobId"])
+                return job
+        return None
+
+    def save(self, job: dict[str, Any]) -> None:
+        target = PENDING if job["status"] == PENDING else DONE
+        self._write(self._key(target, job["jobId"]), job)
+        self._delete(RUNNING, job["jobId"])
+
+    def get(self, job_id: str) -> Optional[dict[str, Any]]:
+        for status in (DONE, RUNNING, PENDING):
+            found = self._read(self._key(status, job_id))
+            if found is not None:
+                return found[0]
+        return None
+
+
+def run_job(job: dict[str, Any]) -> dict[str, Any]:
+    """Generate the job's lesson without a deadline and store it for serving."""
+    from src.agent.planner import planner_generate
+    from src.models.input import ChildInput
+    from src.tools.lesson_store import put_pregenerated_lesson
+
+    child_input = ChildInput.model_validate(job["input"])
+    state: AgentState = {
+        "input": child_input,
+        "selected_topic": job["selectedTopic"],
+        "exa_context": job["exaContext"],
+    }
+    result = planner_generate(state)
+    if result.get("error"):
+        raise RuntimeError(result["error"])
+    put_pregenerated_lesson(
+        child_input.child_id, job["lessonKey"], job["selectedTopic"], result["output"]
+    )
+    return result["output"]
+
+
+class GenerationWorkerPool:
+    """Threads that claim queued jobs and run them to completion."""
+
+    def __init__(self, queue: Any, workers: int) -> None:
+        self.queue = queue
+        self.workers = workers
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._loop, name=f"generation-worker-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            if not self.process_one():
+                self._stop.wait(IDLE_POLL_SECONDS)
+
+    def process_one(self) -> bool:
+        """Run one claimed job; return False when nothing was ready."""
+        job = self.queue.claim()
+        if job is None:
+            return False
+        job["attempts"] = job.get("attempts", 0) + 1
+        try:
+            job["result"] = run_job(job)
+            job["status"] = DONE
+            increment_counter("generation_queue.jobs", 1, {"status": DONE})
+        except Exception as exc:
+            logger.warning("Generation job %s failed (attempt %d): %s",
+                           job["jobId"], job["attempts"], exc)
+            if job["attempts"] < MAX_ATTEMPTS:
+                job["status"] = PENDING
+                job["notBefore"] = time.time() + RETRY_BACKOFF_SECONDS * job["attempts"]
+            else:
+                job["status"] = FAILED
+                job["error"] = str(exc)
+                increment_counter("generation_queue.jobs", 1, {"status": FAILED})
+        job["updatedAt"] = time.time()
+        self.queue.save(job)
+        return True
+
+
+_queue: Any = None
+_pool: Optional[GenerationWorkerPool] = None
+_lock = threading.Lock()
+
+
+def get_job_queue() -> Any:
+    """The configured queue, or None when async generation is disabled."""
+    global _queue
+    if _queue is None:
+        settings = get_settings()
+        with _lock:
+            if _queue is None and settings.generation_queue_backend == "s3":
+                _queue = S3JobQueue(settings.s3_bucket_name, settings.generation_job_lease_seconds)
+            elif _queue is None and settings.generation_queue_backend == "memory":
+                _queue = MemoryJobQueue(settings.generation_job_ttl_seconds)
+            elif _queue is None and settings.generation_queue_backend == "file":
+                _queue = FileJobQueue(settings.generation_queue_dir)
+    return _queue
+
+
+def _ensure_workers(queue: Any) -> None:
+    global _pool
+    settings = get_settings()
+    if _pool is None and settings.generation_workers > 0:
+        with _lock:
+            if _pool is None:
+                _pool = GenerationWorkerPool(queue, settings.generation_workers)
+                _pool.start()
+
+
+def enqueue_lesson(state: AgentState) -> Optional[str]:
+    """Queue async generation of this request's lesson; return the job id.
+
+    Returns None when the queue is disabled or the state lacks what the
+    worker needs (a history version to key the stored lesson).
+    """
+    from src.tools.lesson_store import lesson_key
+
+    queue = get_job_queue()
+    version = state.get("history_version")
+    if queue is None or not version:
+        return None
+    child_input = state["input"]
+    key = lesson_key(child_input, version)
+    job_id = job_id_for(child_input.child_id, key)
+    job = {
+        "jobId": job_id,
+        "status": PENDING,
+        "childId": child_input.child_id,
+        "lessonKey": key,
+        "input": child_input.model_dump(mode="json", by_alias=True, exclude={"progress_records"}),
+        "selectedTopic": state.get("selected_topic", "general"),
+        "exaContext": state.get("exa_context", ""),
+        "attempts": 0,
+        "createdAt": time.time(),
+    }
+    try:
+        if queue.submit(job):
+            increment_counter("generation_queue.jobs", 1, {"status": PENDING})
+        _ensure_workers(queue)
+    except Exception:
+        logger.warning("Could not queue async generation", exc_info=True)
+        return None
+    return job_id
+
+
+def get_job(job_id: str) -> Optional[dict[str, Any]]:
+    """The job's current state; polling an unfinished job starts workers here.
+
+    A durable job may have been queued by a container that has since been
+    recycled, so it needs a worker pool in whichever container is asked.
+    """
+    queue = get_job_queue()
+    if queue is None:
+        return None
+    job = queue.get(job_id)
+    if job is not None and job["status"] in (PENDING, RUNNING):
+        _ensure_workers(queue)
+    return job
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, stream=sys.stdout)
+    pool = GenerationWorkerPool(get_job_queue(), get_settings().generation_workers)
+    pool.start()
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        pool.stop()
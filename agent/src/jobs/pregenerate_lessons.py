@@ -0,0 +1,95 @@
+"""Nightly batch job that generates each child's next lesson ahead of time.
+
+Topic selection is deterministic given a child's history, so the lesson a
+child will get tomorrow can be produced tonight. For every active profile
+this runs the lesson branch of the graph (history, topic, Exa enrichment,
+planner) and stores the result under ``lessons/{child_id}/{key}.json``.
+The request path serves it directly while the history is unchanged.
+
+Run with ``python -m src.jobs.pregenerate_lessons``.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from src.agent.graph import exa_search_teaching, load_history, select_topic_node
+from src.agent.planner import planner_generate
+from src.agent.state import AgentState
+from src.models.input import ChildInput
+from src.tools.lesson_store import (
+    get_pregenerated_lesson,
+    lesson_key,
+    put_pregenerated_lesson,
+)
+from src.tools.profile_index import list_indexed_profiles
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 4
+
+
+def pregenerate_for_profile(profile: dict[str, Any]) -> str:
+    """Generate and store one child's next lesson.
+
+    Returns "generated", "fresh" (already stored for this history),
+    "failed" or "skipped" (inactive or invalid profile).
+    """
+    if profile.get("active") is False:
+        return "skipped"
+    try:
+        child_input = ChildInput.model_validate({
+            "childId": profile["childId"],
+            "ageGroup": profile["ageGroup"],
+            "interests": profile.get("interests", ""),
+            "learningObjectives": profile.get("learningObjectives"),
+            "requestType": "lesson",
+        })
+    except Exception:
+        logger.warning("Skipping invalid profile %s", profile.get("childId"))
+        return "skipped"
+
+    state: AgentState = {"input": child_input}
+    state.update(load_history(state))
+    key = lesson_key(child_input, state["history_version"])
+    if get_pregenerated_lesson(child_input.child_id, key) is not None:
+        return "fresh"
+
+    state.update(select_topic_node(state))
+    state.update(exa_search_teaching(state))
+    result = planner_generate(state)
+    if result.get("error"):
+        logger.warning("Pre-generation failed for child %s", child_input.child_id)
+        return "failed"
+
+    put_pregenerated_lesson(
+        child_input.child_id, key, state["selected_topic"], result["output"]
+    )
+    return "generated"
+
+
+def _safe_pregenerate(profile: dict[str, Any]) -> str:
+    try:
+        return pregenerate_for_profile(profile)
+    except Exception:
+        logger.exception("Pre-generation crashed for child %s", profile.get("childId"))
+        return "failed"
+
+
+def run(max_workers: int = DEFAULT_MAX_WORKERS) -> dict[str, int]:
+    """Pre-generate lessons for every child profile; return status counts."""
+    profiles = list_indexed_profiles()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        statuses = list(pool.map(_safe_pregenerate, profiles))
+    counts = Counter(statuses)
+    logger.info("Lesson pre-generation finished: %s", dict(counts))
+    return {"total": len(profiles), **counts}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, stream=sys.stdout)
+    print(json.dumps(run()))
@@ -1,75 +1,707 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
-from typing import Any
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Any, Callable
 
-import anthropic
+from src.config import Settings, get_settings
+from src.llm.resilience import CircuitBreaker, RateLimiter
+from src.observability import increment_counter, record_histogram
 
-from src.config import get_settings
+if TYPE_CHECKING:
+    import anthropic
 
 logger = logging.getLogger(__name__)
 
 _client: anthropic.Anthropic | None = None
+_async_client: anthropic.AsyncAnthropic | None = None
+_hedge_executor: ThreadPoolExecutor | None = None
+_rate_limiter: RateLimiter | None = None
+_breaker: CircuitBreaker | None = None
+# Warm-up builds the clients on its own threads while the first request may
+# be building them too; only one of each may exist, or the warmed one is lost.
+_clients_lock = threading.Lock()
+
+LATENCY_WINDOW = 200
+HEDGE_WINDOW = 100
+OUTPUT_SIZE_WINDOW = 500
+OUTPUT_SIZE_PERCENTILE = 0.99
+STRICT_JSON_SUFFIX = (
+    "\n\nIMPORTANT: You MUST respond with valid JSON only. "
+    "No markdown, no explanation, just the JSON object."
+)
+
+
+class GenerationTruncatedError(Exception):
+    """The model hit max_tokens before finishing its response."""
+
+
+class DeadlineExceededError(Exception):
+    """The caller's time budget ran out before MiniMax answered."""
 
 
 def _get_client() -> anthropic.Anthropic:
     global _client
     if _client is None:
+        with _clients_lock:
+            if _client is None:
+                # The SDK is imported on first use to keep it out of cold start.
+                import anthropic
+
+                settings = get_settings()
+                _client = anthropic.Anthropic(
+                    base_url=settings.anthropic_base_url,
+                    api_key=settings.minimax_api_key,
+                    timeout=settings.minimax_timeout_seconds,
+                )
+    return _client
+
+
+def _get_async_client() -> anthropic.AsyncAnthropic:
+    """Async client for ``agenerate``; lives on the entrypoint's event loop."""
+    global _async_client
+    if _async_client is None:
+        with _clients_lock:
+            if _async_client is None:
+                import anthropic
+
+                settings = get_settings()
+                _async_client = anthropic.AsyncAnthropic(
+                    base_url=settings.anthropic_base_url,
+                    api_key=settings.minimax_api_key,
+                    timeout=settings.minimax_timeout_seconds,
+                )
+    return _async_client
+
+
+def _get_rate_limiter() -> RateLimiter:
+    global _rate_limiter
+    if _rate_limiter is None:
         settings = get_settings()
-        _client = anthropic.Anthropic(
-            base_url=settings.anthropic_base_url,
-            api_key=settings.minimax_api_key,
-            timeout=settings.minimax_timeout_seconds,
+        _rate_limiter = RateLimiter(
+            settings.minimax_requests_per_minute,
+            settings.minimax_tokens_per_minute,
         )
-    return _client
+    return _rate_limiter
+
+
+def _get_breaker() -> CircuitBreaker:
+    global _breaker
+    if _breaker is None:
+        settings = get_settings()
+        _breaker = CircuitBreaker(
+            settings.minimax_breaker_failure_threshold,
+            settings.minimax_breaker_reset_seconds,
+        )
+    return _breaker
+
+
+def _estimate_tokens(request: dict[str, Any]) -> int:
+    """Rough upper bound on tokens a request consumes (~4 chars per token)."""
+    chars = len(request["system"]) + sum(
+        len(m["content"]) for m in request["messages"]
+    )
+    return chars // 4 + request["max_tokens"]
+
+
+def _actual_tokens(message: Any) -> int | None:
+    usage = getattr(message, "usage", None)
+    input_tokens = getattr(usage, "input_tokens", None)
+    output_tokens = getattr(usage, "output_tokens", None)
+    if isinstance(input_tokens, int) and isinstance(output_tokens, int):
+        return input_tokens + output_tokens
+    return None
+
+
+def _get_hedge_executor() -> ThreadPoolExecutor:
+    global _hedge_executor
+    if _hedge_executor is None:
+        _hedge_executor = ThreadPoolExecutor(
+            max_workers=get_settings().minimax_max_concurrency,
+            thread_name_prefix="minimax-hedge",
+        )
+    return _hedge_executor
+
+
+class _HedgeTracker:
+    """Recent MiniMax latencies and hedge decisions, shared by all threads."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._decisions: deque[bool] = deque(maxlen=HEDGE_WINDOW)
+
+    def record_latency(self, seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def threshold(self, percentile: float, min_samples: int) -> float | None:
+        """Latency at ``percentile`` of recent calls, or None until warmed up."""
+        with self._lock:
+            if len(self._latencies) < max(min_samples, 1):
+                return None
+            ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(percentile * len(ordered)))
+        return ordered[index]
+
+    def try_hedge(self, max_rate: float) -> bool:
+        """Record a hedge unless the last HEDGE_WINDOW requests used up the budget."""
+        with self._lock:
+            if sum(self._decisions) + 1 > max_rate * HEDGE_WINDOW:
+                return False
+            self._decisions.append(True)
+            return True
+
+    def record_unhedged(self) -> None:
+        with self._lock:
+            self._decisions.append(False)
+
+
+_hedge_tracker = _HedgeTracker()
+
+
+class _OutputSizeTracker:
+    """Recent output token counts per request type, used to size max_tokens."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._sizes: dict[str, deque[int]] = {}
+
+    def record(self, request_type: str, output_tokens: int) -> None:
+        with self._lock:
+            window = self._sizes.setdefault(
+                request_type, deque(maxlen=OUTPUT_SIZE_WINDOW)
+            )
+            window.append(output_tokens)
+
+    def max_tokens(self, request_type: str, settings: Settings) -> int:
+        """p99 of observed output sizes plus a margin, clamped to the configured cap."""
+        ceiling = settings.minimax_max_tokens
+        if not settings.minimax_adaptive_max_tokens:
+            return ceiling
+        with self._lock:
+            sizes = sorted(self._sizes.get(request_type, ()))
+        if len(sizes) < settings.minimax_max_tokens_min_samples:
+            return ceiling
+        p99 = sizes[min(len(sizes) - 1, int(OUTPUT_SIZE_PERCENTILE * len(sizes)))]
+        cap = int(p99 * settings.minimax_max_tokens_margin)
+        return min(ceiling, max(settings.minimax_max_tokens_floor, cap))
+
+
+_output_sizes = _OutputSizeTracker()
+
+
+def _timed_create(client: anthropic.Anthropic, request: dict[str, Any]) -> Any:
+    start = time.monotonic()
+    message = client.messages.create(**request)
+    _hedge_tracker.record_latency(time.monotonic() - start)
+    return message
+
+
+async def _atimed_create(client: anthropic.AsyncAnthropic, request: dict[str, Any]) -> Any:
+    start = time.monotonic()
+    message = await client.messages.create(**request)
+    _hedge_tracker.record_latency(time.monotonic() - start)
+    return message
+
+
+async def _astream_create(
+    client: anthropic.AsyncAnthropic,
+    request: dict[str, Any],
+    on_section: Callable[[str, Any], None],
+) -> Any:
+    """Stream a response, reporting top-level JSON sections as they complete."""
+    start = time.monotonic()
+    sections = JsonSectionParser(on_section)
+    async with client.messages.stream(**request) as stream:
+        async for text in stream.text_stream:
+            sections.feed(text)
+        message = await stream.get_final_message()
+    _hedge_tracker.record_latency(time.monotonic() - start)
+    return message
+
+
+def _first_success(futures: list[Future]) -> Any:
+    """Return the first future to succeed; abandon the rest.
+
+    A synchronous HTTP call cannot be interrupted once started, so losing
+    requests are cancelled if still queued and otherwise left to finish in
+    the background with their result discarded.
+    """
+    pending = set(futures)
+    first_error: BaseException | None = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            error = future.exception()
+            if error is None:
+                for other in pending:
+                    other.cancel()
+                return future.result()
+            first_error = first_error or error
+    raise first_error
+
+
+async def _afirst_success(tasks: list[asyncio.Task]) -> Any:
+    """Async counterpart of ``_first_success``; losing tasks are cancelled."""
+    pending = set(tasks)
+    first_error: BaseException | None = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                error = task.exception()
+                if error is None:
+                    return task.result()
+                first_error = first_error or error
+        raise first_error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _hedge_threshold(settings: Settings) -> float | None:
+    """Seconds to wait before hedging, or None when hedging does not apply."""
+    if not settings.minimax_hedge_enabled:
+        return None
+    threshold = _hedge_tracker.threshold(
+        settings.minimax_hedge_percentile, settings.minimax_hedge_min_samples
+    )
+    if threshold is None:
+        _hedge_tracker.record_unhedged()
+    return threshold
+
+
+def _may_hedge(settings: Settings, request: dict[str, Any], threshold: float) -> bool:
+    if (
+        not _hedge_tracker.try_hedge(settings.minimax_hedge_max_rate)
+        or not _get_rate_limiter().try_acquire(_estimate_tokens(request))
+    ):
+        _hedge_tracker.record_unhedged()
+        return False
+    logger.info("MiniMax slower than p%.0f (%.2fs); sending hedged request",
+                settings.minimax_hedge_percentile * 100, threshold)
+    return True
+
+
+def _settle_hedge(reserved: int) -> Callable[[Any], None]:
+    """Done-callback returning a hedge's unused token reservation.
+
+    ``_send`` settles the primary's reservation; the hedge took its own in
+    ``_may_hedge``. A cancelled hedge is refunded in full.
+    """
+    def settle(future: Any) -> None:
+        if future.cancelled():
+            _get_rate_limiter().settle(reserved, 0)
+            return
+        if future.exception() is not None:
+            return
+        actual = _actual_tokens(future.result())
+        if actual is not None:
+            _get_rate_limiter().settle(reserved, actual)
+
+    return settle
+
+
+def _create_message(
+    client: anthropic.Anthropic, settings: Settings, request: dict[str, Any]
+) -> Any:
+    """Send a request, hedging with a duplicate once it exceeds the latency threshold.
 
+    Raises DeadlineExceededError if no hedge worker picks the request up
+    within its ``timeout``.
+    """
+    threshold = _hedge_threshold(settings)
+    if threshold is None:
+        return _timed_create(client, request)
+
+    executor = _get_hedge_executor()
+    started = threading.Event()
+
+    def send() -> Any:
+        started.set()
+        return _timed_create(client, request)
+
+    primary = executor.submit(send)
+    # The threshold is measured from when the call is sent, not from when it
+    # was queued; otherwise a busy pool would trigger hedges on its own.
+    if not started.wait(request.get("timeout")) and primary.cancel():
+        raise DeadlineExceededError("No MiniMax worker was free within the budget")
+    done, _ = wait([primary], timeout=threshold)
+    if done:
+        _hedge_tracker.record_unhedged()
+        return primary.result()
+    if not _may_hedge(settings, request, threshold):
+        return primary.result()
+
+    hedge = executor.submit(_timed_create, client, request)
+    hedge.add_done_callback(_settle_hedge(_estimate_tokens(request)))
+    return _first_success([primary, hedge])
+
+
+async def _acreate_message(
+    client: anthropic.AsyncAnthropic,
+    settings: Settings,
+    request: dict[str, Any],
+    on_section: Callable[[str, Any], None] | None = None,
+) -> Any:
+    """Async ``_create_message``: the slower of a hedged pair is cancelled.
+
+    Streamed requests are never hedged; a duplicate would interleave its
+    sections with the primary's.
+    """
+    if on_section is not None:
+        return await _astream_create(client, request, on_section)
+    threshold = _hedge_threshold(settings)
+    if threshold is None:
+        return await _atimed_create(client, request)
+
+    primary = asyncio.ensure_future(_atimed_create(client, request))
+    try:
+        done, _ = await asyncio.wait({primary}, timeout=threshold)
+    except asyncio.CancelledError:
+        primary.cancel()
+        raise
+    if done:
+        _hedge_tracker.record_unhedged()
+        return primary.result()
+    if not _may_hedge(settings, request, threshold):
+        return await primary
+
+    hedge = asyncio.ensure_future(_atimed_create(client, request))
+    hedge.add_done_callback(_settle_hedge(_estimate_tokens(request)))
+    return await _afirst_success([primary, hedge])
+
+
+def _is_provider_failure(exc: BaseException) -> bool:
+    """Timeouts, connection errors, 429s and 5xx count against the breaker."""
+    import anthropic
+
+    if isinstance(exc, (anthropic.APITimeoutError, anthropic.APIConnectionError)):
+        return True
+    if isinstance(exc, anthropic.APIStatusError):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return False
+
+
+def _admit(settings: Settings, request: dict[str, Any]) -> tuple[int, float]:
+    """Pass the circuit breaker and reserve rate-limit capacity.
+
+    Returns the reserved token count and how long to wait before sending.
+    Raises MiniMaxUnavailableError without calling MiniMax when the breaker
+    is open or the rate-limit wait would be too long.
+    """
+    breaker = _get_breaker()
+    breaker.before_call()
+    reserved = _estimate_tokens(request)
+    max_wait = min(
+        settings.minimax_rate_limit_max_wait_seconds,
+        request.get("timeout", float("inf")),
+    )
+    try:
+        delay = _get_rate_limiter().reserve(reserved, max_wait)
+    except Exception:
+        breaker.release_probe()
+        raise
+    return reserved, delay
+
+
+def _settle(reserved: int, message: Any = None, error: BaseException | None = None) -> None:
+    breaker = _get_breaker()
+    if error is not None:
+        if _is_provider_failure(error):
+            breaker.record_failure()
+        else:
+            breaker.release_probe()
+        return
+    breaker.record_success()
+    actual = _actual_tokens(message)
+    if actual is not None:
+        _get_rate_limiter().settle(reserved, actual)
+
+
+def _send(
+    client: anthropic.Anthropic, settings: Settings, request: dict[str, Any]
+) -> Any:
+    """Send one request through the shared circuit breaker and rate limiter."""
+    reserved, delay = _admit(settings, request)
+    if delay > 0:
+        time.sleep(delay)
+    try:
+        message = _create_message(client, settings, request)
+    except BaseException as exc:
+        _settle(reserved, error=exc)
+        raise
+    _settle(reserved, message)
+    return message
+
+
+async def _asend(
+    client: anthropic.AsyncAnthropic,
+    settings: Settings,
+    request: dict[str, Any],
+    on_section: Callable[[str, Any], None] | None = None,
+) -> Any:
+    """Async ``_send``: waits for rate-limit capacity without blocking the loop."""
+    reserved, delay = _admit(settings, request)
+    if delay > 0:
+        await asyncio.sleep(delay)
+    try:
+        message = await asyncio.wait_for(
+            _acreate_message(client, settings, request, on_section),
+            request.get("timeout"),
+        )
+    except TimeoutError as exc:
+        _settle(reserved, error=exc)
+        raise DeadlineExceededError("MiniMax did not answer within the budget") from exc
+    except BaseException as exc:
+        _settle(reserved, error=exc)
+        raise
+    _settle(reserved, message)
+    return message
+
+
+def _record_usage(request_type: str, message: Any, max_tokens: int) -> None:
+    usage = getattr(message, "usage", None)
+    output_tokens = getattr(usage, "output_tokens", None)
+    attrs = {"request_type": request_type}
+    if isinstance(output_tokens, int):
+        _output_sizes.record(request_type, output_tokens)
+        record_histogram("minimax.output_tokens", output_tokens, attrs)
+    record_histogram("minimax.max_tokens", max_tokens, attrs)
+
+
+def _build_request(
+    settings: Settings,
+    system_prompt: str,
+    user_prompt: str,
+    max_tokens: int,
+    strict: bool,
+    deadline: float | None,
+) -> dict[str, Any]:
+    request = {
+        "model": settings.minimax_model,
+        "max_tokens": max_tokens,
+        "system": system_prompt + (STRICT_JSON_SUFFIX if strict else ""),
+        "messages": [{"role": "user", "content": user_prompt}],
+    }
+    if deadline is not None:
+        left = deadline - time.monotonic()
+        if left <= 0:
+            raise DeadlineExceededError("No time left for a MiniMax attempt")
+        request["timeout"] = min(left, settings.minimax_timeout_seconds)
+    return request
+
+
+def parse_json_text(text: str) -> dict[str, Any]:
+    """Parse model text as JSON, tolerating a surrounding markdown fence."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1]
+        if text.endswith("```"):
+            text = text[: text.rfind("```")]
+        text = text.strip()
+    return json.loads(text)
+
+
+def _parse_message(message: Any, request_type: str, max_tokens: int) -> dict[str, Any]:
+    """Record usage, reject truncated output and parse the JSON body."""
+    _record_usage(request_type, message, max_tokens)
 
-def generate(system_prompt: str, user_prompt: str) -> dict[str, Any]:
+    if getattr(message, "stop_reason", None) == "max_tokens":
+        increment_counter("minimax.truncations", 1, {"request_type": request_type})
+        raise GenerationTruncatedError(
+            f"{request_type} response truncated at {max_tokens} tokens"
+        )
+
+    text = next(
+        block.text for block in message.content
+        if hasattr(block, "text")
+    )
+    return parse_json_text(text)
+
+
+class JsonSectionParser:
+    """Incrementally scan a streamed JSON object for completed top-level values.
+
+    Text before the opening brace (e.g. a markdown fence) is ignored. Each
+    ``key: value`` pair of the outer object is decoded and passed to
+    ``on_section`` once the value is followed by ``,`` or the closing brace.
+    Values that fail to decode are skipped; the full response is still
+    parsed and validated as usual once the stream ends.
+    """
+
+    def __init__(self, on_section: Callable[[str, Any], None]) -> None:
+        self._on_section = on_section
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+        self._key: str | None = None
+        self._value_start: int | None = None
+
+    def feed(self, delta: str) -> None:
+        self._text += delta
+        while self._pos < len(self._text):
+            self._step(self._text[self._pos])
+            self._pos += 1
+
+    def _step(self, ch: str) -> None:
+        if self._in_string:
+            if self._escaped:
+                self._escaped = False
+            elif ch == "\\":
+                self._escaped = True
+            elif ch == '"':
+                self._in_string = False
+                if self._depth == 1 and self._value_start is None:
+                    self._key = self._text[self._string_start + 1:self._pos]
+            return
+        if ch == '"' and self._depth > 0:
+            self._in_string = True
+            self._string_start = self._pos
+        elif ch in "{[":
+            self._depth += 1
+        elif ch in "}]" and self._depth > 0:
+            self._depth -= 1
+            if self._depth == 0:
+                self._finish_value()
+        elif self._depth == 1 and ch == ":":
+            self._value_start = self._pos + 1
+        elif self._depth == 1 and ch == ",":
+            self._finish_value()
+
+    def _finish_value(self) -> None:
+        if self._key is not None and self._value_start is not None:
+            raw = self._text[self._value_start:self._pos]
+            try:
+                value = json.loads(raw)
+            except json.JSONDecodeError:
+                logger.debug("Skipping undecodable streamed section %s", self._key)
+            else:
+                self._on_section(self._key, value)
+        self._key = None
+        self._value_start = None
+
+
+def _once_per_key(on_section: Callable[[str, Any], None]) -> Callable[[str, Any], None]:
+    seen: set[str] = set()
+
+    def report(key: str, value: Any) -> None:
+        if key not in seen:
+            seen.add(key)
+            on_section(key, value)
+
+    return report
+
+
+def _retryable() -> tuple[type[Exception], ...]:
+    """Errors worth one more attempt (see ``_plan_retry``)."""
+    import anthropic
+
+    return (GenerationTruncatedError, json.JSONDecodeError, anthropic.APITimeoutError)
+
+
+def _plan_retry(
+    exc: Exception,
+    attempt: int,
+    max_tokens: int,
+    strict: bool,
+    settings: Settings,
+    request_type: str,
+) -> tuple[int, bool]:
+    """Return (max_tokens, strict) for the next attempt, or re-raise ``exc``."""
+    if isinstance(exc, json.JSONDecodeError):
+        increment_counter("minimax.json_errors", 1, {"request_type": request_type})
+    if attempt > 0:
+        raise exc
+    if isinstance(exc, GenerationTruncatedError):
+        if max_tokens >= settings.minimax_max_tokens:
+            raise exc
+        logger.warning(
+            "MiniMax hit adaptive max_tokens=%d; retrying with %d",
+            max_tokens, settings.minimax_max_tokens,
+        )
+        return settings.minimax_max_tokens, strict
+    if isinstance(exc, json.JSONDecodeError):
+        logger.warning("MiniMax returned non-JSON; retrying with stricter prompt")
+        return max_tokens, True
+    logger.warning("MiniMax timeout; retrying once")
+    return max_tokens, strict
+
+
+def generate(
+    system_prompt: str,
+    user_prompt: str,
+    request_type: str = "default",
+    timeout: float | None = None,
+) -> dict[str, Any]:
     """Call MiniMax M2.5 and parse the JSON response.
 
-    Retries once with a stricter prompt on JSON parse failure.
+    ``request_type`` (e.g. "lesson", "report") keys the output-size
+    telemetry that sizes max_tokens for later calls of the same type.
+    Retries once with a stricter prompt on JSON parse failure, and once
+    with the full configured max_tokens when an adaptive cap truncated
+    the response. ``timeout`` bounds the whole call including retries and
+    rate-limit waits; DeadlineExceededError is raised once it is used up.
     Returns a dict on success or raises on double failure.
     """
     settings = get_settings()
     client = _get_client()
+    max_tokens = _output_sizes.max_tokens(request_type, settings)
+    strict = False
+    deadline = None if timeout is None else time.monotonic() + timeout
 
     for attempt in range(2):
+        request = _build_request(
+            settings, system_prompt, user_prompt, max_tokens, strict, deadline
+        )
         try:
-            suffix = ""
-            if attempt == 1:
-                suffix = (
-                    "\n\nIMPORTANT: You MUST respond with valid JSON only. "
-                    "No markdown, no explanation, just the JSON object."
-                )
-
-            message = client.messages.create(
-                model=settings.minimax_model,
-                max_tokens=settings.minimax_max_tokens,
-                system=system_prompt + suffix,
-                messages=[{"role": "user", "content": user_prompt}],
+            message = _send(client, settings, request)
+            return _parse_message(message, request_type, max_tokens)
+        except _retryable() as exc:
+            max_tokens, strict = _plan_retry(
+                exc, attempt, max_tokens, strict, settings, request_type
             )
 
-            text = next(
-                block.text for block in message.content
-                if hasattr(block, "text")
+
+async def agenerate(
+    system_prompt: str,
+    user_prompt: str,
+    request_type: str = "default",
+    timeout: float | None = None,
+    on_section: Callable[[str, Any], None] | None = None,
+) -> dict[str, Any]:
+    """Async ``generate`` with the same retries, limits and telemetry.
+
+    With ``on_section``, the response is streamed and ``on_section(key,
+    value)`` is called as soon as each top-level key of the JSON object is
+    complete, before the rest of the response arrives. A key is reported at
+    most once, even if a retry produces it again.
+    """
+    settings = get_settings()
+    client = _get_async_client()
+    max_tokens = _output_sizes.max_tokens(request_type, settings)
+    strict = False
+    deadline = None if timeout is None else time.monotonic() + timeout
+    if on_section is not None:
+        on_section = _once_per_key(on_section)
+
+    for attempt in range(2):
+        request = _build_request(
+            settings, system_prompt, user_prompt, max_tokens, strict, deadline
+        )
+        try:
+            message = await _asend(client, settings, request, on_section)
+            return _parse_message(message, request_type, max_tokens)
+        except _retryable() as exc:
+            max_tokens, strict = _plan_retry(
+                exc, attempt, max_tokens, strict, settings, request_type
             )
-            text = text.strip()
-            if text.startswith("```"):
-                text = text.split("\n", 1)[1]
-                if text.endswith("```"):
-                    text = text[: text.rfind("```")]
-                text = text.strip()
-
-            return json.loads(text)
-
-        except json.JSONDecodeError:
-            if attempt == 0:
-                logger.warning("MiniMax returned non-JSON; retrying with stricter prompt")
-                continue
-            raise
-        except anthropic.APITimeoutError:
-            if attempt == 0:
-                logger.warning("MiniMax timeout; retrying once")
-                continue
-            raise
@@ -0,0 +1,199 @@
+"""Process-wide rate limiting and circuit breaking for LLM calls.
+
+Every MiniMax request in the container goes through one shared
+``RateLimiter`` (requests and tokens per minute) and one ``CircuitBreaker``.
+When the provider degrades, the breaker opens and callers fail immediately
+with ``MiniMaxUnavailableError`` so graph nodes can return their fallback
+output instead of each waiting out a timeout.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+
+from src.observability import increment_counter, record_histogram, set_gauge
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class MiniMaxUnavailableError(Exception):
+    """The call was refused locally without reaching MiniMax."""
+
+
+class CircuitOpenError(MiniMaxUnavailableError):
+    """The circuit breaker is open after repeated MiniMax failures."""
+
+
+class RateLimitExceededError(MiniMaxUnavailableError):
+    """Waiting for rate-limit capacity would exceed the allowed wait."""
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``per_minute / 60`` per second.
+
+    ``reserve`` may drive the balance negative; the caller then sleeps for
+    the returned delay, which keeps waiters in arrival order without holding
+    the lock while sleeping.
+    """
+
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = float(per_minute)
+        self._rate = per_minute / 60.0
+        self._tokens = float(per_minute)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def delay_for(self, amount: float) -> float:
+        """Seconds until ``amount`` tokens would be available."""
+        with self._lock:
+            self._refill()
+            return self._delay(amount)
+
+    def _delay(self, amount: float) -> float:
+        amount = min(amount, self.capacity)
+        if self._tokens >= amount:
+            return 0.0
+        return (amount - self._tokens) / self._rate if self._rate > 0 else float("inf")
+
+    def reserve(self, amount: float) -> float:
+        with self._lock:
+            self._refill()
+            delay = self._delay(amount)
+            self._tokens -= min(amount, self.capacity)
+            return delay
+
+    def try_take(self, amount: float) -> bool:
+        with self._lock:
+            self._refill()
+            if self._delay(amount) > 0:
+                return False
+            self._tokens -= min(amount, self.capacity)
+            return True
+
+    def refund(self, amount: float) -> None:
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+
+class RateLimiter:
+    """Client-side limit on requests and tokens per minute."""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int) -> None:
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int, max_wait: float) -> float:
+        """Reserve capacity for a request of ``tokens``; return the wait.
+
+        The caller must wait the returned number of seconds before sending.
+        Raises RateLimitExceededError without consuming capacity if the wait
+        would exceed ``max_wait``.
+        """
+        with self._lock:
+            wait = max(self._requests.delay_for(1), self._tokens.delay_for(tokens))
+            if wait > max_wait:
+                increment_counter("minimax.rate_limit_rejections")
+                raise RateLimitExceededError(
+                    f"MiniMax rate limit wait {wait:.1f}s exceeds {max_wait:.1f}s"
+                )
+            wait = max(self._requests.reserve(1), self._tokens.reserve(tokens))
+        record_histogram("minimax.rate_limit_wait_seconds", wait)
+        return wait
+
+    def acquire(self, tokens: int, max_wait: float) -> float:
+        """Block until a request of ``tokens`` may be sent; return the wait."""
+        wait = self.reserve(tokens, max_wait)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def try_acquire(self, tokens: int) -> bool:
+        """Take capacity only if it is available right now (used for hedges)."""
+        with self._lock:
+            if self._requests.delay_for(1) > 0 or self._tokens.delay_for(tokens) > 0:
+                return False
+            return self._requests.try_take(1) and self._tokens.try_take(tokens)
+
+    def settle(self, reserved: int, actual: int) -> None:
+        """Return tokens reserved up front but not used by the response."""
+        if actual < reserved:
+            self._tokens.refund(reserved - actual)
+
+
+class CircuitBreaker:
+    """Open after ``failure_threshold`` consecutive failures.
+
+    After ``reset_seconds`` the breaker lets a single probe request through
+    (half-open); its outcome closes the breaker or re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self._publish()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def _publish(self) -> None:
+        set_gauge("minimax.circuit_state", _STATE_VALUES[self._state])
+
+    def _transition(self, state: str) -> None:
+        if state != self._state:
+            logger.warning("MiniMax circuit breaker %s -> %s", self._state, state)
+            self._state = state
+            increment_counter("minimax.circuit_transitions", 1, {"state": state})
+            self._publish()
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a request may be sent now."""
+        with self._lock:
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self.reset_seconds:
+                    increment_counter("minimax.circuit_rejections")
+                    raise CircuitOpenError("MiniMax circuit breaker is open")
+                self._transition(HALF_OPEN)
+            if self._state == HALF_OPEN:
+                if self._probe_in_flight:
+                    increment_counter("minimax.circuit_rejections")
+                    raise CircuitOpenError("MiniMax circuit breaker is half-open")
+                self._probe_in_flight = True
+
+    def release_probe(self) -> None:
+        """Give back a half-open probe slot without recording an outcome."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probe_in_flight = False
+            self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._transition(OPEN)
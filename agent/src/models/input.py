@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-from typing import Any, Literal, Optional
+from typing import Literal, Optional
 
 from pydantic import BaseModel, Field
 
+from src.models.progress import ProgressRecord
+
 
 class ChildInput(BaseModel):
     child_id: str = Field(..., alias="childId")
@@ -13,8 +15,14 @@ class ChildInput(BaseModel):
         default=None, alias="learningObjectives"
     )
     request_type: Literal["lesson", "report"] = Field(..., alias="requestType")
-    progress_records: Optional[list[dict[str, Any]]] = Field(
+    # Validated with the rest of the input, in one pass.
+    progress_records: Optional[list[ProgressRecord]] = Field(
         default=None, alias="progressRecords"
     )
+    # Delta uploads: when set, ``progress_records`` holds only the records
+    # since this checkpoint and is merged with the history stored in S3.
+    progress_checkpoint: Optional[str] = Field(
+        default=None, alias="progressCheckpoint"
+    )
 
     model_config = {"populate_by_name": True}
@@ -1,11 +1,14 @@
 """Observability helpers for the learning agent.
 
 AgentCore emits OpenTelemetry traces natively. This module provides
-convenience wrappers for custom spans around key operations.
+convenience wrappers for custom spans around key operations, plus
+counters, gauges and histograms that are exported through OTEL when
+available and always kept in-process for ``metrics_snapshot``.
 """
 from __future__ import annotations
 
 import logging
+import threading
 import time
 from contextlib import contextmanager
 from typing import Any, Generator
@@ -13,11 +16,19 @@ from typing import Any, Generator
 logger = logging.getLogger(__name__)
 
 try:
-    from opentelemetry import trace
+    from opentelemetry import metrics, trace
 
     tracer = trace.get_tracer("learning-agent")
+    meter = metrics.get_meter("learning-agent")
 except ImportError:
     tracer = None
+    meter = None
+
+_metrics_lock = threading.Lock()
+_instruments: dict[tuple[str, str], Any] = {}
+_counters: dict[str, float] = {}
+_gauges: dict[str, float] = {}
+_histograms: dict[str, dict[str, float]] = {}
 
 
 @contextmanager
@@ -48,3 +59,71 @@ def traced_operation(name: str, attributes: dict[str, Any] | None = None) -> Gen
                 elapsed * 1000,
                 attrs,
             )
+
+
+def _series(name: str, attributes: dict[str, Any] | None) -> str:
+    if not attributes:
+        return name
+    labels = ",".join(f"{k}={v}" for k, v in sorted(attributes.items()))
+    return f"{name}{{{labels}}}"
+
+
+def _instrument(kind: str, name: str) -> Any:
+    if meter is None:
+        return None
+    key = (kind, name)
+    if key not in _instruments:
+        factory = getattr(meter, f"create_{kind}", None)
+        _instruments[key] = factory(name) if factory else None
+    return _instruments[key]
+
+
+def increment_counter(
+    name: str, value: float = 1, attributes: dict[str, Any] | None = None
+) -> None:
+    """Add ``value`` to a monotonically increasing counter."""
+    series = _series(name, attributes)
+    with _metrics_lock:
+        _counters[series] = _counters.get(series, 0) + value
+        instrument = _instrument("counter", name)
+    if instrument is not None:
+        instrument.add(value, attributes or {})
+
+
+def set_gauge(
+    name: str, value: float, attributes: dict[str, Any] | None = None
+) -> None:
+    """Record the current value of a gauge."""
+    series = _series(name, attributes)
+    with _metrics_lock:
+        _gauges[series] = value
+        instrument = _instrument("gauge", name)
+    if instrument is not None:
+        instrument.set(value, attributes or {})
+
+
+def record_histogram(
+    name: str, value: float, attributes: dict[str, Any] | None = None
+) -> None:
+    """Record one observation of a distribution (latency, sizes, waits)."""
+    series = _series(name, attributes)
+    with _metrics_lock:
+        stats = _histograms.setdefault(
+            series, {"count": 0, "sum": 0.0, "max": float("-inf")}
+        )
+        stats["count"] += 1
+        stats["sum"] += value
+        stats["max"] = max(stats["max"], value)
+        instrument = _instrument("histogram", name)
+    if instrument is not None:
+        instrument.record(value, attributes or {})
+
+
+def metrics_snapshot() -> dict[str, Any]:
+    """Return a copy of every in-process metric series."""
+    with _metrics_lock:
+        return {
+            "counters": dict(_counters),
+            "gauges": dict(_gauges),
+            "histograms": {k: dict(v) for k, v in _histograms.items()},
+        }
@@ -0,0 +1,147 @@
+"""Idempotent result cache for entrypoint responses.
+
+Mobile clients retry on flaky networks. A retry carries the same
+``ChildInput`` and, unless the child practised in between, sees the same
+progress history, so the graph would produce an equivalent answer. Results
+are keyed by a fingerprint of both and kept for a short TTL; identical
+requests that arrive while the first is still running await its result
+instead of running the graph (and the LLM call) again.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from src.config import get_settings
+from src.models.input import ChildInput
+from src.observability import increment_counter
+
+
+def request_fingerprint(child_input: ChildInput, history_version: str) -> str:
+    """Stable key for a request: the validated input plus its history version.
+
+    Inline progress records are left out; they are already captured by the
+    history version computed from them.
+    """
+    fields = child_input.model_dump(mode="json", exclude={"progress_records"})
+    raw = json.dumps(fields, sort_keys=True) + "\n" + history_version
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+class ResultCache:
+    """TTL + LRU store of completed responses with in-flight coalescing."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._in_flight: dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, result = entry
+            if time.monotonic() - stored_at >= self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return result
+
+    def put(self, key: str, result: dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def get_or_run(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[dict[str, Any]]],
+        cacheable: Callable[[dict[str, Any]], bool],
+    ) -> dict[str, Any]:
+        """Return a cached or in-flight result for ``key``, else run ``compute``.
+
+        Only results accepted by ``cacheable`` are stored, so a retry after
+        a fallback response gets a fresh attempt. When the request being
+        waited on is cancelled (its client went away), one waiting request
+        takes over and runs ``compute`` itself.
+        """
+        while True:
+            cached = self.get(key)
+            if cached is not None:
+                increment_counter("result_cache.hits")
+                return cached
+
+            with self._lock:
+                pending = self._in_flight.get(key)
+                if pending is None:
+                    pending = asyncio.get_running_loop().create_future()
+                    self._in_flight[key] = pending
+                    leader = True
+                else:
+                    leader = False
+
+            if leader:
+                return await self._run(key, pending, compute, cacheable)
+
+            increment_counter("result_cache.coalesced")
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise  # this request itself was cancelled
+
+    async def _run(
+        self,
+        key: str,
+        pending: asyncio.Future,
+        compute: Callable[[], Awaitable[dict[str, Any]]],
+        cacheable: Callable[[dict[str, Any]], bool],
+    ) -> dict[str, Any]:
+        increment_counter("result_cache.misses")
+        try:
+            result = await compute()
+        except asyncio.CancelledError:
+            # Waiting requests wake up after the in-flight entry is cleared
+            # below, so one of them can start a fresh run.
+            pending.cancel()
+            raise
+        except BaseException as exc:
+            pending.set_exception(exc)
+            # Mark retrieved so an exception nobody awaited is not logged.
+            pending.exception()
+            raise
+        else:
+            if cacheable(result):
+                self.put(key, result)
+            pending.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+
+_result_cache: Optional[ResultCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    global _result_cache
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                settings = get_settings()
+                _result_cache = ResultCache(
+                    settings.result_cache_ttl_seconds,
+                    settings.result_cache_max_entries,
+                )
+    return _result_cache
@@ -1,24 +1,30 @@
 """Simple S3-based cache for Exa search results with TTL.
 
 Avoids repeated Exa API calls for the same topic + age_group combination.
-Default TTL: 24 hours.
+Default TTL: 24 hours. Fresh results are also kept in process memory so a
+batch of requests for the same topic reads S3 at most once; the memory copy
+holds the most recently used ``exa_memory_cache_max_entries`` results.
 """
 from __future__ import annotations
 
 import hashlib
 import json
 import logging
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional
 
-import boto3
-
 from src.config import get_settings
+from src.tools.s3_data import _get_s3
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_TTL_HOURS = 24
 
+_memory_cache: OrderedDict[str, tuple[datetime, str]] = OrderedDict()
+_memory_lock = threading.Lock()
+
 
 def _cache_key(query: str) -> str:
     digest = hashlib.sha256(query.encode()).hexdigest()[:16]
@@ -29,15 +35,24 @@ def get_cached(query: str) -> Optional[str]:
     """Return cached Exa result if fresh, else None."""
     settings = get_settings()
     key = _cache_key(query)
+    ttl = timedelta(hours=DEFAULT_TTL_HOURS)
+
+    with _memory_lock:
+        remembered = _memory_cache.get(key)
+        if remembered is not None:
+            if datetime.utcnow() - remembered[0] < ttl:
+                _memory_cache.move_to_end(key)
+                return remembered[1]
+            del _memory_cache[key]
 
     try:
-        s3 = boto3.client("s3", region_name=settings.aws_region)
-        obj = s3.get_object(Bucket=settings.s3_bucket_name, Key=key)
+        obj = _get_s3().get_object(Bucket=settings.s3_bucket_name, Key=key)
         data = json.loads(obj["Body"].read().decode("utf-8"))
 
         cached_at = datetime.fromisoformat(data["cached_at"])
-        if datetime.utcnow() - cached_at < timedelta(hours=DEFAULT_TTL_HOURS):
+        if datetime.utcnow() - cached_at < ttl:
             logger.debug("Exa cache hit for query: %s", query[:60])
+            _remember(key, cached_at, data["result"])
             return data["result"]
         else:
             logger.debug("Exa cache expired for query: %s", query[:60])
@@ -46,19 +61,28 @@ def get_cached(query: str) -> Optional[str]:
         return None
 
 
+def _remember(key: str, cached_at: datetime, result: str) -> None:
+    max_entries = get_settings().exa_memory_cache_max_entries
+    with _memory_lock:
+        _memory_cache[key] = (cached_at, result)
+        _memory_cache.move_to_end(key)
+        while len(_memory_cache) > max_entries:
+            _memory_cache.popitem(last=False)
+
+
 def set_cached(query: str, result: str) -> None:
     """Store an Exa result in the S3 cache."""
     settings = get_settings()
     key = _cache_key(query)
+    _remember(key, datetime.utcnow(), result)
 
     try:
-        s3 = boto3.client("s3", region_name=settings.aws_region)
         data = {
             "query": query,
             "result": result,
             "cached_at": datetime.utcnow().isoformat(),
         }
-        s3.put_object(
+        _get_s3().put_object(
             Bucket=settings.s3_bucket_name,
             Key=key,
             Body=json.dumps(data),
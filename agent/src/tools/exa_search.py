@@ -1,19 +1,33 @@
 from __future__ import annotations
 
 import logging
-
-from langchain_exa import ExaSearchRetriever
+import threading
+from concurrent.futures import Future
+from typing import TYPE_CHECKING
 
 from src.config import get_settings
 
+if TYPE_CHECKING:
+    from langchain_exa import ExaSearchRetriever
+
 logger = logging.getLogger(__name__)
 
 _retriever: ExaSearchRetriever | None = None
 
+# Searches in flight, by query. Concurrent requests for the same query (e.g. a
+# batch of children on the same topic) wait on the first search's future and
+# share its outcome, failures included, instead of repeating it.
+_in_flight: dict[str, Future] = {}
+_in_flight_lock = threading.Lock()
+
 
 def _get_retriever() -> ExaSearchRetriever:
     global _retriever
     if _retriever is None:
+        # Imported on first search: langchain_exa pulls in exa_py and the
+        # openai SDK, which would otherwise dominate container cold start.
+        from langchain_exa import ExaSearchRetriever
+
         settings = get_settings()
         _retriever = ExaSearchRetriever(
             k=3,
@@ -37,12 +51,40 @@ def search_parenting_context(topics: list[str]) -> str:
 
 def _safe_search(query: str) -> str:
     """Run an Exa search with graceful failure and S3 caching (PRD Section 9.3)."""
-    from src.tools.exa_cache import get_cached, set_cached
+    from src.tools.exa_cache import get_cached
 
     cached = get_cached(query)
     if cached is not None:
         return cached
 
+    with _in_flight_lock:
+        pending = _in_flight.get(query)
+        leader = pending is None
+        if leader:
+            pending = _in_flight[query] = Future()
+    if not leader:
+        return pending.result()
+
+    try:
+        # A search that finished just before this one registered has cached
+        # its result by now.
+        result = get_cached(query)
+        if result is None:
+            result = _search(query)
+    except BaseException as exc:
+        pending.set_exception(exc)
+        raise
+    else:
+        pending.set_result(result)
+        return result
+    finally:
+        with _in_flight_lock:
+            _in_flight.pop(query, None)
+
+
+def _search(query: str) -> str:
+    from src.tools.exa_cache import set_cached
+
     try:
         retriever = _get_retriever()
         docs = retriever.invoke(query)
@@ -0,0 +1,66 @@
+"""S3 store for lessons generated ahead of time.
+
+A stored lesson is only valid for the exact inputs it was generated from,
+so the key combines the child's history version with the profile fields
+that reach the planner prompt (age group, interests, learning objectives).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from datetime import datetime
+from typing import Any, Optional
+
+from src.config import get_settings
+from src.models.input import ChildInput
+from src.tools.s3_data import _get_s3
+
+logger = logging.getLogger(__name__)
+
+
+def lesson_key(child_input: ChildInput, history_version: str) -> str:
+    """Version of a lesson request: history plus the planner-relevant profile."""
+    parts = [
+        history_version,
+        child_input.age_group,
+        child_input.interests.strip().lower(),
+        "|".join(o.lower() for o in child_input.learning_objectives or []),
+    ]
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()[:16]
+
+
+def _object_key(child_id: str, key: str) -> str:
+    return f"lessons/{child_id}/{key}.json"
+
+
+def get_pregenerated_lesson(child_id: str, key: str) -> Optional[dict[str, Any]]:
+    """Return the stored lesson for this child and key, or None on a miss."""
+    settings = get_settings()
+    try:
+        obj = _get_s3().get_object(
+            Bucket=settings.s3_bucket_name, Key=_object_key(child_id, key)
+        )
+        data = json.loads(obj["Body"].read().decode("utf-8"))
+        return data["lesson"]
+    except Exception:
+        return None
+
+
+def put_pregenerated_lesson(
+    child_id: str, key: str, topic: str, lesson: dict[str, Any]
+) -> None:
+    """Store a generated lesson for later serving."""
+    settings = get_settings()
+    data = {
+        "childId": child_id,
+        "topic": topic,
+        "lesson": lesson,
+        "generatedAt": datetime.utcnow().isoformat(),
+    }
+    _get_s3().put_object(
+        Bucket=settings.s3_bucket_name,
+        Key=_object_key(child_id, key),
+        Body=json.dumps(data),
+        ContentType="application/json",
+    )
@@ -0,0 +1,139 @@
+"""Compact index of child profiles for bulk jobs.
+
+Bulk jobs only need a few fields per child, yet ``profiles/`` holds one
+object per child, so enumerating children from it costs one GET each. The
+index keeps those fields as NDJSON, one line per child, in
+``INDEX_SHARDS`` objects under ``index/profiles/`` (a child's shard is fixed
+by a hash of its id). Enumerating every child is then a handful of reads.
+
+``put_child_profile`` writes a profile and updates its index line. Profiles
+written any other way are picked up by a rebuild:
+``python -m src.tools.profile_index``.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import sys
+from typing import Any, Optional
+
+from src.config import get_settings
+from src.tools.s3_data import _get_s3, list_child_profiles
+
+logger = logging.getLogger(__name__)
+
+INDEX_PREFIX = "index/profiles/"
+INDEX_SHARDS = 16
+# Profile fields kept in the index; everything bulk jobs read.
+INDEX_FIELDS = ("childId", "ageGroup", "interests", "learningObjectives", "active")
+
+
+def index_shard_for(child_id: str) -> int:
+    digest = hashlib.sha256(child_id.encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "big") % INDEX_SHARDS
+
+
+def _shard_key(shard: int) -> str:
+    return f"{INDEX_PREFIX}{shard:02d}.ndjson"
+
+
+def _entry(profile: dict[str, Any]) -> dict[str, Any]:
+    return {field: profile[field] for field in INDEX_FIELDS if field in profile}
+
+
+def _read_shard(s3, bucket: str, key: str) -> list[dict[str, Any]]:
+    try:
+        body = s3.get_object(Bucket=bucket, Key=key)["Body"].read().decode("utf-8")
+    except s3.exceptions.NoSuchKey:
+        return []
+    return [json.loads(line) for line in body.splitlines() if line.strip()]
+
+
+def _write_shard(s3, bucket: str, key: str, entries: list[dict[str, Any]]) -> None:
+    entries = sorted(entries, key=lambda e: e["childId"])
+    s3.put_object(
+        Bucket=bucket,
+        Key=key,
+        Body="".join(json.dumps(e) + "\n" for e in entries),
+        ContentType="application/x-ndjson",
+    )
+
+
+def update_profile_index(profile: dict[str, Any]) -> None:
+    """Insert or replace one child's index line.
+
+    A read-modify-write of the child's shard: two writers updating the same
+    shard at once can lose an update, which the next rebuild repairs.
+    """
+    settings = get_settings()
+    s3 = _get_s3()
+    key = _shard_key(index_shard_for(profile["childId"]))
+    entries = [
+        e for e in _read_shard(s3, settings.s3_bucket_name, key)
+        if e["childId"] != profile["childId"]
+    ]
+    entries.append(_entry(profile))
+    _write_shard(s3, settings.s3_bucket_name, key, entries)
+
+
+def put_child_profile(profile: dict[str, Any]) -> None:
+    """Write a child profile to S3 and keep the index in step."""
+    settings = get_settings()
+    _get_s3().put_object(
+        Bucket=settings.s3_bucket_name,
+        Key=f"profiles/{profile['childId']}.json",
+        Body=json.dumps(profile),
+        ContentType="application/json",
+    )
+    update_profile_index(profile)
+
+
+def load_profile_index() -> Optional[list[dict[str, Any]]]:
+    """Every indexed profile entry, or None when no index has been built."""
+    settings = get_settings()
+    s3 = _get_s3()
+    paginator = s3.get_paginator("list_objects_v2")
+    keys = [
+        obj["Key"]
+        for page in paginator.paginate(Bucket=settings.s3_bucket_name, Prefix=INDEX_PREFIX)
+        for obj in page.get("Contents", [])
+        if obj["Key"].endswith(".ndjson")
+    ]
+    if not keys:
+        return None
+    entries: list[dict[str, Any]] = []
+    for key in keys:
+        entries.extend(_read_shard(s3, settings.s3_bucket_name, key))
+    return entries
+
+
+def list_indexed_profiles() -> list[dict[str, Any]]:
+    """Profiles for bulk jobs: from the index, else a full ``profiles/`` scan."""
+    entries = load_profile_index()
+    if entries is None:
+        logger.warning("No profile index; scanning profiles/ (run a rebuild)")
+        return list_child_profiles()
+    return entries
+
+
+def rebuild_profile_index() -> dict[str, int]:
+    """Rewrite every index shard from the objects under ``profiles/``."""
+    settings = get_settings()
+    s3 = _get_s3()
+    shards: dict[int, list[dict[str, Any]]] = {n: [] for n in range(INDEX_SHARDS)}
+    profiles = 0
+    for profile in list_child_profiles():
+        if "childId" not in profile:
+            continue
+        shards[index_shard_for(profile["childId"])].append(_entry(profile))
+        profiles += 1
+    for shard, entries in shards.items():
+        _write_shard(s3, settings.s3_bucket_name, _shard_key(shard), entries)
+    logger.info("Profile index rebuilt: %d profiles in %d shards", profiles, INDEX_SHARDS)
+    return {"profiles": profiles, "shards": INDEX_SHARDS}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, stream=sys.stdout)
+    print(json.dumps(rebuild_profile_index()))
@@ -0,0 +1,113 @@
+"""Archive of generated parent reports, served while the history is unchanged.
+
+A report is built only from the child's progress history (and the age
+group that reaches the reporter prompt), so an archived report stays valid
+until a new progress record changes the history version. Reports are saved
+through ``save_report`` under ``reports/{child_id}/{key}.json`` with the
+history version they were built from, and recent lookups are kept in
+memory so repeat requests skip the S3 read too.
+
+The newest archive is also copied to ``reports/{child_id}/latest.json``
+together with the child's topic signature, so a report for a changed
+history can be updated from it (see ``reporter.delta_report``).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Optional
+
+from src.config import get_settings
+from src.models.input import ChildInput
+from src.models.progress import HistoricalSummary
+from src.result_cache import ResultCache
+from src.tools.s3_data import _get_s3, save_report
+
+logger = logging.getLogger(__name__)
+
+
+LATEST = "latest"
+
+
+def topic_signature(history: HistoricalSummary) -> dict[str, list[str]]:
+    """The topic sets a report's patterns and recommendations are built from."""
+    return {
+        "strengths": sorted(s.topic for s in history.strengths_topics),
+        "struggling": sorted(s.topic for s in history.struggling_topics),
+    }
+
+
+def report_key(child_input: ChildInput, history_version: str) -> str:
+    """Version of a report request: history plus the reporter-relevant profile."""
+    parts = [history_version, child_input.age_group]
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()[:16]
+
+
+_memory: Optional[ResultCache] = None
+_memory_lock = threading.Lock()
+
+
+def _memory_cache() -> ResultCache:
+    global _memory
+    if _memory is None:
+        with _memory_lock:
+            if _memory is None:
+                settings = get_settings()
+                _memory = ResultCache(
+                    settings.report_archive_cache_ttl_seconds,
+                    settings.report_archive_cache_max_entries,
+                )
+    return _memory
+
+
+def get_archived_report(child_id: str, key: str) -> Optional[dict[str, Any]]:
+    """Return the archived report for this child and key, or None on a miss."""
+    cache_key = f"{child_id}/{key}"
+    cached = _memory_cache().get(cache_key)
+    if cached is not None:
+        return cached
+    settings = get_settings()
+    try:
+        obj = _get_s3().get_object(
+            Bucket=settings.s3_bucket_name, Key=f"reports/{child_id}/{key}.json"
+        )
+        report = json.loads(obj["Body"].read().decode("utf-8"))["report"]
+    except Exception:
+        return None
+    _memory_cache().put(cache_key, report)
+    return report
+
+
+def get_latest_archive(child_id: str) -> Optional[dict[str, Any]]:
+    """The child's newest archive (report, history version, topics), if any."""
+    settings = get_settings()
+    try:
+        obj = _get_s3().get_object(
+            Bucket=settings.s3_bucket_name, Key=f"reports/{child_id}/{LATEST}.json"
+        )
+        return json.loads(obj["Body"].read().decode("utf-8"))
+    except Exception:
+        return None
+
+
+def archive_report(
+    child_id: str,
+    key: str,
+    history_version: str,
+    report: dict[str, Any],
+    history: Optional[HistoricalSummary] = None,
+) -> None:
+    """Archive a generated report with the history version it was built from."""
+    data = {
+        "childId": child_id,
+        "historyVersion": history_version,
+        "report": report,
+        "generatedAt": datetime.utcnow().isoformat(),
+    }
+    save_report(child_id, key, data)
+    if history is not None:
+        save_report(child_id, LATEST, {**data, "topics": topic_signature(history)})
+    _memory_cache().put(f"{child_id}/{key}", report)
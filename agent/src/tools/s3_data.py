@@ -1,11 +1,10 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
 from datetime import datetime
-from typing import Optional
-
-import boto3
+from typing import Iterator, Optional
 
 from src.config import get_settings
 from src.models.progress import (
@@ -25,49 +24,176 @@ _s3_client = None
 def _get_s3():
     global _s3_client
     if _s3_client is None:
+        import boto3
+
         settings = get_settings()
         _s3_client = boto3.client("s3", region_name=settings.aws_region)
     return _s3_client
 
 
+# Per-child snapshot of every stored progress record, so a request reads one
+# object plus the records written since instead of the whole history.
+SNAPSHOT_PREFIX = "progress-snapshots/"
+# Object metadata on a snapshot: the newest record date it includes.
+HIGH_WATER_MARK = "high-water-mark"
+
+
+def _snapshot_key(child_id: str) -> str:
+    return f"{SNAPSHOT_PREFIX}{child_id}.json"
+
+
+def _record_keys(s3, bucket: str, prefix: str, start_after: Optional[str] = None) -> Iterator[str]:
+    """Keys under ``prefix`` in order, from ``start_after`` on, across all pages."""
+    params = {"Bucket": bucket, "Prefix": prefix}
+    if start_after:
+        params["StartAfter"] = start_after
+    for page in s3.get_paginator("list_objects_v2").paginate(**params):
+        for obj in page.get("Contents", []):
+            yield obj["Key"]
+
+
+def _record_date(key: str) -> str:
+    return key.rsplit("/", 1)[-1].replace(".json", "")
+
+
+def _read_records(s3, bucket: str, keys: list[str]) -> list[ProgressRecord]:
+    records: list[ProgressRecord] = []
+    for key in keys:
+        try:
+            body = s3.get_object(Bucket=bucket, Key=key)
+            records.append(ProgressRecord.model_validate_json(body["Body"].read()))
+        except Exception:
+            logger.warning("Skipping malformed record at %s", key)
+    return records
+
+
+def _read_snapshot(s3, bucket: str, child_id: str) -> Optional[tuple[str, list[ProgressRecord]]]:
+    try:
+        body = s3.get_object(Bucket=bucket, Key=_snapshot_key(child_id))["Body"].read()
+        data = json.loads(body)
+        records = [ProgressRecord.model_validate(record) for record in data["records"]]
+        return data["highWaterMark"], records
+    except Exception:
+        return None
+
+
+def _write_snapshot(s3, bucket: str, child_id: str, records: list[ProgressRecord]) -> None:
+    high_water_mark = records[-1].date
+    try:
+        s3.put_object(
+            Bucket=bucket,
+            Key=_snapshot_key(child_id),
+            Body=json.dumps({
+                "highWaterMark": high_water_mark,
+                "records": [record.model_dump(mode="json", by_alias=True) for record in records],
+            }),
+            ContentType="application/json",
+            Metadata={HIGH_WATER_MARK: high_water_mark},
+        )
+    except Exception:
+        logger.warning("Failed to store progress snapshot for child %s", child_id, exc_info=True)
+
+
 def get_progress_records(
     child_id: str,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
 ) -> list[ProgressRecord]:
-    """Fetch ProgressRecords from S3 for a given child, optionally filtered by date range."""
+    """Fetch ProgressRecords from S3 for a given child, optionally filtered by date range.
+
+    Keys are listed page by page from ``start_date`` on. The full history
+    comes from the child's snapshot plus the records dated from its high-water
+    mark on (the record at the mark itself is re-read, in case it was
+    rewritten that day); the snapshot is refreshed when those change it.
+    """
     settings = get_settings()
     s3 = _get_s3()
+    bucket = settings.s3_bucket_name
     prefix = f"progress/{child_id}/"
+    ranged = start_date is not None or end_date is not None
 
+    snapshot = None if ranged else _read_snapshot(s3, bucket, child_id)
+    stored = snapshot[1] if snapshot else []
+    start = start_date if ranged else (snapshot[0] if snapshot else None)
     try:
-        response = s3.list_objects_v2(Bucket=settings.s3_bucket_name, Prefix=prefix)
+        keys = []
+        # A bare date sorts before "<date>.json", so that day's key is included.
+        for key in _record_keys(s3, bucket, prefix, prefix + start if start else None):
+            if end_date and _record_date(key) > end_date:
+                break
+            keys.append(key)
     except Exception:
         logger.exception("Failed to list S3 objects for child %s", child_id)
-        return []
+        return stored
+
+    by_date = {record.date: record for record in stored}
+    fresh = [
+        record for record in _read_records(s3, bucket, keys)
+        if by_date.get(record.date) != record
+    ]
+    by_date.update((record.date, record) for record in fresh)
+    records = sorted(by_date.values(), key=lambda r: r.date)
+    if not ranged and fresh:
+        _write_snapshot(s3, bucket, child_id, records)
+    return records
 
-    if "Contents" not in response:
-        return []
 
-    records: list[ProgressRecord] = []
-    for obj in response["Contents"]:
-        key = obj["Key"]
-        date_part = key.rsplit("/", 1)[-1].replace(".json", "")
+class ProgressCheckpointError(ValueError):
+    """A delta upload's checkpoint is not covered by the stored history."""
 
-        if start_date and date_part < start_date:
-            continue
-        if end_date and date_part > end_date:
-            continue
 
-        try:
-            body = s3.get_object(Bucket=settings.s3_bucket_name, Key=key)
-            data = json.loads(body["Body"].read().decode("utf-8"))
-            records.append(ProgressRecord.model_validate(data))
-        except Exception:
-            logger.warning("Skipping malformed record at %s", key)
+def merge_progress_records(
+    stored: list[ProgressRecord], uploaded: list[ProgressRecord], checkpoint: str
+) -> list[ProgressRecord]:
+    """Stored history plus uploaded records, one per ``record_id``.
+
+    An uploaded record replaces the stored record with the same id. Raises
+    ProgressCheckpointError when the stored history does not reach
+    ``checkpoint``: the records in between are missing, so the merged history
+    would be silently truncated.
+    """
+    newest = max((record.date for record in stored), default=None)
+    if newest is None or newest < checkpoint:
+        raise ProgressCheckpointError(
+            f"progressCheckpoint {checkpoint} is newer than the stored history "
+            f"(latest record: {newest or 'none'}); send the full progressRecords"
+        )
+    merged = {record.record_id: record for record in stored}
+    merged.update((record.record_id, record) for record in uploaded)
+    return sorted(merged.values(), key=lambda r: r.date)
 
-    records.sort(key=lambda r: r.date)
-    return records
+
+def compute_history_version(records: list[ProgressRecord]) -> str:
+    """Content hash of a child's progress records.
+
+    Identical records yield the same version whether they came inline or
+    from S3, so anything derived from the history can be keyed by it.
+    """
+    digest = hashlib.sha256()
+    for record in sorted(records, key=lambda r: (r.date, r.record_id)):
+        digest.update(record.model_dump_json(by_alias=True).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def list_child_profiles() -> list[dict]:
+    """Load every child profile stored under ``profiles/``."""
+    settings = get_settings()
+    s3 = _get_s3()
+    profiles: list[dict] = []
+
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=settings.s3_bucket_name, Prefix="profiles/"):
+        for obj in page.get("Contents", []):
+            key = obj["Key"]
+            if not key.endswith(".json"):
+                continue
+            try:
+                body = s3.get_object(Bucket=settings.s3_bucket_name, Key=key)
+                profiles.append(json.loads(body["Body"].read().decode("utf-8")))
+            except Exception:
+                logger.warning("Skipping unreadable profile at %s", key)
+
+    return profiles
 
 
 def put_progress_record(record: ProgressRecord) -> None:
@@ -83,6 +209,22 @@ def put_progress_record(record: ProgressRecord) -> None:
         Body=json.dumps(body),
         ContentType="application/json",
     )
+    _drop_stale_snapshot(s3, settings.s3_bucket_name, record)
+
+
+def _drop_stale_snapshot(s3, bucket: str, record: ProgressRecord) -> None:
+    """Delete the child's snapshot when ``record`` predates its high-water mark.
+
+    Reads only pick up records from the mark on, so a backfilled older
+    record would otherwise never reach the snapshot. The next read rebuilds it.
+    """
+    key = _snapshot_key(record.child_id)
+    try:
+        metadata = s3.head_object(Bucket=bucket, Key=key)["Metadata"]
+    except Exception:
+        return  # no snapshot yet
+    if record.date < metadata.get(HIGH_WATER_MARK, ""):
+        s3.delete_object(Bucket=bucket, Key=key)
 
 
 def save_report(child_id: str, report_id: str, report_data: dict) -> None:
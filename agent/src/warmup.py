@@ -0,0 +1,210 @@
+"""Container warm-up: build clients and open connections before traffic.
+
+A fresh container would otherwise make its first request pay for SDK
+imports, graph compilation, secret lookup, client construction and TLS
+handshakes to S3 and MiniMax. ``start_warmup`` does that work in a
+background thread at startup. Settings and secrets load first, since every
+client needs them; the clients then warm in parallel. The whole phase is
+bounded by ``warmup_timeout_seconds`` and never blocks readiness: a
+dependency that is down is logged and left to be retried lazily on first
+use. The async MiniMax client's connections belong to the event loop that
+opens them, so ``warmup_lifespan`` warms it on the loop that runs the
+async entrypoint.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable
+
+from src.aio import run_blocking
+from src.config import Settings, get_settings
+from src.observability import increment_counter, record_histogram
+
+logger = logging.getLogger(__name__)
+
+OK = "ok"
+FAILED = "failed"
+TIMED_OUT = "timed_out"
+
+
+def _warm_graph(timeout: float) -> None:
+    from src.agent.graph import get_compiled_graph
+
+    get_compiled_graph()
+
+
+def _warm_s3(timeout: float) -> None:
+    from src.tools.s3_data import _get_s3
+
+    # HeadBucket is the cheapest call that completes a TLS handshake and
+    # leaves a pooled connection behind.
+    _get_s3().head_bucket(Bucket=get_settings().s3_bucket_name)
+
+
+def _warm_minimax(timeout: float) -> None:
+    import httpx
+
+    from src.llm.minimax import _get_client
+
+    client = _get_client().with_options(max_retries=0, timeout=timeout)
+    try:
+        client.get("/", cast_to=httpx.Response)
+    except Exception as exc:
+        # Any HTTP status means the connection is open and pooled.
+        if getattr(exc, "status_code", None) is None:
+            raise
+
+
+def _async_minimax_client(timeout: float) -> Any:
+    from src.llm.minimax import _get_async_client
+
+    return _get_async_client().with_options(max_retries=0, timeout=timeout)
+
+
+async def _awarm_minimax(timeout: float) -> None:
+    import httpx
+
+    # Building the client imports the SDK and may load secrets, so it runs on
+    # the blocking-I/O pool; only the request itself runs on the loop.
+    client = await run_blocking(_async_minimax_client, timeout)
+    try:
+        await client.get("/", cast_to=httpx.Response)
+    except Exception as exc:
+        if getattr(exc, "status_code", None) is None:
+            raise
+
+
+def _warm_exa(timeout: float) -> None:
+    from src.tools.exa_search import _get_retriever
+
+    _get_retriever()
+
+
+WARMUP_TASKS: dict[str, Callable[[float], None]] = {
+    "graph": _warm_graph,
+    "s3": _warm_s3,
+    "minimax": _warm_minimax,
+    "exa": _warm_exa,
+}
+
+
+def _timed(name: str, task: Callable[[float], None], timeout: float) -> None:
+    started = time.monotonic()
+    try:
+        task(timeout)
+    finally:
+        record_histogram("warmup.seconds", time.monotonic() - started, {"task": name})
+
+
+def run_warmup(
+    timeout: float, tasks: dict[str, Callable[[float], None]] | None = None
+) -> dict[str, str]:
+    """Run warm-up tasks within ``timeout`` seconds; return each task's status."""
+    tasks = WARMUP_TASKS if tasks is None else tasks
+    deadline = time.monotonic() + timeout
+    statuses: dict[str, str] = {}
+
+    executor = ThreadPoolExecutor(
+        max_workers=len(tasks) + 1, thread_name_prefix="warmup"
+    )
+    try:
+        settings = executor.submit(_timed, "settings", lambda _: get_settings(), timeout)
+        done, _ = wait([settings], timeout=timeout)
+        if not done:
+            logger.warning("Warm-up skipped: settings did not load in %.1fs", timeout)
+            return {"settings": TIMED_OUT}
+        statuses["settings"] = FAILED if settings.exception() else OK
+
+        remaining = max(0.0, deadline - time.monotonic())
+        futures = {
+            executor.submit(_timed, name, task, remaining): name
+            for name, task in tasks.items()
+        }
+        done, _ = wait(futures, timeout=remaining)
+        for future, name in futures.items():
+            if future not in done:
+                statuses[name] = TIMED_OUT
+            elif future.exception() is not None:
+                logger.warning("Warm-up of %s failed: %s", name, future.exception())
+                statuses[name] = FAILED
+            else:
+                statuses[name] = OK
+    finally:
+        # Do not wait for stragglers; they finish (or fail) in the background.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    for name, status in statuses.items():
+        increment_counter("warmup.tasks", 1, {"task": name, "status": status})
+    logger.info("Warm-up finished: %s", statuses)
+    return statuses
+
+
+async def run_async_warmup(timeout: float) -> str:
+    """Open the async MiniMax client's connection on the running event loop.
+
+    Must run on the loop that serves requests; see ``schedule_async_warmup``.
+    """
+    started = time.monotonic()
+    try:
+        await asyncio.wait_for(_awarm_minimax(timeout), timeout)
+        status = OK
+    except asyncio.TimeoutError:
+        status = TIMED_OUT
+    except Exception as exc:
+        logger.warning("Warm-up of minimax_async failed: %s", exc)
+        status = FAILED
+    record_histogram("warmup.seconds", time.monotonic() - started, {"task": "minimax_async"})
+    increment_counter("warmup.tasks", 1, {"task": "minimax_async", "status": status})
+    logger.info("Async warm-up finished: %s", status)
+    return status
+
+
+def schedule_async_warmup(app: Any, timeout: float) -> Future | None:
+    """Run ``run_async_warmup`` on the loop that will run async handlers.
+
+    ``BedrockAgentCoreApp`` runs async entrypoints on a dedicated worker
+    loop, not on the server loop that runs the lifespan. Connections opened
+    on any other loop are unusable from the handler, so the warm-up is
+    skipped when the app has no such loop.
+    """
+    ensure_loop = getattr(app, "_ensure_worker_loop", None)
+    if ensure_loop is None:
+        logger.info("No handler event loop; async MiniMax warm-up skipped")
+        return None
+    return asyncio.run_coroutine_threadsafe(run_async_warmup(timeout), ensure_loop())
+
+
+@asynccontextmanager
+async def warmup_lifespan(app: Any) -> AsyncIterator[None]:
+    """App lifespan that warms the async MiniMax client in the background."""
+    settings = Settings()
+    future = None
+    if settings.warmup_enabled:
+        future = schedule_async_warmup(app, settings.warmup_timeout_seconds)
+    try:
+        yield
+    finally:
+        if future is not None:
+            future.cancel()
+
+
+def start_warmup() -> threading.Thread | None:
+    """Start warm-up in a daemon thread and return immediately."""
+    # Env-only settings: ``get_settings`` may call Secrets Manager, which is
+    # exactly what must not block startup.
+    settings = Settings()
+    if not settings.warmup_enabled:
+        return None
+    thread = threading.Thread(
+        target=run_warmup,
+        args=(settings.warmup_timeout_seconds,),
+        name="warmup",
+        daemon=True,
+    )
+    thread.start()
+    return thread
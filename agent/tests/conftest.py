@@ -0,0 +1,35 @@
+"""Fixtures shared across test modules."""
+from __future__ import annotations
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from src.config import get_settings
+from src.jobs import generation_queue
+from src.jobs.generation_queue import MemoryJobQueue
+from src.tools import report_store, s3_data
+
+
+@pytest.fixture
+def s3_bucket(monkeypatch):
+    """An S3 client for a moto bucket named by ``s3_bucket_name``.
+
+    The shared S3 client and the report archive cache are reset, so code
+    under test talks to the mocked bucket.
+    """
+    with mock_aws():
+        monkeypatch.setattr(s3_data, "_s3_client", None)
+        monkeypatch.setattr(report_store, "_memory", None)
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=get_settings().s3_bucket_name)
+        yield client
+
+
+@pytest.fixture(autouse=True)
+def job_queue(monkeypatch):
+    """Keep async generation jobs in process memory, with no worker threads."""
+    queue = MemoryJobQueue()
+    monkeypatch.setattr(generation_queue, "_queue", queue)
+    monkeypatch.setattr(generation_queue, "_ensure_workers", lambda queue: None)
+    return queue
@@ -0,0 +1,48 @@
+"""Tests for entrypoint admission control."""
+from __future__ import annotations
+
+import asyncio
+
+from src.admission import QUEUE_FULL, QUEUE_TIMEOUT, AdmissionController
+from src.observability import metrics_snapshot
+
+
+def test_admits_up_to_limit_then_sheds_when_queue_full():
+    controller = AdmissionController(max_concurrency=1, max_queue=0)
+
+    async def run():
+        first = await controller.acquire(1.0)
+        second = await controller.acquire(1.0)
+        controller.release()
+        third = await controller.acquire(1.0)
+        return first, second, third
+
+    assert asyncio.run(run()) == (None, QUEUE_FULL, None)
+
+
+def test_waiter_gets_released_slot_in_order():
+    controller = AdmissionController(max_concurrency=1, max_queue=2)
+    order = []
+
+    async def worker(name):
+        assert await controller.acquire(1.0) is None
+        order.append(name)
+        await asyncio.sleep(0.01)
+        controller.release()
+
+    async def run():
+        await asyncio.gather(worker("a"), worker("b"), worker("c"))
+
+    asyncio.run(run())
+    assert order == ["a", "b", "c"]
+
+
+def test_queue_wait_is_bounded():
+    controller = AdmissionController(max_concurrency=1, max_queue=1)
+
+    async def run():
+        await controller.acquire(None)
+        return await controller.acquire(0.01)
+
+    assert asyncio.run(run()) == QUEUE_TIMEOUT
+    assert metrics_snapshot()["gauges"]["admission.queue_depth"] == 0
@@ -0,0 +1,76 @@
+"""Tests for the per-request latency budget (PRD N3, N5)."""
+from __future__ import annotations
+
+import time
+from unittest.mock import patch
+
+from src.agent.graph import compiled_graph, exa_search_teaching
+from src.agent.planner import planner_generate
+from src.agent.reporter import reporter_generate
+from tests.test_planner import MOCK_MINIMAX_RESPONSE, _make_state
+from tests.test_reporter import _make_state as _make_report_state
+
+
+class TestOptionalSteps:
+    @patch("src.agent.graph.search_teaching_context", return_value="context")
+    def test_exa_runs_without_deadline(self, mock_search):
+        assert exa_search_teaching(_make_state())["exa_context"] == "context"
+
+    @patch("src.agent.graph.search_teaching_context", return_value="context")
+    def test_exa_skipped_when_budget_needed_for_generation(self, mock_search):
+        state = _make_state(deadline=time.time() + 3)
+        assert exa_search_teaching(state)["exa_context"] == ""
+        mock_search.assert_not_called()
+
+    def test_slow_exa_is_cut_off(self):
+        def slow_search(topic, age_group):
+            time.sleep(1.0)
+            return "late"
+
+        state = _make_state(deadline=time.time() + 6.7)
+        with patch("src.agent.graph.search_teaching_context", side_effect=slow_search):
+            started = time.monotonic()
+            result = exa_search_teaching(state)
+        assert result["exa_context"] == ""
+        assert time.monotonic() - started < 0.9
+
+
+class TestGenerationBudget:
+    @patch("src.agent.planner.generate", return_value=MOCK_MINIMAX_RESPONSE)
+    def test_planner_passes_remaining_budget(self, mock_gen):
+        planner_generate(_make_state(deadline=time.time() + 8))
+        assert 7 < mock_gen.call_args.kwargs["timeout"] <= 8
+
+    @patch("src.agent.planner.generate", return_value=MOCK_MINIMAX_RESPONSE)
+    def test_planner_falls_back_when_out_of_time(self, mock_gen):
+        result = planner_generate(_make_state(deadline=time.time() + 1))
+
+        mock_gen.assert_not_called()
+        assert result["output"]["fallback"] is True
+        assert result["error"] == "planner_deadline_exceeded"
+
+    @patch("src.agent.reporter.generate")
+    def test_reporter_falls_back_when_out_of_time(self, mock_gen):
+        result = reporter_generate(_make_report_state(deadline=time.time() - 1))
+
+        mock_gen.assert_not_called()
+        assert result["error"] == "reporter_deadline_exceeded"
+
+
+@patch("src.agent.graph.get_progress_records", return_value=[])
+@patch("src.agent.graph.get_pregenerated_lesson", return_value=None)
+@patch("src.agent.graph.search_teaching_context", return_value="")
+@patch("src.agent.planner.generate", return_value=MOCK_MINIMAX_RESPONSE)
+def test_graph_records_time_per_node(mock_gen, mock_exa, mock_pregen, mock_records):
+    result = compiled_graph.invoke({
+        "input": _make_state()["input"],
+        "deadline": time.time() + 10,
+    })
+
+    assert set(result["budget_spent"]) == {
+        "load_history",
+        "load_pregenerated_lesson",
+        "select_topic",
+        "exa_search_teaching",
+        "planner_generate",
+    }
@@ -0,0 +1,117 @@
+"""Tests for in-process bulk report generation."""
+from __future__ import annotations
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from src.config import get_settings
+from src.jobs import bulk_reports
+from src.tools import report_store, s3_data
+from tests.test_reporter import MOCK_REPORT_RESPONSE
+
+
+def _record(child_id: str, topic: str) -> dict:
+    return {
+        "recordId": f"rec_{child_id}",
+        "childId": child_id,
+        "date": "2026-02-20",
+        "correctAnswers": 2,
+        "incorrectAnswers": 8,
+        "sessionsCompleted": 1,
+        "topicBreakdown": {topic: {"correct": 2, "incorrect": 8}},
+    }
+
+
+PROFILES = [
+    {"childId": "child_1", "ageGroup": "9-12", "interests": "dinosaurs"},
+    {"childId": "child_2", "ageGroup": "6-8", "interests": "cats"},
+    {"childId": "child_3", "ageGroup": "9-12", "interests": "trains"},
+    {"childId": "child_4", "ageGroup": "9-12", "interests": "pizza"},
+    {"childId": "child_5", "ageGroup": "9-12", "active": False},
+]
+TOPICS = {"child_1": "fractions", "child_2": "fractions", "child_3": "division"}
+
+
+@pytest.fixture
+def bucket(s3_bucket):
+    name = get_settings().s3_bucket_name
+    for child_id, topic in TOPICS.items():
+        s3_bucket.put_object(Bucket=name, Key=f"progress/{child_id}/2026-02-20.json",
+                             Body=json.dumps(_record(child_id, topic)))
+    return s3_bucket
+
+
+@patch("src.jobs.bulk_reports.search_parenting_context", return_value="guidance")
+@patch("src.agent.reporter.generate", return_value=MOCK_REPORT_RESPONSE)
+class TestBulkReports:
+    def test_reports_are_archived_per_child(self, mock_gen, mock_exa, bucket):
+        counts = bulk_reports.run(PROFILES)
+
+        assert counts["generated"] == 4
+        assert counts["skipped"] == 1  # child_5 is inactive
+        listed = bucket.list_objects_v2(Bucket=get_settings().s3_bucket_name,
+                                        Prefix="reports/child_1/")
+        obj = bucket.get_object(Bucket=get_settings().s3_bucket_name,
+                                Key=listed["Contents"][0]["Key"])
+        archived = json.loads(obj["Body"].read())
+        assert archived["report"]["summary"]["sessionsCompleted"] == 5
+        assert archived["historyVersion"]
+
+    def test_second_run_is_fresh(self, mock_gen, mock_exa, bucket):
+        bulk_reports.run(PROFILES)
+        report_store._memory = None
+        counts = bulk_reports.run(PROFILES)
+
+        assert counts["fresh"] == 4
+        assert mock_gen.call_count == 4
+
+    def test_exa_runs_once_per_topic_set(self, mock_gen, mock_exa, bucket):
+        counts = bulk_reports.run(PROFILES)
+
+        searched = sorted(tuple(call.args[0]) for call in mock_exa.call_args_list)
+        assert searched == [(), ("division",), ("fractions",)]
+        assert counts["exaSearches"] == 3
+        system_prompts = [call.args[0] for call in mock_gen.call_args_list]
+        assert all("guidance" in prompt for prompt in system_prompts)
+
+    def test_new_session_with_same_topics_is_updated(self, mock_gen, mock_exa, bucket):
+        bulk_reports.run(PROFILES[:1])
+        bucket.put_object(
+            Bucket=get_settings().s3_bucket_name,
+            Key="progress/child_1/2026-02-21.json",
+            Body=json.dumps({**_record("child_1", "fractions"),
+                             "recordId": "rec_2", "date": "2026-02-21"}),
+        )
+
+        counts = bulk_reports.run(PROFILES[:1])
+
+        assert counts["updated"] == 1
+        assert mock_gen.call_count == 1
+
+    def test_failed_generation_is_not_saved(self, mock_gen, mock_exa, bucket):
+        mock_gen.side_effect = Exception("API down")
+
+        counts = bulk_reports.run(PROFILES[:1])
+
+        assert counts["failed"] == 1
+        listed = bucket.list_objects_v2(Bucket=get_settings().s3_bucket_name, Prefix="reports/")
+        assert "Contents" not in listed
+
+    def test_history_error_for_one_child_does_not_abort_run(self, mock_gen, mock_exa,
+                                                            bucket, monkeypatch):
+        real = s3_data.get_progress_records
+
+        def flaky(child_id, *args, **kwargs):
+            if child_id == "child_2":
+                raise RuntimeError("S3 unavailable")
+            return real(child_id, *args, **kwargs)
+
+        monkeypatch.setattr("src.agent.graph.get_progress_records", flaky)
+
+        counts = bulk_reports.run(PROFILES)
+
+        assert counts["failed"] == 1
+        assert counts["generated"] == 3
+        assert counts["skipped"] == 1
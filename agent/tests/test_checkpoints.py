@@ -0,0 +1,99 @@
+"""Tests for per-session graph checkpoints."""
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src import entrypoint
+from src.agent import checkpoints
+from src.jobs import generation_queue
+from src.jobs.generation_queue import GenerationWorkerPool
+from tests.test_entrypoint import LESSON_PAYLOAD
+from tests.test_planner import MOCK_MINIMAX_RESPONSE
+
+SESSION = SimpleNamespace(session_id="session-1")
+
+
+@pytest.fixture(autouse=True)
+def fresh_store(monkeypatch):
+    monkeypatch.setattr("src.agent.graph.get_progress_records", lambda child_id: [])
+    monkeypatch.setattr("src.agent.graph.get_pregenerated_lesson", lambda child_id, key: None)
+    monkeypatch.setattr("src.result_cache._result_cache", None)
+    checkpoints.get_checkpoints.cache_clear()
+    checkpoints.get_checkpointed_graph.cache_clear()
+    yield
+    checkpoints.get_checkpoints.cache_clear()
+    checkpoints.get_checkpointed_graph.cache_clear()
+
+
+def _invoke(context=SESSION) -> dict:
+    return asyncio.run(entrypoint.invoke(dict(LESSON_PAYLOAD), context))
+
+
+class TestResume:
+    def test_retry_after_generation_failure_skips_exa(self, monkeypatch):
+        search = MagicMock(return_value="teaching tips")
+        monkeypatch.setattr("src.agent.graph.search_teaching_context", search)
+
+        with patch("src.agent.planner.agenerate", new_callable=AsyncMock,
+                   side_effect=Exception("down")):
+            assert _invoke()["status"] == "partial_success"
+        with patch("src.agent.planner.agenerate", new_callable=AsyncMock,
+                   return_value=MOCK_MINIMAX_RESPONSE) as mock_gen:
+            result = _invoke()
+
+        assert result["status"] == "success"
+        assert search.call_count == 1
+        assert mock_gen.await_args.args[0].count("teaching tips") == 1
+
+    def test_without_session_every_attempt_starts_over(self, monkeypatch):
+        search = MagicMock(return_value="")
+        monkeypatch.setattr("src.agent.graph.search_teaching_context", search)
+
+        with patch("src.agent.planner.agenerate", new_callable=AsyncMock,
+                   side_effect=Exception("down")):
+            _invoke(context=None)
+            _invoke(context=None)
+
+        assert search.call_count == 2
+
+
+    def test_retry_after_async_job_serves_stored_lesson(self, monkeypatch):
+        stored = {}
+        monkeypatch.setattr("src.agent.graph.search_teaching_context", lambda topic, age: "")
+        monkeypatch.setattr("src.agent.graph.get_pregenerated_lesson",
+                            lambda child_id, key: stored.get((child_id, key)))
+        monkeypatch.setattr(
+            "src.tools.lesson_store.put_pregenerated_lesson",
+            lambda child_id, key, topic, lesson: stored.__setitem__((child_id, key), lesson),
+        )
+
+        with patch("src.agent.planner.agenerate", new_callable=AsyncMock,
+                   side_effect=Exception("down")):
+            assert "jobId" in _invoke()["data"]
+        with patch("src.agent.planner.generate", return_value=MOCK_MINIMAX_RESPONSE):
+            assert GenerationWorkerPool(generation_queue.get_job_queue(), 1).process_one()
+
+        with patch("src.agent.planner.agenerate", new_callable=AsyncMock) as mock_gen:
+            result = _invoke()
+
+        assert result["status"] == "success"
+        assert result["data"]["lessonPlan"]["title"] == "Multiplication with Dinosaur Herds"
+        mock_gen.assert_not_awaited()
+
+
+class TestExpiry:
+    def test_idle_threads_are_deleted(self):
+        store = checkpoints.SessionCheckpoints(ttl_seconds=10)
+        store.saver.delete_thread = MagicMock()
+        with patch("src.agent.checkpoints.time.monotonic", return_value=100.0):
+            store.touch("old")
+        with patch("src.agent.checkpoints.time.monotonic", return_value=105.0):
+            store.touch("new")
+        with patch("src.agent.checkpoints.time.monotonic", return_value=112.0):
+            assert store.expire() == 1
+
+        store.saver.delete_thread.assert_called_once_with("old")
@@ -0,0 +1,28 @@
+"""Cold-start regression: the entrypoint must import fast and stay lean.
+
+The time budget is generous for CI noise and can be tightened or relaxed
+with ``COLD_START_BUDGET_SECONDS``.
+"""
+from __future__ import annotations
+
+import os
+
+from benchmarks.profile_imports import HEAVY_MODULES, profile_imports
+
+COLD_START_BUDGET_SECONDS = float(os.getenv("COLD_START_BUDGET_SECONDS", "1.5"))
+
+
+def test_entrypoint_import_is_within_budget():
+    profile = profile_imports("src.entrypoint")
+
+    assert profile.total_seconds < COLD_START_BUDGET_SECONDS, (
+        f"src.entrypoint imported in {profile.total_seconds:.2f}s; slowest: "
+        f"{profile.entries[:5]}"
+    )
+
+
+def test_heavy_sdks_load_on_first_use():
+    profile = profile_imports("src.entrypoint")
+
+    heavy = {name for name in profile.loaded if name.split(".")[0] in HEAVY_MODULES}
+    assert not heavy
@@ -0,0 +1,297 @@
+"""Tests for the AgentCore entrypoint."""
+from __future__ import annotations
+
+import asyncio
+import base64
+import gzip
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src import entrypoint
+from src.admission import QUEUE_FULL, AdmissionController
+from src.config import get_settings
+from src.jobs import generation_queue
+from tests.test_planner import MOCK_MINIMAX_RESPONSE
+
+LESSON_PAYLOAD = {
+    "childId": "child_1",
+    "ageGroup": "9-12",
+    "interests": "dinosaurs and pizza",
+    "learningObjectives": ["multiplication"],
+    "requestType": "lesson",
+}
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    """Keep graph nodes away from S3 and Exa."""
+    monkeypatch.setattr("src.agent.graph.get_progress_records", lambda child_id: [])
+    monkeypatch.setattr("src.agent.graph.get_pregenerated_lesson", lambda child_id, key: None)
+    monkeypatch.setattr("src.agent.graph.get_archived_report", lambda child_id, key: None)
+    monkeypatch.setattr("src.agent.graph.get_latest_archive", lambda child_id: None)
+    monkeypatch.setattr("src.agent.graph.archive_report", lambda *args: None)
+    monkeypatch.setattr("src.agent.graph.search_teaching_context", lambda topic, age: "")
+    monkeypatch.setattr("src.agent.graph.search_parenting_context", lambda topics: "")
+    monkeypatch.setattr("src.result_cache._result_cache", None)
+    monkeypatch.setattr("src.admission._controller", None)
+
+
+def _invoke(payload: dict) -> dict:
+    return asyncio.run(entrypoint.invoke(payload))
+
+
+class TestInvoke:
+    @patch("src.agent.planner.agenerate", new_callable=AsyncMock, return_value=MOCK_MINIMAX_RESPONSE)
+    def test_lesson_success(self, mock_gen):
+        result = _invoke(LESSON_PAYLOAD)
+
+        assert result["status"] == "success"
+        assert result["data"]["lessonPlan"]["title"] == "Multiplication with Dinosaur Herds"
+        mock_gen.assert_awaited_once()
+
+    @patch("src.agent.planner.agenerate", new_callable=AsyncMock, side_effect=Exception("down"))
+    def test_generation_failure_is_partial_success(self, mock_gen):
+        result = _invoke(LESSON_PAYLOAD)
+
+        assert result["status"] == "partial_success"
+        assert result["warning"] == "planner_generation_failed"
+
+    @patch("src.agent.planner.agenerate", new_callable=AsyncMock, return_value=MOCK_MINIMAX_RESPONSE)
+    def test_retry_is_served_from_result_cache(self, mock_gen):
+        first = _invoke(LESSON_PAYLOAD)
+        second = _invoke(LESSON_PAYLOAD)
+
+        assert second == first
+        mock_gen.assert_awaited_once()
+
+    @patch("src.agent.planner.agenerate", new_callable=AsyncMock, return_value=MOCK_MINIMAX_RESPONSE)
+    def test_changed_history_misses_result_cache(self, mock_gen, monkeypatch):
+        _invoke(LESSON_PAYLOAD)
+        monkeypatch.setattr(
+            "src.agent.graph.compute_history_version", lambda records: "newer"
+        )
+        _invoke(LESSON_PAYLOAD)
+
+        assert mock_gen.await_count == 2
+
+    @patch("src.agent.planner.agenerate", new_callable=AsyncMock, side_effect=Exception("down"))
+    def test_fallback_is_not_cached(self, mock_gen):
+        _invoke(LESSON_PAYLOAD)
+        _invoke(LESSON_PAYLOAD)
+
+        assert mock_gen.await_count == 2
+
+    def test_delta_past_stored_history_asks_for_full_upload(self):
+        record = {"recordId": "r1", "childId": "child_1", "date": "2026-02-21"}
+        result = _invoke({
+            **LESSON_PAYLOAD, "progressCheckpoint": "2026-02-20", "progressRecords": [record],
+        })
+
+        assert result["status"] == "error"
+        assert "send the full progressRecords" in result["message"]
+
+    def test_invalid_payload(self):
+        result = _invoke({"childId": "c1", "requestType": "quiz"})
+
+        assert result["status"] == "error"
+        assert result["message"].startswith("Invalid request payload")
+
+
+def _stream(payload: dict) -> list[dict]:
+    async def collect():
+        events = await entrypoint.invoke({**payload, "stream": True})
+        return [event async for event in events]
+
+    return asyncio.run(collect())
+
+
+class TestStream:
+    def test_sections_are_emitted_as_generated(self):
+        async def streamed_generate(*args, on_section=None, **kwargs):
+            for key, value in MOCK_MINIMAX_RESPONSE.items():
+                on_section(key, value)
+            return MOCK_MINIMAX_RESPONSE
+
+        with patch("src.agent.planner.agenerate", side_effect=streamed_generate):
+            events = _stream(LESSON_PAYLOAD)
+
+        assert [e["event"] for e in events] == [
+            "history_ready", "topic_selected", "lesson_plan", "video_script", "result",
+        ]
+        assert events[2]["data"]["title"] == "Multiplication with Dinosaur Herds"
+        assert events[-1]["data"] == _invoke(LESSON_PAYLOAD)
+
+    @patch("src.agent.planner.agenerate", new_callable=AsyncMock, return_value=MOCK_MINIMAX_RESPONSE)
+    def test_unstreamed_sections_come_from_final_output(self, mock_gen):
+        events = _stream(LESSON_PAYLOAD)
+
+        assert [e["event"] for e in events][-3:] == ["lesson_plan", "video_script", "result"]
+        assert events[-1]["data"]["status"] == "success"
+
+    @patch("src.agent.planner.agenerate", new_callable=AsyncMock, side_effect=Exception("down"))
+    def test_fallback_ends_with_partial_success(self, mock_gen):
+        events = _stream(LESSON_PAYLOAD)
+
+        assert [e["event"] for e in events] == ["history_ready", "topic_selected", "result"]
+        assert events[-1]["data"]["status"] == "partial_success"
+
+
+class TestAsyncGeneration:
+    @patch("src.agent.planner.agenerate", new_callable=AsyncMock, side_effect=Exception("down"))
+    def test_fallback_job_can_be_polled_until_done(self, mock_gen):
+        fallback = _invoke(LESSON_PAYLOAD)
+        job_id = fallback["data"]["jobId"]
+
+        assert _invoke({"jobId": job_id}) == {"status": "pending", "jobId": job_id}
+
+        queue = generation_queue.get_job_queue()
+        with patch("src.agent.planner.generate", return_value=MOCK_MINIMAX_RESPONSE), \
+                patch("src.tools.lesson_store.put_pregenerated_lesson") as mock_put:
+            assert generation_queue.GenerationWorkerPool(queue, 1).process_one()
+
+        result = _invoke({"jobId": job_id})
+        assert result["status"] == "success"
+        assert result["data"]["lessonPlan"]["title"] == "Multiplication with Dinosaur Herds"
+        mock_put.assert_called_once()
+
+    @patch("src.agent.planner.agenerate", new_callable=AsyncMock, side_effect=Exception("down"))
+    def test_retry_reuses_queued_job(self, mock_gen):
+        first = _invoke(LESSON_PAYLOAD)
+        second = _invoke(LESSON_PAYLOAD)
+
+        assert first["data"]["jobId"] == second["data"]["jobId"]
+
+    def test_unknown_job(self):
+        assert _invoke({"jobId": "nope"})["status"] == "error"
+
+
+def _shed_after_history(monkeypatch) -> None:
+    """Admit the history load, then shed the graph run."""
+    controller = AdmissionController(1, 0)
+    monkeypatch.setattr(controller, "acquire", AsyncMock(side_effect=[None, QUEUE_FULL]))
+    monkeypatch.setattr("src.admission._controller", controller)
+
+
+class TestAdmission:
+    @patch("src.agent.planner.agenerate", new_callable=AsyncMock)
+    def test_shed_lesson_is_served_pregenerated(self, mock_gen, monkeypatch):
+        lesson = {"lessonPlan": {"title": "Ready"}, "videoScript": {"scenes": []}}
+        monkeypatch.setattr("src.tools.lesson_store.get_pregenerated_lesson",
+                            lambda child_id, key: lesson)
+        _shed_after_history(monkeypatch)
+
+        result = _invoke(LESSON_PAYLOAD)
+
+        assert result == {"status": "success", "data": lesson}
+        mock_gen.assert_not_awaited()
+
+    @patch("src.agent.planner.agenerate", new_callable=AsyncMock)
+    def test_shed_without_pregenerated_lesson_falls_back(self, mock_gen, monkeypatch):
+        monkeypatch.setattr("src.tools.lesson_store.get_pregenerated_lesson",
+                            lambda child_id, key: None)
+        _shed_after_history(monkeypatch)
+
+        result = _invoke(LESSON_PAYLOAD)
+
+        assert result["status"] == "partial_success"
+        assert result["warning"] == "overloaded"
+        mock_gen.assert_not_awaited()
+
+    @patch("src.agent.planner.agenerate", new_callable=AsyncMock)
+    def test_history_is_not_loaded_for_a_shed_request(self, mock_gen, monkeypatch):
+        loads = []
+        monkeypatch.setattr("src.agent.graph.get_progress_records",
+                            lambda child_id: loads.append(child_id) or [])
+        monkeypatch.setattr("src.admission._controller", AdmissionController(0, 0))
+
+        result = _invoke(LESSON_PAYLOAD)
+
+        assert result["status"] == "partial_success"
+        assert result["warning"] == "overloaded"
+        assert loads == []
+        mock_gen.assert_not_awaited()
+
+    @patch("src.agent.planner.agenerate", new_callable=AsyncMock, return_value=MOCK_MINIMAX_RESPONSE)
+    def test_history_slot_is_released_before_the_graph_runs(self, mock_gen, monkeypatch):
+        controller = AdmissionController(1, 0)
+        monkeypatch.setattr("src.admission._controller", controller)
+
+        assert _invoke(LESSON_PAYLOAD)["status"] == "success"
+        assert controller._active == 0
+
+
+class TestBatch:
+    @patch("src.agent.planner.agenerate", new_callable=AsyncMock, return_value=MOCK_MINIMAX_RESPONSE)
+    def test_items_get_individual_statuses(self, mock_gen):
+        invalid = {"childId": "c2", "requestType": "quiz"}
+        result = _invoke({"batch": [LESSON_PAYLOAD, invalid, LESSON_PAYLOAD]})
+
+        assert result["status"] == "partial_success"
+        assert [r["status"] for r in result["results"]] == ["success", "error", "success"]
+        assert [r["childId"] for r in result["results"]] == ["child_1", "c2", "child_1"]
+        assert result["summary"] == {"success": 2, "error": 1}
+        assert mock_gen.await_count == 2
+
+    def test_concurrency_is_clamped(self, monkeypatch):
+        running, peak = 0, 0
+
+        async def ainvoke(state):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return {"output": {}}
+
+        monkeypatch.setattr("src.admission._controller", AdmissionController(100, 100))
+        with patch.object(entrypoint._graph(), "ainvoke", side_effect=ainvoke):
+            result = _invoke({"batch": [LESSON_PAYLOAD] * 20, "maxConcurrency": 1000})
+
+        assert result["status"] == "success"
+        assert peak == 8
+
+    @patch("src.agent.planner.agenerate", new_callable=AsyncMock, return_value=MOCK_MINIMAX_RESPONSE)
+    def test_items_are_admitted_individually(self, mock_gen, monkeypatch):
+        controller = AdmissionController(1, 0)
+        monkeypatch.setattr("src.admission._controller", controller)
+
+        result = _invoke({"batch": [LESSON_PAYLOAD, LESSON_PAYLOAD], "maxConcurrency": 2})
+
+        assert [r["status"] for r in result["results"]] == ["success", "partial_success"]
+        assert result["results"][1]["warning"] == "overloaded"
+        mock_gen.assert_awaited_once()
+        assert controller._active == 0
+
+    def test_empty_batch_is_rejected(self):
+        result = _invoke({"batch": []})
+
+        assert result["status"] == "error"
+
+
+def _gzip_payload(payload: dict) -> dict:
+    body = base64.b64encode(gzip.compress(json.dumps(payload).encode())).decode()
+    return {"contentEncoding": "gzip", "body": body}
+
+
+class TestCompressedPayloads:
+    @patch("src.agent.planner.agenerate", new_callable=AsyncMock, return_value=MOCK_MINIMAX_RESPONSE)
+    def test_gzip_payload_matches_plain(self, mock_gen):
+        assert _invoke(_gzip_payload(LESSON_PAYLOAD)) == _invoke(LESSON_PAYLOAD)
+        mock_gen.assert_awaited_once()
+
+    def test_malformed_body_is_rejected(self):
+        result = _invoke({"contentEncoding": "gzip", "body": "not base64!"})
+
+        assert result["status"] == "error"
+        assert result["message"].startswith("Invalid request payload")
+
+    def test_oversized_body_is_rejected(self, monkeypatch):
+        monkeypatch.setattr(get_settings(), "payload_max_decompressed_bytes", 100)
+        padded = {**LESSON_PAYLOAD, "interests": "x" * 1000}
+
+        result = _invoke(_gzip_payload(padded))
+
+        assert result["status"] == "error"
+        assert "exceeds 100 bytes" in result["message"]
@@ -0,0 +1,100 @@
+"""Tests for Exa search coalescing."""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.config import Settings
+from src.tools import exa_cache, exa_search
+
+
+def _slow_retriever(side_effect, cache_lookups: MagicMock, callers: int) -> MagicMock:
+    """A retriever that answers only once every caller has looked in the cache.
+
+    Each caller looks once and the leader once more, so no caller can arrive
+    after the search finished and start a second one.
+    """
+    def invoke(query):
+        deadline = time.monotonic() + 2
+        while cache_lookups.call_count < callers + 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        return side_effect(query)
+
+    retriever = MagicMock()
+    retriever.invoke.side_effect = invoke
+    return retriever
+
+
+@pytest.fixture(autouse=True)
+def cache_lookups():
+    with patch("src.tools.exa_cache.get_cached", return_value=None) as get_cached, \
+            patch("src.tools.exa_cache.set_cached"):
+        yield get_cached
+
+
+class TestCoalescing:
+    def test_concurrent_searches_for_a_query_share_one_call(self, cache_lookups):
+        retriever = _slow_retriever(lambda query: [MagicMock(page_content="tip", metadata={})],
+                                    cache_lookups, 5)
+        with patch.object(exa_search, "_get_retriever", return_value=retriever):
+            with ThreadPoolExecutor(max_workers=5) as pool:
+                results = list(pool.map(exa_search._safe_search, ["q"] * 5))
+
+        assert results == ["tip"] * 5
+        assert retriever.invoke.call_count == 1
+        assert exa_search._in_flight == {}
+
+    def test_a_failed_search_is_shared_not_repeated(self, cache_lookups):
+        def fail(query):
+            raise RuntimeError("exa down")
+
+        retriever = _slow_retriever(fail, cache_lookups, 5)
+        with patch.object(exa_search, "_get_retriever", return_value=retriever):
+            with ThreadPoolExecutor(max_workers=5) as pool:
+                results = list(pool.map(exa_search._safe_search, ["q"] * 5))
+
+        assert results == [""] * 5
+        assert retriever.invoke.call_count == 1
+        assert exa_search._in_flight == {}
+
+    def test_an_exception_reaches_waiting_callers_and_clears_the_entry(self):
+        started = threading.Event()
+
+        def crash(query):
+            started.set()
+            time.sleep(0.1)
+            raise RuntimeError("boom")
+
+        with patch.object(exa_search, "_search", side_effect=crash):
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                leader = pool.submit(exa_search._safe_search, "q")
+                started.wait()
+                follower = pool.submit(exa_search._safe_search, "q")
+                with pytest.raises(RuntimeError):
+                    leader.result()
+                with pytest.raises(RuntimeError):
+                    follower.result()
+
+        assert exa_search._in_flight == {}
+
+
+class TestMemoryCache:
+    def test_least_recently_used_results_are_evicted(self, monkeypatch):
+        monkeypatch.setattr(exa_cache, "_memory_cache", OrderedDict())
+        monkeypatch.setattr(exa_cache, "get_settings",
+                            lambda: Settings(exa_memory_cache_max_entries=2))
+        now = datetime.utcnow()
+
+        exa_cache._remember("a", now, "A")
+        exa_cache._remember("b", now, "B")
+        exa_cache._remember("a", now, "A")
+        exa_cache._remember("c", now, "C")
+
+        assert list(exa_cache._memory_cache) == ["a", "c"]
@@ -0,0 +1,156 @@
+"""Tests for the async lesson generation queue."""
+from __future__ import annotations
+
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.config import get_settings
+from src.jobs import generation_queue
+from src.jobs.generation_queue import (
+    DONE,
+    FAILED,
+    PENDING,
+    RUNNING,
+    FileJobQueue,
+    GenerationWorkerPool,
+    MemoryJobQueue,
+    S3JobQueue,
+)
+
+
+def _job(job_id: str = "job1") -> dict:
+    return {
+        "jobId": job_id,
+        "status": PENDING,
+        "childId": "c1",
+        "lessonKey": "k1",
+        "input": {"childId": "c1", "ageGroup": "6-8", "requestType": "lesson"},
+        "selectedTopic": "addition",
+        "exaContext": "",
+        "attempts": 0,
+    }
+
+
+@pytest.fixture(params=["memory", "file", "s3"])
+def queue(request, tmp_path):
+    if request.param == "s3":
+        request.getfixturevalue("s3_bucket")
+        return S3JobQueue(get_settings().s3_bucket_name)
+    return MemoryJobQueue() if request.param == "memory" else FileJobQueue(str(tmp_path))
+
+
+class TestQueues:
+    def test_submit_is_idempotent_per_job_id(self, queue):
+        assert queue.submit(_job())
+        assert not queue.submit(_job())
+        assert queue.claim()["jobId"] == "job1"
+        assert queue.claim() is None
+
+    def test_backoff_delays_claim(self, queue):
+        job = _job()
+        job["notBefore"] = 2**40
+        queue.submit(job)
+
+        assert queue.claim() is None
+        assert queue.get("job1")["status"] == PENDING
+
+
+class TestMemoryQueueEviction:
+    def test_finished_jobs_expire_after_ttl(self):
+        queue = MemoryJobQueue(ttl_seconds=10)
+        queue.submit(_job())
+        job = queue.claim()
+        job["status"] = DONE
+        with patch("src.jobs.generation_queue.time.monotonic", return_value=100.0):
+            queue.save(job)
+        with patch("src.jobs.generation_queue.time.monotonic", return_value=105.0):
+            assert queue.get("job1")["status"] == DONE
+        with patch("src.jobs.generation_queue.time.monotonic", return_value=110.0):
+            assert queue.get("job1") is None
+        assert queue._jobs == {} and queue._expires == {}
+
+    def test_resubmitted_job_is_not_evicted_by_its_earlier_failure(self):
+        queue = MemoryJobQueue(ttl_seconds=10)
+        queue.submit(_job())
+        job = queue.claim()
+        job["status"] = FAILED
+        with patch("src.jobs.generation_queue.time.monotonic", return_value=100.0):
+            queue.save(job)
+            assert queue.submit(_job())
+        with patch("src.jobs.generation_queue.time.monotonic", return_value=200.0):
+            assert queue.get("job1")["status"] == PENDING
+
+
+class TestS3Queue:
+    @pytest.fixture
+    def s3_queue(self, s3_bucket):
+        return S3JobQueue(get_settings().s3_bucket_name, lease_seconds=60)
+
+    def test_job_survives_a_new_queue_instance(self, s3_queue):
+        s3_queue.submit(_job())
+
+        restarted = S3JobQueue(get_settings().s3_bucket_name)
+
+        assert restarted.get("job1")["status"] == PENDING
+        assert restarted.claim()["jobId"] == "job1"
+
+    def test_job_claimed_elsewhere_is_skipped(self, s3_queue):
+        s3_queue.submit(_job())
+        other = S3JobQueue(get_settings().s3_bucket_name, lease_seconds=60)
+        # Another worker created the running object between our list and put.
+        other._write(other._key(RUNNING, "job1"),
+                     {**_job(), "status": RUNNING, "leaseUntil": time.time() + 60})
+
+        assert s3_queue.claim() is None
+
+    def test_job_of_a_dead_worker_is_reclaimed_after_its_lease(self, s3_queue):
+        s3_queue.submit(_job())
+        assert s3_queue.claim()["jobId"] == "job1"
+        assert s3_queue.claim() is None
+
+        with patch("src.jobs.generation_queue.time.time", return_value=time.time() + 61):
+            reclaimed = s3_queue.claim()
+            assert s3_queue.claim() is None
+
+        assert reclaimed["jobId"] == "job1"
+        assert reclaimed["status"] == RUNNING
+
+    def test_polling_an_unfinished_job_starts_workers(self, s3_queue, monkeypatch):
+        started = []
+        monkeypatch.setattr(generation_queue, "_queue", s3_queue)
+        monkeypatch.setattr(generation_queue, "_ensure_workers", started.append)
+        s3_queue.submit(_job())
+
+        assert generation_queue.get_job("job1")["status"] == PENDING
+        assert started == [s3_queue]
+
+
+class TestWorkers:
+    def test_success_stores_result(self, queue):
+        queue.submit(_job())
+        with patch.object(generation_queue, "run_job", return_value={"lessonPlan": {}}):
+            assert GenerationWorkerPool(queue, 1).process_one()
+
+        job = queue.get("job1")
+        assert job["status"] == DONE
+        assert job["result"] == {"lessonPlan": {}}
+
+    def test_failures_retry_then_fail(self, queue):
+        queue.submit(_job())
+        pool = GenerationWorkerPool(queue, 1)
+        with patch.object(generation_queue, "run_job", side_effect=RuntimeError("down")), \
+                patch.object(generation_queue, "RETRY_BACKOFF_SECONDS", 0):
+            for _ in range(generation_queue.MAX_ATTEMPTS):
+                assert pool.process_one()
+
+        job = queue.get("job1")
+        assert job["status"] == FAILED
+        assert job["attempts"] == generation_queue.MAX_ATTEMPTS
+
+    def test_run_job_raises_on_fallback(self):
+        with patch("src.agent.planner.planner_generate",
+                   return_value={"output": {}, "error": "planner_generation_failed"}):
+            with pytest.raises(RuntimeError):
+                generation_queue.run_job(_job())
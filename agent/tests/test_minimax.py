@@ -0,0 +1,401 @@
+"""Tests for the MiniMax client wrapper."""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import anthropic
+import httpx
+import pytest
+
+from src.config import Settings
+from src.llm import minimax
+from src.llm.resilience import CircuitOpenError
+
+
+class FakeClient:
+    """Stands in for anthropic.Anthropic; each call pops the next delay."""
+
+    def __init__(
+        self,
+        delays: list[float],
+        text: str = '{"ok": true}',
+        stop_reasons: list[str] | None = None,
+        output_tokens: int = 100,
+    ):
+        self._delays = list(delays)
+        self._stop_reasons = list(stop_reasons or [])
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.requests: list[dict] = []
+        self.text = text
+        self.output_tokens = output_tokens
+        self.messages = SimpleNamespace(create=self._create)
+
+    def _create(self, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.requests.append(kwargs)
+            delay = self._delays.pop(0) if self._delays else 0.0
+            stop_reason = self._stop_reasons.pop(0) if self._stop_reasons else "end_turn"
+        time.sleep(delay)
+        return SimpleNamespace(
+            content=[SimpleNamespace(text=self.text)],
+            stop_reason=stop_reason,
+            usage=SimpleNamespace(input_tokens=50, output_tokens=self.output_tokens),
+        )
+
+
+class FakeAsyncClient:
+    """Async counterpart of FakeClient that records cancelled calls."""
+
+    def __init__(self, delays: list[float], text: str = '{"ok": true}'):
+        self._delays = list(delays)
+        self.calls = 0
+        self.cancelled = 0
+        self.text = text
+        self.messages = SimpleNamespace(create=self._create)
+
+    async def _create(self, **kwargs):
+        self.calls += 1
+        delay = self._delays.pop(0) if self._delays else 0.0
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return SimpleNamespace(
+            content=[SimpleNamespace(text=self.text)],
+            stop_reason="end_turn",
+            usage=SimpleNamespace(input_tokens=50, output_tokens=100),
+        )
+
+
+class FakeStreamingClient:
+    """Streams ``text`` in small chunks through ``messages.stream``."""
+
+    def __init__(self, text: str, chunk: int = 7):
+        self.text = text
+        self.chunk = chunk
+        self.messages = SimpleNamespace(stream=self._stream)
+
+    def _stream(self, **kwargs):
+        client = self
+
+        class Stream:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            @property
+            async def text_stream(self):
+                for i in range(0, len(client.text), client.chunk):
+                    yield client.text[i:i + client.chunk]
+
+            async def get_final_message(self):
+                return SimpleNamespace(
+                    content=[SimpleNamespace(text=client.text)],
+                    stop_reason="end_turn",
+                    usage=SimpleNamespace(input_tokens=50, output_tokens=100),
+                )
+
+        return Stream()
+
+
+@pytest.fixture
+def tracker(monkeypatch):
+    fresh = minimax._HedgeTracker()
+    monkeypatch.setattr(minimax, "_hedge_tracker", fresh)
+    return fresh
+
+
+@pytest.fixture(autouse=True)
+def shared_guards(monkeypatch):
+    monkeypatch.setattr(minimax, "_rate_limiter", None)
+    monkeypatch.setattr(minimax, "_breaker", None)
+
+
+@pytest.fixture(autouse=True)
+def output_sizes(monkeypatch):
+    fresh = minimax._OutputSizeTracker()
+    monkeypatch.setattr(minimax, "_output_sizes", fresh)
+    return fresh
+
+
+def _settings(**overrides) -> Settings:
+    values = {
+        "minimax_hedge_enabled": True,
+        "minimax_hedge_percentile": 0.9,
+        "minimax_hedge_min_samples": 5,
+        "minimax_hedge_max_rate": 0.5,
+    }
+    values.update(overrides)
+    return Settings(**values)
+
+
+def _warm(tracker: minimax._HedgeTracker, seconds: float, count: int = 10) -> None:
+    for _ in range(count):
+        tracker.record_latency(seconds)
+
+
+class TestHedging:
+    def test_disabled_sends_single_request(self, tracker):
+        client = FakeClient([0.0])
+        with patch.object(minimax, "get_settings", return_value=_settings(minimax_hedge_enabled=False)), \
+                patch.object(minimax, "_get_client", return_value=client):
+            assert minimax.generate("sys", "user") == {"ok": True}
+        assert client.calls == 1
+
+    def test_no_hedge_before_min_samples(self, tracker):
+        client = FakeClient([0.05])
+        with patch.object(minimax, "get_settings", return_value=_settings()), \
+                patch.object(minimax, "_get_client", return_value=client):
+            minimax.generate("sys", "user")
+        assert client.calls == 1
+
+    def test_slow_primary_is_hedged_and_fast_hedge_wins(self, tracker):
+        _warm(tracker, 0.01)
+        client = FakeClient([0.5, 0.0])
+        with patch.object(minimax, "get_settings", return_value=_settings()), \
+                patch.object(minimax, "_get_client", return_value=client):
+            start = time.monotonic()
+            assert minimax.generate("sys", "user") == {"ok": True}
+            elapsed = time.monotonic() - start
+        assert client.calls == 2
+        assert elapsed < 0.4
+
+    def test_hedge_rate_cap(self, tracker):
+        _warm(tracker, 0.01)
+        tracker.try_hedge(1.0)
+        client = FakeClient([0.05])
+        with patch.object(minimax, "get_settings", return_value=_settings(minimax_hedge_max_rate=0.01)), \
+                patch.object(minimax, "_get_client", return_value=client):
+            minimax.generate("sys", "user")
+        assert client.calls == 1
+
+    def test_concurrent_callers_beyond_eight_are_not_serialized(self, tracker, monkeypatch):
+        monkeypatch.setattr(minimax, "_hedge_executor", None)
+        _warm(tracker, 1.0)
+        client = FakeClient([0.3] * 20)
+
+        with patch.object(minimax, "get_settings", return_value=_settings()), \
+                patch.object(minimax, "_get_client", return_value=client):
+            start = time.monotonic()
+            threads = [threading.Thread(target=minimax.generate, args=("sys", "user"))
+                       for _ in range(20)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.monotonic() - start
+
+        # Eight workers would need three rounds (0.9s).
+        assert client.calls == 20
+        assert elapsed < 0.75
+
+    def test_time_queued_for_a_worker_does_not_trigger_hedges(self, tracker, monkeypatch):
+        monkeypatch.setattr(minimax, "_hedge_executor", None)
+        _warm(tracker, 0.15)
+        client = FakeClient([0.1] * 6)
+
+        with patch.object(minimax, "get_settings",
+                          return_value=_settings(minimax_max_concurrency=2)), \
+                patch.object(minimax, "_get_client", return_value=client):
+            threads = [threading.Thread(target=minimax.generate, args=("sys", "user"))
+                       for _ in range(6)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        # The last callers wait 0.2s for a worker, past the 0.15s threshold,
+        # but each call only takes 0.1s once sent.
+        assert client.calls == 6
+
+    def test_wait_for_a_worker_is_bounded_by_the_deadline(self, tracker, monkeypatch):
+        monkeypatch.setattr(minimax, "_hedge_executor", None)
+        _warm(tracker, 0.01)
+        client = FakeClient([0.0])
+        release = threading.Event()
+
+        with patch.object(minimax, "get_settings",
+                          return_value=_settings(minimax_max_concurrency=1)), \
+                patch.object(minimax, "_get_client", return_value=client):
+            minimax._get_hedge_executor().submit(release.wait)
+            start = time.monotonic()
+            try:
+                with pytest.raises(minimax.DeadlineExceededError):
+                    minimax.generate("sys", "user", timeout=0.1)
+            finally:
+                release.set()
+            elapsed = time.monotonic() - start
+
+        assert elapsed < 0.5
+        assert client.calls == 0
+
+    def test_losing_hedge_returns_its_unused_tokens(self, tracker):
+        _warm(tracker, 0.01)
+        client = FakeClient([0.1, 0.3])
+        settled = []
+
+        with patch.object(minimax, "get_settings", return_value=_settings()), \
+                patch.object(minimax, "_get_client", return_value=client):
+            limiter = minimax._get_rate_limiter()
+            real = limiter.settle
+            with patch.object(limiter, "settle",
+                              side_effect=lambda *args: settled.append(args) or real(*args)):
+                minimax.generate("sys", "user")
+                time.sleep(0.4)
+
+        reserved = settled[0][0]
+        assert settled == [(reserved, 150), (reserved, 150)]
+
+    def test_threshold_uses_percentile(self, tracker):
+        for value in range(1, 11):
+            tracker.record_latency(float(value))
+        assert tracker.threshold(0.9, 5) == 10.0
+        assert tracker.threshold(0.5, 5) == 6.0
+        assert tracker.threshold(0.5, 20) is None
+
+
+class TestAdaptiveMaxTokens:
+    def test_uses_ceiling_until_enough_samples(self, output_sizes):
+        settings = _settings(minimax_max_tokens_min_samples=3)
+        output_sizes.record("lesson", 800)
+        assert output_sizes.max_tokens("lesson", settings) == 4096
+
+    def test_cap_is_p99_plus_margin_per_type(self, output_sizes):
+        settings = _settings(
+            minimax_max_tokens_min_samples=3,
+            minimax_max_tokens_margin=1.5,
+            minimax_max_tokens_floor=100,
+        )
+        for size in (600, 700, 800):
+            output_sizes.record("lesson", size)
+        assert output_sizes.max_tokens("lesson", settings) == 1200
+        assert output_sizes.max_tokens("report", settings) == 4096
+
+    def test_generate_records_output_tokens(self, output_sizes, tracker):
+        client = FakeClient([0.0], output_tokens=321)
+        settings = _settings(minimax_hedge_enabled=False, minimax_max_tokens_min_samples=1,
+                             minimax_max_tokens_floor=1, minimax_max_tokens_margin=1.0)
+        with patch.object(minimax, "get_settings", return_value=settings), \
+                patch.object(minimax, "_get_client", return_value=client):
+            minimax.generate("sys", "user", request_type="report")
+        assert output_sizes.max_tokens("report", settings) == 321
+
+    def test_truncation_retries_with_full_cap(self, output_sizes, tracker):
+        settings = _settings(minimax_hedge_enabled=False, minimax_max_tokens_min_samples=1,
+                             minimax_max_tokens_floor=1, minimax_max_tokens_margin=1.0)
+        output_sizes.record("lesson", 200)
+        client = FakeClient([0.0, 0.0], stop_reasons=["max_tokens", "end_turn"])
+        with patch.object(minimax, "get_settings", return_value=settings), \
+                patch.object(minimax, "_get_client", return_value=client):
+            assert minimax.generate("sys", "user", request_type="lesson") == {"ok": True}
+        assert [r["max_tokens"] for r in client.requests] == [200, 4096]
+        assert not client.requests[1]["system"].endswith("just the JSON object.")
+
+    def test_truncation_at_ceiling_raises(self, tracker):
+        client = FakeClient([0.0], stop_reasons=["max_tokens"])
+        with patch.object(minimax, "get_settings", return_value=_settings(minimax_hedge_enabled=False)), \
+                patch.object(minimax, "_get_client", return_value=client):
+            with pytest.raises(minimax.GenerationTruncatedError):
+                minimax.generate("sys", "user", request_type="lesson")
+        assert client.calls == 1
+
+
+class TestCircuitBreakerIntegration:
+    def test_timeouts_open_breaker_and_fail_fast(self, tracker):
+        calls = []
+
+        def create(**kwargs):
+            calls.append(kwargs)
+            raise anthropic.APITimeoutError(request=httpx.Request("POST", "http://minimax"))
+
+        client = SimpleNamespace(messages=SimpleNamespace(create=create))
+        settings = _settings(minimax_hedge_enabled=False, minimax_breaker_failure_threshold=2)
+        with patch.object(minimax, "get_settings", return_value=settings), \
+                patch.object(minimax, "_get_client", return_value=client):
+            with pytest.raises(anthropic.APITimeoutError):
+                minimax.generate("sys", "user")
+            with pytest.raises(CircuitOpenError):
+                minimax.generate("sys", "user")
+        assert len(calls) == 2
+
+
+class TestAsyncGenerate:
+    def test_agenerate_parses_json(self, tracker):
+        client = FakeAsyncClient([0.0], text='```json\n{"ok": true}\n```')
+        with patch.object(minimax, "get_settings", return_value=_settings(minimax_hedge_enabled=False)), \
+                patch.object(minimax, "_get_async_client", return_value=client):
+            assert asyncio.run(minimax.agenerate("sys", "user")) == {"ok": True}
+
+    def test_hedged_loser_is_cancelled(self, tracker):
+        _warm(tracker, 0.01)
+        client = FakeAsyncClient([0.5, 0.0])
+
+        async def run():
+            result = await minimax.agenerate("sys", "user")
+            await asyncio.sleep(0)
+            return result
+
+        with patch.object(minimax, "get_settings", return_value=_settings()), \
+                patch.object(minimax, "_get_async_client", return_value=client):
+            assert asyncio.run(run()) == {"ok": True}
+        assert client.calls == 2
+        assert client.cancelled == 1
+
+    def test_cancelled_hedge_is_refunded(self, tracker):
+        _warm(tracker, 0.01)
+        client = FakeAsyncClient([0.1, 0.5])
+        settled = []
+
+        async def run():
+            result = await minimax.agenerate("sys", "user")
+            await asyncio.sleep(0)
+            return result
+
+        with patch.object(minimax, "get_settings", return_value=_settings()), \
+                patch.object(minimax, "_get_async_client", return_value=client):
+            limiter = minimax._get_rate_limiter()
+            with patch.object(limiter, "settle", side_effect=lambda *args: settled.append(args)):
+                asyncio.run(run())
+
+        assert client.cancelled == 1
+        assert sorted(actual for _, actual in settled) == [0, 150]
+
+    def test_timeout_raises_deadline_exceeded(self, tracker):
+        client = FakeAsyncClient([1.0])
+        with patch.object(minimax, "get_settings", return_value=_settings(minimax_hedge_enabled=False)), \
+                patch.object(minimax, "_get_async_client", return_value=client):
+            with pytest.raises(minimax.DeadlineExceededError):
+                asyncio.run(minimax.agenerate("sys", "user", timeout=0.05))
+        assert client.cancelled == 1
+
+
+class TestStreamedSections:
+    def test_parser_reports_each_top_level_value(self):
+        sections = []
+        parser = minimax.JsonSectionParser(lambda key, value: sections.append((key, value)))
+        text = '```json\n{"a": {"t": "x \\" } y"}, "b": [1, {"c": 2}], "n": 3}\n```'
+        for i in range(0, len(text), 4):
+            parser.feed(text[i:i + 4])
+
+        assert sections == [("a", {"t": 'x " } y'}), ("b", [1, {"c": 2}]), ("n", 3)]
+
+    def test_agenerate_streams_sections_before_returning(self, tracker):
+        client = FakeStreamingClient('{"lessonPlan": {"title": "t"}, "videoScript": {"scenes": []}}')
+        sections = []
+        with patch.object(minimax, "get_settings", return_value=_settings()), \
+                patch.object(minimax, "_get_async_client", return_value=client):
+            result = asyncio.run(minimax.agenerate(
+                "sys", "user", on_section=lambda key, value: sections.append(key)
+            ))
+
+        assert sections == ["lessonPlan", "videoScript"]
+        assert result == {"lessonPlan": {"title": "t"}, "videoScript": {"scenes": []}}
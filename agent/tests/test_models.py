@@ -1,6 +1,8 @@
 """Tests for pydantic model validation."""
 from __future__ import annotations
 
+import json
+
 import pytest
 from pydantic import ValidationError
 
@@ -37,6 +39,20 @@ class TestChildInput:
                 "requestType": "quiz",
             })
 
+    def test_inline_records_are_validated_with_input(self):
+        data = {
+            "childId": "c1",
+            "ageGroup": "6-8",
+            "requestType": "report",
+            "progressRecords": [{"recordId": "r1", "childId": "c1", "date": "2026-02-20"}],
+        }
+        inp = ChildInput.model_validate_json(json.dumps(data))
+        assert isinstance(inp.progress_records[0], ProgressRecord)
+
+        data["progressRecords"].append({"recordId": "r2"})
+        with pytest.raises(ValidationError):
+            ChildInput.model_validate(data)
+
     def test_alias_population(self):
         inp = ChildInput(
             child_id="c1",
@@ -1,7 +1,7 @@
 """Tests for orchestrator utility functions."""
 from __future__ import annotations
 
-from src.agent.orchestrator import sanitize_interests
+from src.agent.orchestrator import extract_interest_keywords, sanitize_interests
 
 
 class TestSanitizeInterests:
@@ -29,3 +29,15 @@ class TestSanitizeInterests:
         result = sanitize_interests("KILL something")
         assert "KILL" not in result
         assert "something" in result
+
+
+class TestExtractInterestKeywords:
+    def test_splits_free_text(self):
+        result = extract_interest_keywords("loves dinosaurs, space rockets, and pizza")
+        assert result == ["dinosaurs", "space rockets", "pizza"]
+
+    def test_deduplicates_case_insensitively(self):
+        assert extract_interest_keywords("Lego and lego") == ["Lego"]
+
+    def test_handles_empty_string(self):
+        assert extract_interest_keywords("") == []
@@ -1,10 +1,14 @@
 """Tests for the planner node."""
 from __future__ import annotations
 
+import asyncio
+import threading
+import time
 from unittest.mock import patch
 
-from src.agent.planner import planner_generate
+from src.agent.planner import aplanner_generate, planner_generate
 from src.agent.state import AgentState
+from src.llm.resilience import CircuitOpenError
 from src.models.input import ChildInput
 
 MOCK_MINIMAX_RESPONSE = {
@@ -76,6 +80,13 @@ class TestPlannerGenerate:
         assert result["output"]["fallback"] is True
         assert result["error"] == "planner_generation_failed"
 
+    @patch("src.agent.planner.generate", side_effect=CircuitOpenError("open"))
+    def test_fallback_when_circuit_open(self, mock_gen):
+        result = planner_generate(_make_state())
+
+        assert result["output"]["fallback"] is True
+        assert result["error"] == "planner_generation_failed"
+
     @patch("src.agent.planner.generate", return_value=MOCK_MINIMAX_RESPONSE)
     def test_empty_interests_uses_default(self, mock_gen):
         state = _make_state()
@@ -90,3 +101,20 @@ class TestPlannerGenerate:
         mock_gen.assert_called_once()
         call_args = mock_gen.call_args
         assert "learning and exploring" in call_args[0][0]
+
+    def test_async_handoff_queues_off_the_event_loop(self):
+        threads = []
+
+        def enqueue(state):
+            threads.append(threading.current_thread())
+            return "job1"
+
+        async def run():
+            with patch("src.agent.planner.agenerate", side_effect=Exception("API down")), \
+                    patch("src.agent.planner.enqueue_lesson", side_effect=enqueue):
+                return await aplanner_generate(_make_state(deadline=time.time() + 30))
+
+        result = asyncio.run(run())
+
+        assert result["output"]["jobId"] == "job1"
+        assert threads and threads[0] is not threading.main_thread()
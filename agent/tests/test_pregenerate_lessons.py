@@ -0,0 +1,79 @@
+"""Tests for nightly lesson pre-generation and serving stored lessons."""
+from __future__ import annotations
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from src.agent.graph import load_history, load_pregenerated_lesson
+from src.config import get_settings
+from src.jobs import pregenerate_lessons
+from src.models.input import ChildInput
+from tests.test_planner import MOCK_MINIMAX_RESPONSE
+
+PROFILE = {
+    "childId": "child_1",
+    "ageGroup": "9-12",
+    "interests": "dinosaurs",
+    "learningObjectives": ["multiplication"],
+}
+
+RECORD = {
+    "recordId": "rec_1",
+    "childId": "child_1",
+    "date": "2026-02-20",
+    "correctAnswers": 2,
+    "incorrectAnswers": 8,
+    "sessionsCompleted": 1,
+    "topicBreakdown": {"multiplication": {"correct": 2, "incorrect": 8}},
+}
+
+
+@pytest.fixture
+def bucket(s3_bucket):
+    name = get_settings().s3_bucket_name
+    s3_bucket.put_object(Bucket=name, Key="profiles/child_1.json", Body=json.dumps(PROFILE))
+    s3_bucket.put_object(
+        Bucket=name, Key="progress/child_1/2026-02-20.json", Body=json.dumps(RECORD)
+    )
+    return s3_bucket
+
+
+def _lesson_state():
+    child_input = ChildInput.model_validate({**PROFILE, "requestType": "lesson"})
+    state = {"input": child_input}
+    state.update(load_history(state))
+    return state
+
+
+@patch("src.agent.graph.search_teaching_context", return_value="")
+@patch("src.agent.planner.generate", return_value=MOCK_MINIMAX_RESPONSE)
+class TestPregenerateLessons:
+    def test_generates_then_serves_stored_lesson(self, mock_gen, mock_exa, bucket):
+        counts = pregenerate_lessons.run()
+        assert counts["generated"] == 1
+
+        result = load_pregenerated_lesson(_lesson_state())
+        assert result["output"]["lessonPlan"]["title"] == "Multiplication with Dinosaur Herds"
+
+    def test_second_run_is_fresh(self, mock_gen, mock_exa, bucket):
+        pregenerate_lessons.run()
+        counts = pregenerate_lessons.run()
+        assert counts["fresh"] == 1
+        assert mock_gen.call_count == 1
+
+    def test_new_progress_invalidates_stored_lesson(self, mock_gen, mock_exa, bucket):
+        pregenerate_lessons.run()
+        bucket.put_object(
+            Bucket=get_settings().s3_bucket_name,
+            Key="progress/child_1/2026-02-21.json",
+            Body=json.dumps({**RECORD, "recordId": "rec_2", "date": "2026-02-21"}),
+        )
+        assert load_pregenerated_lesson(_lesson_state()) == {}
+
+    def test_failed_generation_is_not_stored(self, mock_gen, mock_exa, bucket):
+        mock_gen.side_effect = Exception("API down")
+        counts = pregenerate_lessons.run()
+        assert counts["failed"] == 1
+        assert load_pregenerated_lesson(_lesson_state()) == {}
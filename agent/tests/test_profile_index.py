@@ -0,0 +1,50 @@
+"""Tests for the NDJSON profile index."""
+from __future__ import annotations
+
+import json
+
+from src.config import get_settings
+from src.tools import profile_index
+
+
+def _profile(i: int, **overrides) -> dict:
+    return {
+        "childId": f"child_{i}",
+        "ageGroup": "6-8",
+        "interests": "cats",
+        "avatar": "large-blob",
+        **overrides,
+    }
+
+
+def test_put_child_profile_updates_index(s3_bucket):
+    profile_index.put_child_profile(_profile(1))
+    profile_index.put_child_profile(_profile(2))
+    profile_index.put_child_profile(_profile(1, interests="dogs"))
+
+    entries = sorted(profile_index.load_profile_index(), key=lambda e: e["childId"])
+
+    assert entries == [
+        {"childId": "child_1", "ageGroup": "6-8", "interests": "dogs"},
+        {"childId": "child_2", "ageGroup": "6-8", "interests": "cats"},
+    ]
+
+
+def test_missing_index_falls_back_to_profile_scan(s3_bucket):
+    bucket = get_settings().s3_bucket_name
+    s3_bucket.put_object(Bucket=bucket, Key="profiles/child_1.json", Body=json.dumps(_profile(1)))
+
+    assert profile_index.load_profile_index() is None
+    assert [p["childId"] for p in profile_index.list_indexed_profiles()] == ["child_1"]
+
+
+def test_rebuild_indexes_every_profile(s3_bucket):
+    bucket = get_settings().s3_bucket_name
+    for i in range(40):
+        s3_bucket.put_object(Bucket=bucket, Key=f"profiles/child_{i}.json", Body=json.dumps(_profile(i)))
+
+    assert profile_index.rebuild_profile_index() == {"profiles": 40, "shards": 16}
+
+    entries = profile_index.list_indexed_profiles()
+    assert sorted(e["childId"] for e in entries) == sorted(f"child_{i}" for i in range(40))
+    assert all("avatar" not in e for e in entries)
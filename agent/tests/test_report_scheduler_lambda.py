@@ -0,0 +1,260 @@
+"""Tests for the weekly report scheduler Lambda."""
+from __future__ import annotations
+
+import importlib.util
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import boto3
+import pytest
+
+from src.config import get_settings
+
+LAMBDA_PATH = Path(__file__).resolve().parent.parent / "infrastructure" / "report_scheduler_lambda.py"
+BUCKET = get_settings().s3_bucket_name
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    monkeypatch.setenv("S3_BUCKET_NAME", BUCKET)
+    monkeypatch.setenv("AGENT_RUNTIME_ARN", "arn:aws:bedrock-agentcore:runtime/test")
+    spec = importlib.util.spec_from_file_location("report_scheduler_lambda", LAMBDA_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakeAgentCore:
+    def __init__(self, fail_for: set[str] = frozenset()):
+        self.fail_for = fail_for
+        self.invoked: list[str] = []
+        self._lock = threading.Lock()
+
+    def invoke_agent_runtime(self, agentRuntimeArn, payload):
+        child_id = json.loads(payload)["childId"]
+        with self._lock:
+            self.invoked.append(child_id)
+        if child_id in self.fail_for:
+            raise RuntimeError("throttled")
+        return {"statusCode": 200}
+
+
+@pytest.fixture
+def s3(s3_bucket):
+    return s3_bucket
+
+
+def _add_profiles(s3, count: int) -> None:
+    for i in range(count):
+        profile = {"childId": f"child_{i}", "ageGroup": "6-8", "interests": "cats"}
+        s3.put_object(Bucket=BUCKET, Key=f"profiles/child_{i}.json", Body=json.dumps(profile))
+
+
+def test_all_pages_are_dispatched(scheduler, s3, monkeypatch):
+    _add_profiles(s3, 1005)
+    agentcore = FakeAgentCore(fail_for={"child_3"})
+    monkeypatch.setattr(scheduler, "_clients", lambda: (s3, agentcore))
+
+    body = json.loads(scheduler.handler({}, None)["body"])
+
+    assert body["reports_triggered"] == 1005
+    assert body["succeeded"] == 1004
+    assert body["failed"] == 1
+    assert {"childId": "child_3", "status": "error"} in body["results"]
+    assert len(set(agentcore.invoked)) == 1005
+
+
+def test_no_profiles(scheduler, s3, monkeypatch):
+    monkeypatch.setattr(scheduler, "_clients", lambda: (s3, FakeAgentCore()))
+
+    assert scheduler.handler({}, None)["body"] == "No profiles"
+
+
+class TestShardedRuns:
+    def test_profiles_are_split_into_shards(self, scheduler, s3, monkeypatch):
+        _add_profiles(s3, 25)
+        monkeypatch.setattr(scheduler, "SHARD_SIZE", 10)
+        monkeypatch.setattr(scheduler, "_clients", lambda: (s3, FakeAgentCore()))
+
+        body = json.loads(scheduler.handler({"runId": "run-1"}, None)["body"])
+
+        assert body["shards"] == 3
+        assert body["succeeded"] == 25
+
+    def test_rerun_resumes_only_unfinished_children(self, scheduler, s3, monkeypatch):
+        _add_profiles(s3, 25)
+        monkeypatch.setattr(scheduler, "SHARD_SIZE", 10)
+        first = FakeAgentCore(fail_for={"child_3", "child_17"})
+        monkeypatch.setattr(scheduler, "_clients", lambda: (s3, first))
+        scheduler.handler({"runId": "run-1"}, None)
+
+        second = FakeAgentCore()
+        monkeypatch.setattr(scheduler, "_clients", lambda: (s3, second))
+        body = json.loads(scheduler.handler({"runId": "run-1"}, None)["body"])
+
+        assert body["shards_queued"] == 2
+        assert sorted(second.invoked) == ["child_17", "child_3"]
+
+    def test_force_starts_a_fresh_run(self, scheduler, s3, monkeypatch):
+        _add_profiles(s3, 3)
+        monkeypatch.setattr(scheduler, "_clients", lambda: (s3, FakeAgentCore()))
+        scheduler.handler({"runId": "run-1"}, None)
+        _add_profiles(s3, 4)
+        agentcore = FakeAgentCore()
+        monkeypatch.setattr(scheduler, "_clients", lambda: (s3, agentcore))
+
+        rerun = json.loads(scheduler.handler({"runId": "run-1"}, None)["body"])
+        forced = json.loads(scheduler.handler({"runId": "run-1", "force": True}, None)["body"])
+
+        assert rerun["shards_queued"] == 0
+        assert forced["runId"].startswith("run-1-force-")
+        assert forced["reports_triggered"] == 4
+        assert sorted(agentcore.invoked) == [f"child_{i}" for i in range(4)]
+
+    def test_shard_out_of_time_is_requeued(self, scheduler, s3, monkeypatch):
+        _add_profiles(s3, 5)
+        agentcore = FakeAgentCore()
+        queue = scheduler.LocalShardQueue()
+        scheduler.plan_run(s3, queue, "run-1")
+        item = queue.items.pop()
+
+        class Context:
+            calls = 0
+
+            def get_remaining_time_in_millis(self):
+                self.calls += 1
+                return 120_000 if self.calls <= 2 else 1_000
+
+        monkeypatch.setattr(scheduler, "MAX_CONCURRENCY", 1)
+        results = scheduler.process_shard(s3, agentcore, queue, item, Context())
+
+        assert len(results) == 2
+        assert queue.items == [item]
+        assert len(scheduler.process_shard(s3, agentcore, queue, item)) == 3
+
+    def test_sqs_record_that_starts_out_of_time_is_requeued(self, scheduler, s3, monkeypatch):
+        sqs = boto3.client("sqs", region_name="us-east-1")
+        queue_url = sqs.create_queue(QueueName="shards")["QueueUrl"]
+        monkeypatch.setattr(scheduler, "SHARD_QUEUE_URL", queue_url)
+        monkeypatch.setattr(scheduler, "SHARD_SIZE", 3)
+        monkeypatch.setattr(scheduler, "MAX_CONCURRENCY", 1)
+        _add_profiles(s3, 6)
+        agentcore = FakeAgentCore()
+        monkeypatch.setattr(scheduler, "_clients", lambda: (s3, agentcore))
+        scheduler.handler({"runId": "run-1"}, None)
+        messages = sqs.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=10)["Messages"]
+
+        class Context:
+            # The first shard uses up the invocation's time.
+            calls = 0
+
+            def get_remaining_time_in_millis(self):
+                self.calls += 1
+                return 120_000 if self.calls <= 3 else 1_000
+
+        records = [{"body": m["Body"]} for m in messages]
+        body = json.loads(scheduler.handler({"Records": records}, Context())["body"])
+
+        assert body["reports_triggered"] == 3
+        requeued = sqs.receive_message(QueueUrl=queue_url)["Messages"]
+        assert [json.loads(m["Body"]) for m in requeued] == [json.loads(records[1]["body"])]
+
+    def test_duplicate_plan_does_not_requeue_shards_in_progress(self, scheduler, s3, monkeypatch):
+        _add_profiles(s3, 25)
+        monkeypatch.setattr(scheduler, "SHARD_SIZE", 10)
+        queue = scheduler.LocalShardQueue()
+
+        first = scheduler.plan_run(s3, queue, "run-1")
+        duplicate = scheduler.plan_run(s3, queue, "run-1")
+
+        assert first["shards_queued"] == 3
+        assert duplicate == {"shards": 3, "shards_queued": 0, "shards_in_progress": 3}
+        assert len(queue.items) == 3
+
+        scheduler.process_shard(s3, FakeAgentCore(), queue, queue.items.pop(0))
+
+        class Later(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return datetime.now(tz) + timedelta(seconds=scheduler.SHARD_LEASE_SECONDS + 1)
+
+        monkeypatch.setattr(scheduler, "datetime", Later)
+        expired = scheduler.plan_run(s3, queue, "run-1")
+
+        assert expired["shards_queued"] == 2  # leases lapsed; shard 0 is complete
+
+    def test_sqs_records_process_one_shard(self, scheduler, s3, monkeypatch):
+        _add_profiles(s3, 3)
+        scheduler.plan_run(s3, scheduler.LocalShardQueue(), "run-1")
+        agentcore = FakeAgentCore()
+        monkeypatch.setattr(scheduler, "_clients", lambda: (s3, agentcore))
+
+        event = {"Records": [{"body": json.dumps({"runId": "run-1", "shard": 0})}]}
+        body = json.loads(scheduler.handler(event, None)["body"])
+
+        assert body["succeeded"] == 3
+
+
+class TestChangeDetection:
+    def _modified(self, scheduler, monkeypatch, times: dict[str, int]) -> None:
+        def newest(s3, prefix):
+            ts = times.get(prefix)
+            return datetime.fromtimestamp(ts, timezone.utc) if ts is not None else None
+
+        monkeypatch.setattr(scheduler, "_newest_modified", newest)
+
+    def test_unchanged_children_are_skipped(self, scheduler, s3, monkeypatch):
+        _add_profiles(s3, 3)
+        self._modified(scheduler, monkeypatch, {
+            # child_0: progress since the last report -> regenerate
+            "progress/child_0/": 200, "reports/child_0/": 100,
+            # child_1: report newer than progress -> skip
+            "progress/child_1/": 100, "reports/child_1/": 200,
+            # child_2: never reported -> generate
+            "progress/child_2/": 100,
+        })
+        agentcore = FakeAgentCore()
+        monkeypatch.setattr(scheduler, "_clients", lambda: (s3, agentcore))
+
+        body = json.loads(scheduler.handler({"runId": "run-1"}, None)["body"])
+
+        assert sorted(agentcore.invoked) == ["child_0", "child_2"]
+        assert body["generated"] == 2
+        assert body["skipped"] == 1
+        assert body["succeeded"] == 3
+        assert {"childId": "child_1", "status": "skipped"} in body["results"]
+
+    def test_skipped_children_count_as_done(self, scheduler, s3, monkeypatch):
+        _add_profiles(s3, 1)
+        self._modified(scheduler, monkeypatch, {"reports/child_0/": 100})
+        monkeypatch.setattr(scheduler, "_clients", lambda: (s3, FakeAgentCore()))
+        scheduler.handler({"runId": "run-1"}, None)
+
+        body = json.loads(scheduler.handler({"runId": "run-1"}, None)["body"])
+
+        assert body["shards_queued"] == 0
+
+    def test_newest_modified_reads_s3(self, scheduler, s3):
+        s3.put_object(Bucket=BUCKET, Key="reports/child_0/r1.json", Body=b"{}")
+
+        assert scheduler._newest_modified(s3, "reports/child_0/") is not None
+        assert scheduler._newest_modified(s3, "reports/child_9/") is None
+
+
+class TestProfileIndex:
+    def test_children_come_from_the_index(self, scheduler, s3, monkeypatch):
+        lines = [{"childId": f"child_{i}", "ageGroup": "6-8", "interests": "cats"} for i in range(4)]
+        s3.put_object(Bucket=BUCKET, Key="index/profiles/00.ndjson",
+                      Body="".join(json.dumps(e) + "\n" for e in lines[:3]))
+        s3.put_object(Bucket=BUCKET, Key="index/profiles/01.ndjson",
+                      Body=json.dumps(lines[3]) + "\n")
+        agentcore = FakeAgentCore()
+        monkeypatch.setattr(scheduler, "_clients", lambda: (s3, agentcore))
+
+        body = json.loads(scheduler.handler({"runId": "run-1"}, None)["body"])
+
+        # No profiles/*.json objects exist: the index alone drives the run.
+        assert body["generated"] == 4
+        assert sorted(agentcore.invoked) == [f"child_{i}" for i in range(4)]
@@ -0,0 +1,90 @@
+"""Tests for archiving generated reports and serving them while history is unchanged."""
+from __future__ import annotations
+
+from unittest.mock import patch
+
+from src.agent.graph import get_compiled_graph
+from src.config import get_settings
+from src.models.input import ChildInput
+from src.tools import report_store
+from tests.test_reporter import MOCK_REPORT_RESPONSE
+
+RECORD = {
+    "recordId": "rec_1",
+    "childId": "child_1",
+    "date": "2026-02-20",
+    "correctAnswers": 2,
+    "incorrectAnswers": 8,
+    "sessionsCompleted": 1,
+    "topicBreakdown": {"fractions": {"correct": 2, "incorrect": 8}},
+}
+
+
+def _report(records: list[dict]) -> dict:
+    child_input = ChildInput.model_validate({
+        "childId": "child_1",
+        "ageGroup": "9-12",
+        "requestType": "report",
+        "progressRecords": records,
+    })
+    return get_compiled_graph().invoke({"input": child_input})
+
+
+@patch("src.agent.graph.search_parenting_context", return_value="")
+@patch("src.agent.reporter.generate", return_value=MOCK_REPORT_RESPONSE)
+class TestArchivedReports:
+    def test_unchanged_history_is_served_from_archive(self, mock_gen, mock_exa, s3_bucket):
+        first = _report([RECORD])
+        report_store._memory = None  # force the S3 read
+        second = _report([RECORD])
+
+        assert second["output"] == first["output"]
+        assert mock_gen.call_count == 1
+        listed = s3_bucket.list_objects_v2(Bucket=get_settings().s3_bucket_name,
+                                        Prefix="reports/child_1/")
+        # The report itself plus the latest.json copy used for updates.
+        assert listed["KeyCount"] == 2
+
+    def test_changed_topics_regenerate(self, mock_gen, mock_exa, s3_bucket):
+        _report([RECORD])
+        _report([RECORD, {
+            **RECORD, "recordId": "rec_2", "date": "2026-02-21",
+            "topicBreakdown": {"division": {"correct": 1, "incorrect": 9}},
+        }])
+
+        assert mock_gen.call_count == 2
+
+    def test_unchanged_topics_update_numbers_without_llm(self, mock_gen, mock_exa, s3_bucket):
+        first = _report([RECORD])
+        second = _report([RECORD, {
+            **RECORD, "recordId": "rec_2", "date": "2026-02-21", "timeSpentSeconds": 600,
+        }])
+
+        assert mock_gen.call_count == 1
+        assert second["output"]["summary"] == {
+            "period": "2026-02-20 to 2026-02-21",
+            "overallAccuracy": 0.2,
+            "sessionsCompleted": 2,
+            "timeInvestedMinutes": 10.0,
+        }
+        assert second["output"]["recommendations"] == first["output"]["recommendations"]
+
+        third = _report([RECORD, {
+            **RECORD, "recordId": "rec_2", "date": "2026-02-21", "timeSpentSeconds": 600,
+        }])
+        assert third["output"] == second["output"]
+        assert mock_exa.call_count == 1
+
+    def test_delta_can_be_disabled(self, mock_gen, mock_exa, s3_bucket, monkeypatch):
+        monkeypatch.setattr(get_settings(), "report_delta_enabled", False)
+        _report([RECORD])
+        _report([RECORD, {**RECORD, "recordId": "rec_2", "date": "2026-02-21"}])
+
+        assert mock_gen.call_count == 2
+
+    def test_fallback_is_not_archived(self, mock_gen, mock_exa, s3_bucket):
+        mock_gen.side_effect = Exception("API down")
+        _report([RECORD])
+        _report([RECORD])
+
+        assert mock_gen.call_count == 2
@@ -3,8 +3,9 @@ from __future__ import annotations
 
 from unittest.mock import patch
 
-from src.agent.reporter import reporter_generate
+from src.agent.reporter import _build_prompts, compact_trend, reporter_generate
 from src.agent.state import AgentState
+from src.config import get_settings
 from src.models.input import ChildInput
 from src.models.progress import (
     DateRange,
@@ -101,3 +102,43 @@ class TestReporterGenerate:
         assert result["error"] == "insufficient_data"
         assert result["output"]["patterns"]["engagementIndicators"] == "No data available yet."
         assert len(result["output"]["recommendations"]) == 1
+
+
+def _long_history(sessions: int, topics: int) -> HistoricalSummary:
+    return _make_history().model_copy(update={
+        "total_sessions": sessions,
+        "accuracy_trend": [0.5 + (i % 10) / 20 for i in range(sessions)],
+        "struggling_topics": [
+            StruggleTopic(topic=f"topic_{i}", incorrect_rate=0.6) for i in range(topics)
+        ],
+    })
+
+
+class TestPromptSize:
+    def test_short_trend_is_kept_in_full(self):
+        assert compact_trend([0.6, 0.7, 0.75], recent=8, max_buckets=12) == "[0.6, 0.7, 0.75]"
+
+    def test_older_sessions_are_bucketed(self):
+        trend = [0.5] * 14 + [0.9] * 2
+
+        assert compact_trend(trend, recent=2, max_buckets=12) == (
+            "earlier (weekly averages): [0.5, 0.5]; last 2 sessions: [0.9, 0.9]"
+        )
+
+    def test_topic_lists_are_capped(self):
+        child_input = _make_state()["input"]
+        system_prompt, _ = _build_prompts(child_input, _long_history(5, 40), "")
+
+        assert "topic_4" in system_prompt
+        assert "topic_5:" not in system_prompt
+        assert "(+35 more)" in system_prompt
+
+    def test_prompt_stays_under_budget_for_any_history(self):
+        child_input = _make_state()["input"]
+        budget = get_settings().reporter_max_input_tokens
+        sizes = []
+        for sessions in (10, 1_000, 100_000):
+            prompts = _build_prompts(child_input, _long_history(sessions, 200), "x" * 50_000)
+            sizes.append(sum(len(p) for p in prompts) // 4)
+
+        assert all(size <= budget for size in sizes)
@@ -0,0 +1,85 @@
+"""Tests for the shared MiniMax rate limiter and circuit breaker."""
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import pytest
+
+from src.llm.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    RateLimiter,
+    RateLimitExceededError,
+)
+from src.observability import metrics_snapshot
+
+
+class TestRateLimiter:
+    def test_within_budget_does_not_wait(self):
+        limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=1000)
+        assert limiter.acquire(100, max_wait=0) == 0
+
+    def test_rejects_when_wait_exceeds_max(self):
+        limiter = RateLimiter(requests_per_minute=1, tokens_per_minute=1000)
+        limiter.acquire(10, max_wait=0)
+        with pytest.raises(RateLimitExceededError):
+            limiter.acquire(10, max_wait=1.0)
+
+    def test_waits_for_token_refill(self):
+        limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=600)
+        limiter.acquire(600, max_wait=0)
+        with patch("src.llm.resilience.time.sleep") as sleep:
+            waited = limiter.acquire(5, max_wait=5)
+        assert waited == pytest.approx(0.5, abs=0.05)
+        sleep.assert_called_once()
+
+    def test_settle_refunds_unused_tokens(self):
+        limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=1000)
+        limiter.acquire(1000, max_wait=0)
+        limiter.settle(reserved=1000, actual=200)
+        assert limiter.try_acquire(500)
+
+    def test_try_acquire_never_waits(self):
+        limiter = RateLimiter(requests_per_minute=1, tokens_per_minute=1000)
+        assert limiter.try_acquire(10)
+        assert not limiter.try_acquire(10)
+
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold_failures(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60)
+        breaker.record_failure()
+        assert breaker.state == CLOSED
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        assert metrics_snapshot()["gauges"]["minimax.circuit_state"] == 2
+
+    def test_success_resets_failure_count(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == CLOSED
+
+    def test_half_open_allows_single_probe(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+        breaker.record_failure()
+        breaker.before_call()
+        assert breaker.state == HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_success()
+        assert breaker.state == CLOSED
+
+    def test_failed_probe_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=3, reset_seconds=0)
+        for _ in range(3):
+            breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+        assert breaker.state == OPEN
@@ -0,0 +1,106 @@
+"""Tests for the idempotent result cache."""
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import patch
+
+from src.models.input import ChildInput
+from src.result_cache import ResultCache, request_fingerprint
+
+
+def _child(**overrides) -> ChildInput:
+    values = {"childId": "c1", "ageGroup": "6-8", "interests": "cats", "requestType": "lesson"}
+    values.update(overrides)
+    return ChildInput.model_validate(values)
+
+
+def _always(result: dict) -> bool:
+    return True
+
+
+class TestFingerprint:
+    def test_same_input_and_history_match(self):
+        assert request_fingerprint(_child(), "v1") == request_fingerprint(_child(), "v1")
+
+    def test_history_version_and_fields_change_key(self):
+        base = request_fingerprint(_child(), "v1")
+        assert request_fingerprint(_child(), "v2") != base
+        assert request_fingerprint(_child(interests="dogs"), "v1") != base
+
+    def test_inline_records_are_covered_by_history_version(self):
+        with_records = _child(progressRecords=[{"recordId": "r1", "childId": "c1", "date": "2026-02-20"}])
+        assert request_fingerprint(with_records, "v1") == request_fingerprint(_child(), "v1")
+
+
+class TestResultCache:
+    def test_entries_expire(self):
+        cache = ResultCache(ttl_seconds=10, max_entries=10)
+        with patch("src.result_cache.time.monotonic", return_value=100.0):
+            cache.put("k", {"status": "success"})
+        with patch("src.result_cache.time.monotonic", return_value=105.0):
+            assert cache.get("k") == {"status": "success"}
+        with patch("src.result_cache.time.monotonic", return_value=111.0):
+            assert cache.get("k") is None
+
+    def test_evicts_least_recently_used(self):
+        cache = ResultCache(ttl_seconds=60, max_entries=2)
+        cache.put("a", {"n": 1})
+        cache.put("b", {"n": 2})
+        cache.get("a")
+        cache.put("c", {"n": 3})
+        assert cache.get("b") is None
+        assert cache.get("a") == {"n": 1}
+
+    def test_concurrent_identical_requests_are_coalesced(self):
+        cache = ResultCache(ttl_seconds=60, max_entries=10)
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return {"status": "success"}
+
+        async def run():
+            return await asyncio.gather(
+                *(cache.get_or_run("k", compute, _always) for _ in range(5))
+            )
+
+        results = asyncio.run(run())
+        assert calls == 1
+        assert results == [{"status": "success"}] * 5
+
+    def test_cancelled_leader_hands_the_run_to_a_waiting_request(self):
+        cache = ResultCache(ttl_seconds=60, max_entries=10)
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return {"status": "success", "run": calls}
+
+        async def run():
+            leader = asyncio.create_task(cache.get_or_run("k", compute, _always))
+            await asyncio.sleep(0)
+            followers = [
+                asyncio.create_task(cache.get_or_run("k", compute, _always)) for _ in range(3)
+            ]
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            results = await asyncio.gather(*followers)
+            return leader, results
+
+        leader, results = asyncio.run(run())
+        assert leader.cancelled()
+        assert calls == 2
+        assert results == [{"status": "success", "run": 2}] * 3
+
+    def test_uncacheable_results_are_not_stored(self):
+        cache = ResultCache(ttl_seconds=60, max_entries=10)
+
+        async def compute():
+            return {"status": "partial_success"}
+
+        asyncio.run(cache.get_or_run("k", compute, lambda r: r["status"] == "success"))
+        assert cache.get("k") is None
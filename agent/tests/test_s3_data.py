@@ -1,10 +1,24 @@
 """Tests for S3 data layer and historical summary aggregation."""
 from __future__ import annotations
 
+import json
+from datetime import date, timedelta
+
 import pytest
 
+from src.agent.graph import load_history
+from src.models.input import ChildInput
+from src.config import get_settings
 from src.models.progress import ProgressRecord, TopicScore
-from src.tools.s3_data import build_historical_summary
+from src.tools import s3_data
+from src.tools.s3_data import (
+    ProgressCheckpointError,
+    build_historical_summary,
+    compute_history_version,
+    get_progress_records,
+    merge_progress_records,
+    put_progress_record,
+)
 
 
 def _make_record(**overrides) -> ProgressRecord:
@@ -94,3 +108,125 @@ class TestBuildHistoricalSummary:
         ]
         summary = build_historical_summary("child_1", records)
         assert summary.lockout_frequency == 3
+
+
+class TestDeltaUploads:
+    def test_uploaded_records_replace_stored_by_id(self):
+        stored = [_make_record(), _make_record(recordId="rec_2", date="2026-02-21")]
+        uploaded = [
+            _make_record(recordId="rec_2", date="2026-02-21", correctAnswers=9),
+            _make_record(recordId="rec_3", date="2026-02-22"),
+        ]
+
+        merged = merge_progress_records(stored, uploaded, "2026-02-21")
+
+        assert [r.record_id for r in merged] == ["rec_1", "rec_2", "rec_3"]
+        assert merged[1].correct_answers == 9
+
+    def test_delta_matches_full_upload(self, monkeypatch):
+        full = [_make_record(), _make_record(recordId="rec_2", date="2026-02-21")]
+        monkeypatch.setattr("src.agent.graph.get_progress_records", lambda child_id: full[:1])
+
+        def history(**fields):
+            child_input = ChildInput.model_validate(
+                {"childId": "child_1", "ageGroup": "9-12", "requestType": "report", **fields}
+            )
+            return load_history({"input": child_input})
+
+        delta = history(
+            progressCheckpoint="2026-02-20",
+            progressRecords=[full[1].model_dump(by_alias=True)],
+        )
+        whole = history(progressRecords=[r.model_dump(by_alias=True) for r in full])
+
+        assert delta["history_version"] == whole["history_version"] == compute_history_version(full)
+        assert delta["history"] == whole["history"]
+
+    @pytest.mark.parametrize("stored_dates", [[], ["2026-02-18"]])
+    def test_checkpoint_past_stored_history_is_rejected(self, stored_dates):
+        stored = [_make_record(recordId=f"s_{d}", date=d) for d in stored_dates]
+
+        with pytest.raises(ProgressCheckpointError, match="send the full progressRecords"):
+            merge_progress_records(stored, [_make_record(date="2026-02-21")], "2026-02-20")
+
+
+def _dates(count: int, start: date = date(2023, 1, 1)) -> list[str]:
+    return [(start + timedelta(days=i)).isoformat() for i in range(count)]
+
+
+class TestStoredHistory:
+    @pytest.fixture
+    def reads(self, s3_bucket, monkeypatch):
+        """Keys fetched with GetObject by the code under test."""
+        fetched = []
+        real = s3_bucket.get_object
+
+        def get_object(**kwargs):
+            fetched.append(kwargs["Key"])
+            return real(**kwargs)
+
+        monkeypatch.setattr(s3_bucket, "get_object", get_object)
+        monkeypatch.setattr(s3_data, "_s3_client", s3_bucket)
+        return fetched
+
+    def _put(self, s3_bucket, day: str) -> None:
+        s3_bucket.put_object(
+            Bucket=get_settings().s3_bucket_name,
+            Key=f"progress/child_1/{day}.json",
+            Body=json.dumps(_make_record(recordId=f"rec_{day}", date=day).model_dump(by_alias=True)),
+        )
+
+    def test_history_past_one_list_page_is_loaded(self, s3_bucket, reads):
+        days = _dates(1005)
+        for day in days:
+            self._put(s3_bucket, day)
+
+        records = get_progress_records("child_1")
+
+        assert [r.date for r in records] == days
+
+    def test_later_loads_read_only_records_past_the_high_water_mark(self, s3_bucket, reads):
+        days = _dates(6)
+        for day in days[:5]:
+            self._put(s3_bucket, day)
+        get_progress_records("child_1")
+        self._put(s3_bucket, days[5])
+        reads.clear()
+
+        records = get_progress_records("child_1")
+
+        assert [r.date for r in records] == days
+        assert reads == [
+            "progress-snapshots/child_1.json",
+            f"progress/child_1/{days[4]}.json",
+            f"progress/child_1/{days[5]}.json",
+        ]
+
+    def test_a_rewritten_latest_record_replaces_the_stored_one(self, s3_bucket, reads):
+        for day in _dates(3):
+            self._put(s3_bucket, day)
+        get_progress_records("child_1")
+
+        put_progress_record(_make_record(recordId="rec_new", date=_dates(3)[-1], correctAnswers=9))
+
+        assert get_progress_records("child_1")[-1].correct_answers == 9
+
+    def test_a_backfilled_record_is_not_missed(self, s3_bucket, reads):
+        days = _dates(3)
+        for day in days[1:]:
+            self._put(s3_bucket, day)
+        get_progress_records("child_1")
+
+        put_progress_record(_make_record(recordId="rec_old", date=days[0]))
+
+        assert [r.date for r in get_progress_records("child_1")] == days
+
+    def test_a_date_range_stops_listing_past_its_end(self, s3_bucket, reads):
+        days = _dates(10)
+        for day in days:
+            self._put(s3_bucket, day)
+
+        records = get_progress_records("child_1", start_date=days[2], end_date=days[4])
+
+        assert [r.date for r in records] == days[2:5]
+        assert reads == [f"progress/child_1/{day}.json" for day in days[2:5]]
@@ -0,0 +1,186 @@
+"""Tests for two-stage (template + personalization) lesson generation."""
+from __future__ import annotations
+
+import asyncio
+import copy
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from src.agent import templates
+from src.agent.planner import planner_generate
+from src.config import Settings
+from tests.test_planner import _make_state
+
+MOCK_TEMPLATE = {
+    "lessonPlan": {
+        "title": "Multiplication Groups",
+        "learningObjectives": ["Understand multiplication as repeated addition"],
+        "durationMinutes": 7,
+        "activities": [
+            {
+                "type": "explanation",
+                "content": "Imagine 3 groups of {interest}, 4 in each group...",
+                "analogyUsed": "{interest}",
+            },
+            {
+                "type": "practice",
+                "content": "Share 8 {interest} between 4 friends.",
+                "analogyUsed": "{interest}",
+            },
+            {"type": "review", "content": "3 x 4 = 12", "analogyUsed": ""},
+        ],
+    },
+    "videoScript": {
+        "scenes": [
+            {"visualCue": "Groups of {interest}", "dialogue": "Let's count!", "durationSeconds": 15}
+        ]
+    },
+}
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(templates, "_memory_cache", {})
+    monkeypatch.setattr(templates, "_load_stored", lambda key: None)
+    monkeypatch.setattr(templates, "_store", lambda key, template: None)
+
+
+class TestPersonalizeTemplate:
+    def test_rotates_keywords_across_slots(self):
+        lesson = templates.personalize_template(MOCK_TEMPLATE, ["dinosaurs", "pizza"])
+        activities = lesson["lessonPlan"]["activities"]
+
+        assert activities[0]["analogyUsed"] == "dinosaurs"
+        assert activities[1]["analogyUsed"] == "pizza"
+        assert "Share 8 pizza" in activities[1]["content"]
+        assert activities[2]["analogyUsed"] == ""
+        assert lesson["videoScript"]["scenes"][0]["visualCue"] == "Groups of dinosaurs"
+
+    def test_does_not_mutate_template(self):
+        templates.personalize_template(MOCK_TEMPLATE, ["dinosaurs"])
+        assert MOCK_TEMPLATE["lessonPlan"]["activities"][0]["analogyUsed"] == "{interest}"
+
+    def test_empty_keywords_use_default(self):
+        lesson = templates.personalize_template(MOCK_TEMPLATE, [])
+        assert lesson["lessonPlan"]["activities"][0]["analogyUsed"] == templates.DEFAULT_INTEREST
+
+
+class TestTemplateCache:
+    @patch("src.agent.templates.generate", return_value=MOCK_TEMPLATE)
+    def test_template_generated_once_per_topic_and_age(self, mock_gen):
+        templates.get_lesson_template("multiplication", "9-12", "")
+        templates.get_lesson_template("Multiplication", "9-12", "")
+        templates.get_lesson_template("multiplication", "6-8", "")
+
+        assert mock_gen.call_count == 2
+        assert "dinosaurs" not in mock_gen.call_args[0][0]
+
+    def test_template_without_slots_is_rejected_and_not_cached(self, monkeypatch):
+        stored = []
+        monkeypatch.setattr(templates, "_store", lambda key, template: stored.append(key))
+        unslotted = copy.deepcopy(MOCK_TEMPLATE)
+        for activity in unslotted["lessonPlan"]["activities"]:
+            activity["content"] = activity["content"].replace("{interest}", "apples")
+            activity["analogyUsed"] = activity["analogyUsed"].replace("{interest}", "apples")
+
+        with patch("src.agent.templates.generate", return_value=unslotted) as mock_gen:
+            for _ in range(2):
+                with pytest.raises(templates.TemplateSlotError):
+                    templates.get_lesson_template("multiplication", "9-12", "")
+
+        assert mock_gen.call_count == 2
+        assert stored == []
+        assert templates._memory_cache == {}
+
+    def test_stored_template_without_slots_is_regenerated(self, monkeypatch):
+        unslotted = copy.deepcopy(MOCK_TEMPLATE)
+        unslotted["lessonPlan"]["activities"] = unslotted["lessonPlan"]["activities"][2:]
+        monkeypatch.setattr(templates, "_load_stored", lambda key: unslotted)
+
+        with patch("src.agent.templates.generate", return_value=MOCK_TEMPLATE) as mock_gen:
+            template = templates.get_lesson_template("multiplication", "9-12", "")
+
+        mock_gen.assert_called_once()
+        assert template == MOCK_TEMPLATE
+
+
+class TestTemplateCoalescing:
+    def test_concurrent_misses_generate_once(self):
+        def slow_generate(*args, **kwargs):
+            time.sleep(0.1)
+            return MOCK_TEMPLATE
+
+        with patch("src.agent.templates.generate", side_effect=slow_generate) as mock_gen:
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                results = list(pool.map(
+                    lambda _: templates.get_lesson_template("multiplication", "9-12", ""),
+                    range(4),
+                ))
+
+        assert mock_gen.call_count == 1
+        assert results == [MOCK_TEMPLATE] * 4
+        assert templates._in_flight == {}
+
+    def test_concurrent_async_misses_generate_once(self):
+        calls = []
+
+        async def slow_agenerate(*args, **kwargs):
+            calls.append(args)
+            await asyncio.sleep(0.05)
+            return MOCK_TEMPLATE
+
+        async def run():
+            return await asyncio.gather(*(
+                templates.aget_lesson_template("multiplication", "9-12", "")
+                for _ in range(4)
+            ))
+
+        with patch("src.agent.templates.agenerate", side_effect=slow_agenerate):
+            results = asyncio.run(run())
+
+        assert len(calls) == 1
+        assert results == [MOCK_TEMPLATE] * 4
+
+    def test_waiting_caller_takes_over_from_a_cancelled_one(self):
+        calls = []
+
+        async def slow_agenerate(*args, **kwargs):
+            calls.append(args)
+            await asyncio.sleep(0.05)
+            return MOCK_TEMPLATE
+
+        async def run():
+            first = asyncio.create_task(
+                templates.aget_lesson_template("multiplication", "9-12", "")
+            )
+            await asyncio.sleep(0.01)
+            second = asyncio.create_task(
+                templates.aget_lesson_template("multiplication", "9-12", "")
+            )
+            await asyncio.sleep(0.01)
+            first.cancel()
+            return await second
+
+        with patch("src.agent.templates.agenerate", side_effect=slow_agenerate):
+            assert asyncio.run(run()) == MOCK_TEMPLATE
+
+        assert len(calls) == 2
+        assert templates._in_flight == {}
+
+
+class TestTemplatedPlanner:
+    @patch("src.agent.planner.get_settings", return_value=Settings(planner_mode="templated"))
+    @patch("src.agent.planner.generate")
+    @patch("src.agent.templates.generate", return_value=MOCK_TEMPLATE)
+    def test_planner_personalizes_cached_template(self, mock_template_gen, mock_gen, _):
+        first = planner_generate(_make_state())
+        second = planner_generate(_make_state())
+
+        mock_gen.assert_not_called()
+        assert mock_template_gen.call_count == 1
+        analogies = [a["analogyUsed"] for a in first["output"]["lessonPlan"]["activities"]]
+        assert analogies[:2] == ["dinosaurs", "pizza"]
+        assert second["output"] == first["output"]
@@ -0,0 +1,160 @@
+"""Tests for container warm-up."""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import anthropic
+import httpx
+import pytest
+from bedrock_agentcore.runtime import BedrockAgentCoreApp
+from starlette.testclient import TestClient
+
+from src import warmup
+from src.config import Settings
+from src.llm import minimax
+
+
+def _ok(timeout: float) -> None:
+    pass
+
+
+def _down(timeout: float) -> None:
+    raise ConnectionError("unreachable")
+
+
+def _hangs(timeout: float) -> None:
+    time.sleep(2)
+
+
+class TestRunWarmup:
+    def test_reports_each_task_status(self):
+        statuses = warmup.run_warmup(1.0, {"s3": _ok, "exa": _down})
+
+        assert statuses == {"settings": "ok", "s3": "ok", "exa": "failed"}
+
+    def test_is_bounded_by_timeout(self):
+        started = time.monotonic()
+        statuses = warmup.run_warmup(0.2, {"s3": _ok, "minimax": _hangs})
+
+        assert time.monotonic() - started < 1.0
+        assert statuses["minimax"] == "timed_out"
+        assert statuses["s3"] == "ok"
+
+    def test_tasks_run_in_parallel(self):
+        def slow(timeout: float) -> None:
+            time.sleep(0.2)
+
+        started = time.monotonic()
+        warmup.run_warmup(2.0, {"a": slow, "b": slow, "c": slow})
+
+        assert time.monotonic() - started < 0.5
+
+
+class TestStartWarmup:
+    def test_returns_without_waiting(self):
+        with patch.object(warmup, "WARMUP_TASKS", {"minimax": _hangs}), \
+                patch.object(warmup, "Settings", return_value=Settings(warmup_timeout_seconds=0.1)):
+            started = time.monotonic()
+            thread = warmup.start_warmup()
+            assert time.monotonic() - started < 0.1
+            thread.join(1.0)
+
+    def test_can_be_disabled(self):
+        with patch.object(warmup, "Settings", return_value=Settings(warmup_enabled=False)):
+            assert warmup.start_warmup() is None
+
+
+class _NotFound(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so the connection stays pooled
+
+    def do_GET(self):
+        self.send_response(404)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def minimax_server(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _NotFound)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    monkeypatch.setattr(minimax, "_async_client", None)
+    monkeypatch.setattr(
+        minimax, "get_settings",
+        lambda: Settings(anthropic_base_url=base_url, minimax_api_key="test"),
+    )
+    yield
+    server.shutdown()
+    server.server_close()
+
+
+class TestAsyncWarmup:
+    def test_opens_a_pooled_connection_on_the_running_loop(self, minimax_server):
+        async def run():
+            status = await warmup.run_async_warmup(2.0)
+            client = minimax._get_async_client()
+            idle = [conn.is_idle() for conn in client._client._transport._pool.connections]
+            await client.close()
+            return status, idle
+
+        status, idle = asyncio.run(run())
+
+        assert status == "ok"
+        assert idle == [True]
+
+    def test_lifespan_does_not_wait_for_warmup(self):
+        async def hangs(timeout: float) -> str:
+            await asyncio.sleep(2)
+            return "ok"
+
+        async def run():
+            started = time.monotonic()
+            with patch.object(warmup, "run_async_warmup", hangs):
+                async with warmup.warmup_lifespan(BedrockAgentCoreApp()):
+                    return time.monotonic() - started
+
+        assert asyncio.run(run()) < 0.1
+
+    def test_warmed_connection_serves_the_handler_loop(self, minimax_server):
+        # TestClient runs the lifespan on its own portal loop, while the app
+        # runs async entrypoints on a separate worker loop, as in production.
+        app = BedrockAgentCoreApp(lifespan=warmup.warmup_lifespan)
+        loops = {}
+
+        @app.entrypoint
+        async def handler(payload):
+            loops["handler"] = asyncio.get_running_loop()
+            client = minimax._get_async_client()
+            pool = client._client._transport._pool
+            for _ in range(100):
+                if any(conn.is_idle() for conn in pool.connections):
+                    break
+                await asyncio.sleep(0.02)
+            warmed = len(pool.connections)
+            try:
+                await client.with_options(max_retries=0).get("/", cast_to=httpx.Response)
+            except anthropic.APIStatusError:
+                pass  # any HTTP status: the pooled connection worked
+            return {"warmed": warmed, "connections": len(pool.connections)}
+
+        async def lifespan_loop(app):
+            loops["lifespan"] = asyncio.get_running_loop()
+            async with warmup.warmup_lifespan(app):
+                yield
+
+        app.router.lifespan_context = asynccontextmanager(lifespan_loop)
+        with patch.object(warmup, "Settings", return_value=Settings(warmup_timeout_seconds=2.0)), \
+                TestClient(app) as client:
+            response = client.post("/invocations", json={})
+
+        assert loops["handler"] is not loops["lifespan"]
+        assert response.status_code == 200
+        assert response.json() == {"warmed": 1, "connections": 1}